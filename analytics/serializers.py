@@ -0,0 +1,35 @@
+from rest_framework import serializers
+from uavs.models import UtilizationRollup
+
+# The longest period a single report covers, two years.
+MAX_PERIOD_DAYS = 731
+
+
+class UtilizationQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the utilization report.
+
+    ``key`` restricts the report to some brands, category ids or UAV ids,
+    and is required for the ``uav`` scope.
+    """
+    scope = serializers.ChoiceField(
+        choices=UtilizationRollup.SCOPES, default=UtilizationRollup.SCOPE_FLEET
+    )
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    key = serializers.ListField(
+        child=serializers.CharField(max_length=255), required=False, max_length=100
+    )
+
+    def validate(self, attrs):
+        if attrs["start_date"] > attrs["end_date"]:
+            raise serializers.ValidationError(
+                "The start date cannot be after the end date"
+            )
+        if (attrs["end_date"] - attrs["start_date"]).days >= MAX_PERIOD_DAYS:
+            raise serializers.ValidationError(
+                "The period cannot be longer than %d days" % MAX_PERIOD_DAYS
+            )
+        if attrs["scope"] == UtilizationRollup.SCOPE_UAV and not attrs.get("key"):
+            raise serializers.ValidationError({"key": "The uav scope requires UAV ids"})
+        return attrs
@@ -0,0 +1,89 @@
+import datetime
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.test import APITestCase
+from uavs.models import UAV, UAVCategory
+from uavs.services import RentedUAVService
+from users.models import User
+
+
+class UtilizationViewTestCase(APITestCase):
+    URL = "/api/v1/analytics/utilization/"
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            email="testuser@gmail.com", password="testpass"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.category = mommy.make(UAVCategory)
+        self.uavs = [
+            mommy.make(UAV, brand=brand, category=[self.category])
+            for brand in ("Brand 0", "Brand 0", "Brand 1")
+        ]
+        service = RentedUAVService()
+        for uav in self.uavs[:2]:
+            service.create_object(
+                uav=uav,
+                user=self.user,
+                start_date=datetime.date(2024, 1, 1),
+                end_date=datetime.date(2024, 1, 2),
+            )
+
+    def test_fleet_utilization(self):
+        response = self.client.get(
+            self.URL, {"start_date": "2024-01-01", "end_date": "2024-01-03"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["scope"], "fleet")
+        [fleet] = response.json()["results"]
+        self.assertEqual(fleet["uavs"], 3)
+        self.assertEqual(fleet["booked_days"], 4)
+        self.assertEqual(fleet["utilization"], 0.4444)
+        self.assertEqual(
+            fleet["daily"],
+            [{"day": "2024-01-01", "booked": 2}, {"day": "2024-01-02", "booked": 2}],
+        )
+
+    def test_brand_and_category_utilization(self):
+        params = {"start_date": "2024-01-01", "end_date": "2024-01-01"}
+        response = self.client.get(self.URL, dict(params, scope="brand"))
+        self.assertEqual(
+            [(row["key"], row["utilization"]) for row in response.data["results"]],
+            [("Brand 0", 1.0)],
+        )
+        response = self.client.get(
+            self.URL, dict(params, scope="brand", key=["Brand 0", "Brand 1"])
+        )
+        self.assertEqual(
+            [(row["key"], row["utilization"]) for row in response.data["results"]],
+            [("Brand 0", 1.0), ("Brand 1", 0.0)],
+        )
+        response = self.client.get(self.URL, dict(params, scope="category"))
+        self.assertEqual(response.data["results"][0]["key"], str(self.category.pk))
+        self.assertEqual(response.data["results"][0]["booked_days"], 2)
+
+    def test_query_count_does_not_depend_on_period(self):
+        # The rollups and the size of the fleet.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.URL, {"start_date": "2023-01-01", "end_date": "2024-12-31"}
+            )
+        self.assertEqual(response.data["results"][0]["booked_days"], 4)
+
+    def test_invalid_queries(self):
+        for params in (
+            {"start_date": "2024-01-02", "end_date": "2024-01-01"},
+            {"start_date": "2020-01-01", "end_date": "2024-01-01"},
+            {"start_date": "2024-01-01", "end_date": "2024-01-01", "scope": "uav"},
+            {"start_date": "2024-01-01", "end_date": "2024-01-01", "scope": "unknown"},
+            {"start_date": "2024-01-01"},
+        ):
+            response = self.client.get(self.URL, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_requires_superuser(self):
+        self.client.force_authenticate(user=mommy.make(User))
+        response = self.client.get(
+            self.URL, {"start_date": "2024-01-01", "end_date": "2024-01-01"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
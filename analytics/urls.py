@@ -0,0 +1,7 @@
+from django.urls import path
+from analytics.views import UtilizationView
+
+
+urlpatterns = [
+    path("utilization/", UtilizationView.as_view(), name="utilization"),
+]
@@ -0,0 +1,46 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from analytics.serializers import UtilizationQuerySerializer
+from uavs.rollups import get_utilization
+from utils.permissions import IsSuperUser
+
+
+class UtilizationView(APIView):
+    """
+    Reports the daily utilization of the fleet, or per brand, category or
+    UAV, over a period of at most two years.
+
+    Only the utilization rollups are read (see ``uavs.rollups``), never the
+    bookings, so the report costs the same whatever the booking history.
+
+    Query parameters:
+        scope: ``fleet`` (default), ``brand``, ``category`` or ``uav``.
+        start_date, end_date: The first and last day of the period.
+        key: A brand, category id or UAV id to report on, repeatable.
+    """
+    permission_classes = [IsAuthenticated, IsSuperUser]
+
+    def get(self, request: Request):
+        serializer = UtilizationQuerySerializer(
+            data={
+                key: request.query_params.getlist(key) if key == "key" else value
+                for key, value in request.query_params.items()
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        results = get_utilization(
+            data["scope"], data["start_date"], data["end_date"], data.get("key")
+        )
+        return Response(
+            {
+                "scope": data["scope"],
+                "start_date": data["start_date"],
+                "end_date": data["end_date"],
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
+        )
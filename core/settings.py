@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django_extensions",
     "corsheaders",
     "rest_framework",
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -96,6 +98,21 @@ DATABASES = {
     }
 }
 
+# Read replicas, see utils.routers.PrimaryReplicaRouter
+
+REPLICA_DATABASES = []
+
+for index, host in enumerate(filter(None, os.environ.get("PG_DB_REPLICA_HOSTS", "").split(","))):
+    alias = "replica_%d" % (index + 1)
+    DATABASES[alias] = dict(DATABASES["default"], HOST=host.strip(), TEST={"MIRROR": "default"})
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ["utils.routers.PrimaryReplicaRouter"]
+
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
+REPLICA_STICKY_CACHE_ALIAS = "default"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -142,7 +159,7 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "utils.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -151,3 +168,22 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
+
+# Token authentication cache, see utils.authentication.TokenCache
+
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("AUTH_TOKEN_CACHE_TTL", 30))
+
+AUTH_TOKEN_CACHE_MAX_SIZE = 10000
+
+AUTH_TOKEN_CACHE_ALIAS = os.environ.get("AUTH_TOKEN_CACHE_ALIAS")
+
+# Statements repeated more often within a request are logged as N+1 queries,
+# see utils.middleware.QueryInstrumentationMiddleware
+
+QUERY_N_PLUS_ONE_THRESHOLD = 10
+
+# List responses cache, see utils.cache.ResponseCache
+
+RESPONSE_CACHE_ALIAS = "default"
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300))
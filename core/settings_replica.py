@@ -0,0 +1,27 @@
+"""
+Settings running the project on two SQLite databases standing in for the
+primary and a read replica, to exercise the replica routing locally, e.g.
+
+    DJANGO_SETTINGS_MODULE=core.settings_replica python manage.py test uavs.tests.test_routing
+
+The test database of the replica mirrors the primary one, but the
+replica connection does not see the uncommitted data of ``TestCase``
+transactions, so only ``TransactionTestCase`` tests can read from it.
+Outside tests nothing replicates the primary into the replica file.
+"""
+from core.settings import *  # noqa: F401,F403
+from core.settings import BASE_DIR
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "primary.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "replica.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+REPLICA_DATABASES = ["replica"]
@@ -21,8 +21,15 @@ from django.urls import re_path
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
-from uavs.views import UAVCategoryViewSet, UAVViewSet, RentedUAVViewSet
-from users.views import UserViewSet
+from uavs.views import (
+    AsyncRentalUAVListView,
+    AsyncUAVDetailView,
+    AsyncUAVListView,
+    UAVCategoryViewSet,
+    UAVViewSet,
+    RentedUAVViewSet,
+)
+from users.views import AsyncUserMeView, AsyncUserRentalRecordsView, UserViewSet
 
 router = routers.DefaultRouter()
 router.register(r"uav-categories", UAVCategoryViewSet)
@@ -30,6 +37,20 @@ router.register(r"uavs", UAVViewSet)
 router.register(r"rented-uavs", RentedUAVViewSet)
 router.register(r"users", UserViewSet)
 
+# Natively async read endpoints, mirroring their sync counterparts under
+# the ASGI deployment.
+async_urlpatterns = [
+    path("uavs/", AsyncUAVListView.as_view(), name="async-uav-list"),
+    path("uavs/rental/", AsyncRentalUAVListView.as_view(), name="async-uav-rental"),
+    path("uavs/<str:pk>/", AsyncUAVDetailView.as_view(), name="async-uav-detail"),
+    path("users/me/", AsyncUserMeView.as_view(), name="async-user-me"),
+    path(
+        "users/me/rental-records/",
+        AsyncUserRentalRecordsView.as_view(),
+        name="async-user-rental-records",
+    ),
+]
+
 
 schema_view = get_schema_view(
    openapi.Info(
@@ -53,6 +74,8 @@ urlpatterns = [
             [
                 path("", include(router.urls)),
                 path("auth/", include("auth.urls")),
+                path("analytics/", include("analytics.urls")),
+                path("async/", include(async_urlpatterns)),
             ]
         ),
     ),
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UavsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'uavs'
+
+    def ready(self):
+        from uavs import signals  # noqa: F401
@@ -0,0 +1,49 @@
+import datetime
+from typing import Dict, Iterable, List, Tuple
+
+FREE = "free"
+BUSY = "busy"
+
+Period = Tuple[datetime.date, datetime.date]
+
+
+def sweep_periods(
+    periods: Iterable[Period], start_date: datetime.date, end_date: datetime.date
+) -> List[Dict]:
+    """
+    Merges booking periods sorted by start date into the free and busy
+    windows covering the given window, in a single pass.
+
+    Periods are inclusive on both ends and clipped to the window. Busy
+    periods overlapping or following each other without a free day are
+    merged into one busy window.
+
+    Returns:
+        List[Dict]: The windows in chronological order, with their
+        ``status`` (``free`` or ``busy``), ``start_date`` and ``end_date``.
+    """
+    one_day = datetime.timedelta(days=1)
+    windows = []
+    # The first day not yet covered by a window.
+    cursor = start_date
+    for period_start, period_end in periods:
+        period_start, period_end = max(period_start, start_date), min(period_end, end_date)
+        if period_start > period_end or period_end < cursor:
+            continue
+        if period_start > cursor:
+            windows.append(
+                {"status": FREE, "start_date": cursor, "end_date": period_start - one_day}
+            )
+        if windows and windows[-1]["status"] == BUSY:
+            windows[-1]["end_date"] = period_end
+        else:
+            windows.append(
+                {"status": BUSY, "start_date": max(period_start, cursor), "end_date": period_end}
+            )
+        if period_end == end_date:
+            # Covered to the end, whose next day may be past date.max.
+            return windows
+        cursor = period_end + one_day
+    if cursor <= end_date:
+        windows.append({"status": FREE, "start_date": cursor, "end_date": end_date})
+    return windows
@@ -0,0 +1,10 @@
+class UAVNotAvailableError(ValueError):
+    """
+    Raised when a UAV is already booked for (part of) the requested period.
+    """
+
+
+class UAVLockedError(UAVNotAvailableError):
+    """
+    Raised when another request is renting the same UAV at the same moment.
+    """
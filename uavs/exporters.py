@@ -0,0 +1,52 @@
+from collections import defaultdict
+from typing import Dict, Iterator
+from django.db.models import QuerySet
+from uavs.models import UAV
+from utils.iterators import chunked
+
+UAV_EXPORT_FIELDS = ["id", "brand", "model", "category", "is_rental", "weight"]
+RENTED_UAV_EXPORT_FIELDS = [
+    "id",
+    "is_active",
+    "created_at",
+    "updated_at",
+    "start_date",
+    "end_date",
+    "uav",
+    "user",
+]
+
+
+def iter_uav_rows(queryset: QuerySet, chunk_size: int = 2000) -> Iterator[Dict]:
+    """
+    Yields the UAVs of the queryset as dicts shaped like ``UAVSerializer``
+    output, with ``category`` holding the list of category ids.
+
+    The UAV rows are read through a server-side cursor with a ``values()``
+    projection. The category ids are loaded with one query per chunk from
+    the through table instead of one query per UAV.
+    """
+    rows = queryset.prefetch_related(None).values(
+        *(field for field in UAV_EXPORT_FIELDS if field != "category")
+    )
+    for chunk in chunked(rows.iterator(chunk_size=chunk_size), chunk_size):
+        category_ids = defaultdict(list)
+        for uav_id, category_id in UAV.category.through.objects.filter(
+            uav_id__in=[row["id"] for row in chunk]
+        ).values_list("uav_id", "uavcategory_id"):
+            category_ids[uav_id].append(category_id)
+        for row in chunk:
+            row["category"] = category_ids[row["id"]]
+            yield row
+
+
+def iter_rented_uav_rows(queryset: QuerySet, chunk_size: int = 2000) -> Iterator[Dict]:
+    """
+    Yields the rented UAVs of the queryset as dicts shaped like
+    ``RentedUAVSerializer`` output, read through a server-side cursor.
+    """
+    return (
+        queryset.prefetch_related(None)
+        .values(*RENTED_UAV_EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
@@ -1,7 +1,55 @@
 import django_filters
-from .models import UAV
+from django import forms
+from .models import UAV, UAVCategory
+
+
+class UUIDInFilter(django_filters.BaseInFilter, django_filters.UUIDFilter):
+    """
+    A filter on a comma separated list of UUIDs.
+    """
+
+
+class UAVFilterForm(forms.Form):
+    def clean_category(self):
+        """
+        Rejects unknown or deleted categories, with one query for all of
+        the given ids.
+        """
+        category_ids = self.cleaned_data.get("category")
+        if not category_ids:
+            return category_ids
+        known_ids = set(
+            UAVCategory.active_objects.filter(pk__in=category_ids).values_list("pk", flat=True)
+        )
+        unknown_ids = [str(pk) for pk in category_ids if pk not in known_ids]
+        if unknown_ids:
+            raise forms.ValidationError("Unknown category: %s" % ", ".join(unknown_ids))
+        return category_ids
+
 
 class UAVFilter(django_filters.FilterSet):
+    """
+    The filters of the UAV lists, every one of them served by an index or
+    applied to the rows of an index scan:
+
+    - ``weight_min`` / ``weight_max``: an inclusive weight range
+    - ``created_at_after`` / ``created_at_before`` and ``updated_at_after`` /
+      ``updated_at_before``: inclusive ISO 8601 time ranges
+    - ``brand`` / ``model``: case sensitive prefixes, ``LIKE 'prefix%'``
+    - ``category``: comma separated category ids, matching the UAVs of any
+      of them with an ``EXISTS`` probe (see ``UAVQuerySet.in_categories``)
+    """
+    weight = django_filters.RangeFilter()
+    created_at = django_filters.IsoDateTimeFromToRangeFilter()
+    updated_at = django_filters.IsoDateTimeFromToRangeFilter()
+    brand = django_filters.CharFilter(lookup_expr="startswith")
+    model = django_filters.CharFilter(lookup_expr="startswith")
+    category = UUIDInFilter(method="filter_category")
+
     class Meta:
         model = UAV
-        fields = '__all__'
\ No newline at end of file
+        fields = []
+        form = UAVFilterForm
+
+    def filter_category(self, queryset, name, value):
+        return queryset.in_categories(value)
@@ -0,0 +1,168 @@
+import codecs
+import csv
+import json
+from typing import Any, Dict, IO, Iterable, Iterator, List, Tuple
+
+# Separator of the category names in a CSV ``category`` column.
+CATEGORY_SEPARATOR = "|"
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n"}
+
+
+class ReadError(ValueError):
+    """
+    Raised when a file cannot be read any further, e.g. a line that is not
+    valid JSON or not valid UTF-8.
+
+    Attributes:
+        line (int): The line the file could not be read from.
+    """
+
+    def __init__(self, line: int, message: str):
+        super().__init__("Line %d: %s" % (line, message))
+        self.line = line
+        self.message = message
+
+
+def decode_lines(stream: IO[bytes], encoding: str = "utf-8-sig") -> Iterator[str]:
+    """
+    Yields the lines of a binary stream, decoded one at a time so that an
+    undecodable byte fails on its own line rather than on a whole buffer.
+
+    The byte order mark Excel writes at the start of its UTF-8 exports is
+    dropped, it would end up in the first header name otherwise.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for line in stream:
+        yield decoder.decode(line)
+    rest = decoder.decode(b"", final=True)
+    if rest:
+        yield rest
+
+
+def read_csv(stream: Iterable[str]) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yields the rows of a CSV stream with a header line, with the line each
+    of them starts on.
+
+    The ``category`` column holds one or more category names separated by
+    ``CATEGORY_SEPARATOR``.
+
+    Raises:
+        ReadError: If the stream is not valid UTF-8 or not valid CSV.
+    """
+    reader = csv.DictReader(stream)
+    try:
+        reader.fieldnames
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ReadError(1, str(e))
+    # The last line read, a row starts on the next one.
+    last_line = reader.line_num
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise ReadError(last_line + 1, str(e))
+        line, last_line = last_line + 1, reader.line_num
+        categories = row.get("category") or ""
+        row["category"] = [
+            name for name in categories.split(CATEGORY_SEPARATOR) if name.strip()
+        ]
+        yield line, row
+
+
+def read_ndjson(stream: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """
+    Yields the objects of a newline delimited JSON stream, one per line,
+    with their line.
+
+    Raises:
+        ReadError: If the stream is not valid UTF-8 or a line is not valid
+            JSON.
+    """
+    line_number = 0
+    lines = iter(stream)
+    while True:
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as e:
+            raise ReadError(line_number + 1, str(e))
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ReadError(line_number, "Invalid JSON: %s" % e)
+        yield line_number, value
+
+
+READERS = {
+    "csv": read_csv,
+    "ndjson": read_ndjson,
+    "jsonl": read_ndjson,
+}
+
+
+def get_reader(file_name: str):
+    """
+    Returns the reader matching the extension of the given file name.
+    """
+    extension = file_name.rsplit(".", 1)[-1].lower()
+    if extension not in READERS:
+        raise ValueError(
+            "Unsupported file format '%s', expected one of: %s"
+            % (extension, ", ".join(READERS))
+        )
+    return READERS[extension]
+
+
+def parse_uav_row(row: Dict) -> Tuple[Dict, List[str]]:
+    """
+    Validates and converts a raw import row.
+
+    Returns:
+        Tuple[Dict, List[str]]: The UAV field values and the category names.
+
+    Raises:
+        ValueError: If the row is not a valid UAV.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Expected an object")
+
+    fields = {}
+    for name in ("brand", "model"):
+        value = str(row.get(name) or "").strip()
+        if not value:
+            raise ValueError("%s is required" % name)
+        if len(value) > 255:
+            raise ValueError("%s cannot be longer than 255 characters" % name)
+        fields[name] = value
+
+    try:
+        fields["weight"] = float(row.get("weight"))
+    except (TypeError, ValueError):
+        raise ValueError("weight must be a number")
+
+    is_rental = row.get("is_rental", True)
+    if isinstance(is_rental, str):
+        if is_rental.strip().lower() in TRUE_VALUES or not is_rental.strip():
+            is_rental = True
+        elif is_rental.strip().lower() in FALSE_VALUES:
+            is_rental = False
+        else:
+            raise ValueError("is_rental must be a boolean")
+    fields["is_rental"] = bool(is_rental)
+
+    categories = row.get("category") or []
+    if isinstance(categories, str):
+        categories = [categories]
+    category_names = [str(name).strip() for name in categories if str(name).strip()]
+    if not category_names:
+        raise ValueError("category is required")
+    return fields, category_names
@@ -0,0 +1,311 @@
+import itertools
+import json
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from uavs.models import UAV, UAVCategory, RentedUAV
+from uavs.services import UAVService
+from users.models import User
+from utils.benchmarks import compare, measure, measure_allocations
+from utils.instrumentation import QueryRecorder
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+
+class Command(BaseCommand):
+    """
+    Seeds a fleet in a throwaway test database and drives every API endpoint
+    through the test client, reporting per endpoint the p50/p95/p99 latency,
+    the queries per request and the memory allocated per request.
+
+    The results are compared to the JSON baseline committed in
+    ``benchmarks/baseline.json``. Re-recording it with ``--update-baseline``
+    shows the changes as a plain ``git diff``.
+
+    Usage:
+        python manage.py bench
+        python manage.py bench --uavs 10000 --iterations 200 --check
+        python manage.py bench --update-baseline
+    """
+
+    help = "Benchmarks the API endpoints against a JSON baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--uavs", type=int, default=1000, help="The number of UAVs seeded"
+        )
+        parser.add_argument(
+            "--users", type=int, default=100, help="The number of users seeded"
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="The number of timed requests per endpoint",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            default=[],
+            help="Only benchmark the endpoints with this name, repeatable",
+        )
+        parser.add_argument(
+            "--baseline", default=DEFAULT_BASELINE, help="The baseline JSON file"
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Write the results to the baseline file",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="The median latency and allocation growth tolerated, as a fraction",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with an error when an endpoint regressed",
+        )
+        parser.add_argument(
+            "--response-cache",
+            action="store_true",
+            help="Serve the lists from the response cache, disabled by default "
+            "so that every request builds its response",
+        )
+
+    def handle(self, *args, **options):
+        if options["uavs"] < 1 or options["users"] < 1 or options["iterations"] < 1:
+            raise CommandError("--uavs, --users and --iterations must be positive")
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            overrides = {} if options["response_cache"] else {"RESPONSE_CACHE_TIMEOUT": 0}
+            with override_settings(**overrides):
+                self.seed(options["uavs"], options["users"])
+                results = self.run(options["iterations"], options["endpoint"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results, options)
+
+    def seed(self, uav_count: int, user_count: int) -> None:
+        """
+        Seeds the categories, UAVs, users and past bookings the endpoints
+        read. Three out of four UAVs are rental UAVs.
+        """
+        categories = ["Category %d" % i for i in range(10)]
+        UAVCategory.objects.bulk_create([UAVCategory(name=name) for name in categories])
+        UAVService().import_objects(
+            {
+                "brand": "Brand %d" % (i % 50),
+                "model": "Model %d" % i,
+                "weight": 1.0 + i % 20,
+                "is_rental": i % 4 != 0,
+                "category": [categories[i % 10], categories[(i * 7) % 10]],
+            }
+            for i in range(uav_count)
+        )
+        self.user = User.objects.create_superuser(email="bench@example.com", password="bench")
+        users = [self.user] + User.objects.bulk_create(
+            [User(email="user%d@example.com" % i) for i in range(user_count - 1)]
+        )
+
+        today = timezone.localdate()
+        RentedUAV.objects.bulk_create(
+            (
+                RentedUAV(
+                    uav_id=uav_id,
+                    user=users[(i + j) % len(users)],
+                    start_date=today - timedelta(days=3 * (j + 1)),
+                    end_date=today - timedelta(days=3 * (j + 1) - 1),
+                )
+                for i, uav_id in enumerate(UAV.objects.values_list("id", flat=True))
+                for j in range(2)
+            ),
+            batch_size=1000,
+        )
+        self.uav = UAV.objects.filter(is_rental=True).first()
+        self.category = UAVCategory.objects.first()
+        self.rented_uav = RentedUAV.objects.first()
+        self.rentable_ids = list(
+            UAV.objects.filter(is_rental=True).values_list("id", flat=True)
+        )
+
+    def get_endpoints(self):
+        """
+        Returns the benchmarked endpoints as ``(name, path, data)``, ``data``
+        building the body of a POST request and None for a GET request.
+        """
+        bookings = itertools.count()
+        today = timezone.localdate()
+
+        def rent_payload():
+            # Every request rents an untouched UAV, so none of them conflict.
+            booking = next(bookings)
+            uav_id = self.rentable_ids[booking % len(self.rentable_ids)]
+            start = today + timedelta(days=3 * (booking // len(self.rentable_ids) + 1))
+            return {"uav_id": str(uav_id), "start_date": start, "end_date": start}
+
+        return [
+            ("categories-list", "/api/v1/uav-categories/", None),
+            ("categories-detail", "/api/v1/uav-categories/%s/" % self.category.pk, None),
+            ("uavs-list", "/api/v1/uavs/", None),
+            ("uavs-list-keyset", "/api/v1/uavs/?cursor=", None),
+            ("uavs-detail", "/api/v1/uavs/%s/" % self.uav.pk, None),
+            ("uavs-search", "/api/v1/uavs/?search=brand%201", None),
+            (
+                "uavs-available",
+                "/api/v1/uavs/available/?start=%s&end=%s" % (today, today + timedelta(days=6)),
+                None,
+            ),
+            ("uavs-availability", "/api/v1/uavs/%s/availability/" % self.uav.pk, None),
+            (
+                "uavs-availability-batch",
+                "/api/v1/uavs/availability/?"
+                + "&".join("uav_id=%s" % uav_id for uav_id in self.rentable_ids[:100]),
+                None,
+            ),
+            (
+                "uavs-filtered",
+                "/api/v1/uavs/?brand=Brand%%201&weight_max=10&category=%s" % self.category.pk,
+                None,
+            ),
+            ("uavs-rental", "/api/v1/uavs/rental/", None),
+            ("uavs-rent", "/api/v1/uavs/rent/", rent_payload),
+            ("rented-uavs-list", "/api/v1/rented-uavs/", None),
+            ("rented-uavs-detail", "/api/v1/rented-uavs/%s/" % self.rented_uav.pk, None),
+            ("users-list", "/api/v1/users/", None),
+            ("users-detail", "/api/v1/users/%s/" % self.user.pk, None),
+            ("users-me", "/api/v1/users/me/", None),
+            ("users-rental-records", "/api/v1/users/me/rental-records/", None),
+            (
+                "auth-login",
+                "/api/v1/auth/login/",
+                lambda: {"email": self.user.email, "password": "bench"},
+            ),
+        ]
+
+    def run(self, iterations: int, names=()):
+        """
+        Benchmarks the endpoints and returns their statistics by name.
+        """
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=self.user)
+        client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        results = {}
+        for name, path, data in self.get_endpoints():
+            if names and name not in names:
+                continue
+
+            def request():
+                if data is None:
+                    response = client.get(path)
+                else:
+                    response = client.post(path, data(), format="json")
+                if response.status_code >= 400:
+                    raise CommandError(
+                        "%s responded %d: %s" % (name, response.status_code, response.content[:200])
+                    )
+
+            request()  # Warms up the caches of the endpoint.
+            recorder = QueryRecorder()
+            with recorder.record():
+                request()
+            stats = measure(request, iterations=iterations)
+            results[name] = {
+                "p50": round(stats["p50"], 2),
+                "p95": round(stats["p95"], 2),
+                "p99": round(stats["p99"], 2),
+                "queries": recorder.count,
+                "alloc_kib": round(measure_allocations(request), 1),
+            }
+        return results
+
+    def report(self, results, options) -> None:
+        baseline = {}
+        try:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            raise CommandError("Invalid baseline %s: %s" % (options["baseline"], e))
+        expected = baseline.get("endpoints", {})
+        recorded = baseline.get("settings", {})
+        for key, value in (
+            ("database", connection.vendor),
+            ("uavs", options["uavs"]),
+            ("users", options["users"]),
+            ("response_cache", options["response_cache"]),
+        ):
+            if key in recorded and recorded[key] != value:
+                self.stderr.write(
+                    "The baseline was recorded with %s=%s, not %s" % (key, recorded[key], value)
+                )
+
+        self.stdout.write(
+            "%-22s %9s %9s %9s %8s %10s"
+            % ("endpoint", "p50 ms", "p95 ms", "p99 ms", "queries", "alloc KiB")
+        )
+        for name, stats in results.items():
+            line = "%-22s %9.2f %9.2f %9.2f %8d %10.1f" % (
+                name,
+                stats["p50"],
+                stats["p95"],
+                stats["p99"],
+                stats["queries"],
+                stats["alloc_kib"],
+            )
+            if name in expected:
+                line += "  (p50 %+.0f%%, queries %+d)" % (
+                    (stats["p50"] / expected[name]["p50"] - 1) * 100 if expected[name]["p50"] else 0,
+                    stats["queries"] - expected[name]["queries"],
+                )
+            self.stdout.write(line)
+
+        if options["update_baseline"]:
+            with open(options["baseline"], "w", encoding="utf-8") as file:
+                json.dump(
+                    {
+                        "settings": {
+                            "database": connection.vendor,
+                            "uavs": options["uavs"],
+                            "users": options["users"],
+                            "iterations": options["iterations"],
+                            "response_cache": options["response_cache"],
+                        },
+                        "endpoints": dict(expected, **results),
+                    },
+                    file,
+                    indent=2,
+                    sort_keys=True,
+                )
+                file.write("\n")
+            self.stdout.write(self.style.SUCCESS("Baseline written to %s" % options["baseline"]))
+            return
+
+        if not expected:
+            self.stdout.write("No baseline in %s, run with --update-baseline" % options["baseline"])
+            return
+        regressions = compare(results, expected, tolerance=options["tolerance"])
+        for regression in regressions:
+            self.stderr.write(regression)
+        if regressions and options["check"]:
+            raise CommandError("%d regressions against the baseline" % len(regressions))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regression against the baseline"))
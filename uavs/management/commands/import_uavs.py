@@ -0,0 +1,77 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from uavs.importers import READERS, decode_lines, get_reader
+from uavs.services import UAVService
+
+
+class Command(BaseCommand):
+    """
+    Imports UAVs from a CSV or NDJSON file, read as a stream.
+
+    Usage:
+        python manage.py import_uavs catalog.csv
+        cat catalog.ndjson | python manage.py import_uavs - --format ndjson
+    """
+
+    help = "Imports UAVs from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The file to import, '-' reads stdin")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="The file format, guessed from the file extension by default",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="The number of rows inserted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        path = options["path"]
+        try:
+            if options["format"]:
+                reader = READERS[options["format"]]
+            elif path == "-":
+                raise CommandError("--format is required when reading stdin")
+            else:
+                reader = get_reader(path)
+
+            if path == "-":
+                result = UAVService().import_objects(
+                    reader(decode_lines(sys.stdin.buffer)),
+                    chunk_size=options["chunk_size"],
+                    numbered=True,
+                )
+            else:
+                with open(path, "rb") as stream:
+                    result = UAVService().import_objects(
+                        reader(decode_lines(stream)),
+                        chunk_size=options["chunk_size"],
+                        numbered=True,
+                    )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in result["errors"]:
+            self.stderr.write("Line %(line)d: %(error)s" % error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported %d UAVs in %.2fs (%.0f rows/s), %d rows skipped"
+                % (
+                    result["created"],
+                    result["seconds"],
+                    result["rows_per_second"],
+                    len(result["errors"]),
+                )
+            )
+        )
+        if result["read_error"]:
+            raise CommandError(
+                "Stopped at line %(line)d: %(error)s, the rows before it were imported"
+                % result["read_error"]
+            )
@@ -0,0 +1,80 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from uavs.models import RentedUAV, UAV, UAVCategory
+from uavs.signals import UAV_CACHE_RESOURCE, UAV_CATEGORY_CACHE_RESOURCE
+from utils.cache import bump_versions
+
+
+class Command(BaseCommand):
+    """
+    Hard deletes the UAVs, categories and rental records soft deleted more
+    than ``--days`` days ago, in chunks. UAVs with active rental records and
+    categories of active UAVs are kept, deleting them would take the active
+    rows with them.
+
+    Usage:
+        python manage.py purge_soft_deleted --days 30
+        python manage.py purge_soft_deleted --dry-run
+    """
+
+    help = "Hard deletes the rows soft deleted more than --days days ago"
+
+    # Rental records first, so that the UAVs they kept are purged in the
+    # same run.
+    models = [RentedUAV, UAV, UAVCategory]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="The number of days a soft deleted row is kept",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="The number of rows deleted per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be purged",
+        )
+
+    def get_queryset(self, model, before):
+        queryset = model.objects.deleted().filter(updated_at__lt=before)
+        if model is UAV:
+            # Rental records cascade with their UAV.
+            queryset = queryset.exclude(
+                Exists(RentedUAV.active_objects.filter(uav=OuterRef("pk")))
+            )
+        elif model is UAVCategory:
+            queryset = queryset.exclude(
+                Exists(UAV.active_objects.filter(category=OuterRef("pk")))
+            )
+        return queryset
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["chunk_size"] < 1:
+            raise CommandError("--days must not be negative and --chunk-size must be positive")
+        before = timezone.now() - datetime.timedelta(days=options["days"])
+
+        purged = 0
+        for model in self.models:
+            queryset = self.get_queryset(model, before)
+            if options["dry_run"]:
+                count = queryset.count()
+                verb = "Would purge"
+            else:
+                count = queryset.purge_deleted(before, chunk_size=options["chunk_size"])
+                verb = "Purged"
+                purged += count
+            self.stdout.write(
+                self.style.SUCCESS("%s %d %s rows" % (verb, count, model.__name__))
+            )
+        if purged:
+            # The UAV lists render the ids of soft deleted categories.
+            bump_versions(UAV_CACHE_RESOURCE, UAV_CATEGORY_CACHE_RESOURCE)
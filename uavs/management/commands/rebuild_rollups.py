@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from uavs.rollups import rebuild_rollups
+from utils.query_plans import analyze
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the utilization rollups from the active bookings, see
+    ``uavs.rollups``. Bookings written through ``RentedUAVService`` keep the
+    rollups up to date, a rebuild backfills them and picks up brand and
+    category changes of the UAVs.
+
+    Usage:
+        python manage.py rebuild_rollups
+    """
+
+    help = "Recomputes the daily utilization rollups from the bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="The number of bookings read and rollup rows written per batch",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        count = rebuild_rollups(batch_size=options["batch_size"])
+        analyze("utilization_rollups")
+        self.stdout.write(self.style.SUCCESS("Rebuilt %d rollup rows" % count))
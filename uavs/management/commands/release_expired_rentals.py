@@ -0,0 +1,59 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from uavs.services import UAVService
+
+
+class Command(BaseCommand):
+    """
+    Puts back on rent the UAVs whose rentals have ended, and takes off rent
+    the UAVs whose booking has started, see
+    ``UAVService.release_expired_rentals`` and
+    ``UAVService.hold_started_rentals``. Safe to run from several nodes at
+    once, e.g. from a cron job or as a long-lived ``--loop`` process.
+
+    Usage:
+        python manage.py release_expired_rentals
+        python manage.py release_expired_rentals --loop --interval 300
+    """
+
+    help = "Sets is_rental back on the UAVs whose rentals have ended, and clears it on the started ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="The number of UAVs updated per transaction",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, releasing the UAVs every --interval seconds",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="The number of seconds between two runs in --loop mode",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1 or options["interval"] <= 0:
+            raise CommandError("--chunk-size and --interval must be positive")
+        service = UAVService()
+        try:
+            while True:
+                released = service.release_expired_rentals(chunk_size=options["chunk_size"])
+                held = service.hold_started_rentals(chunk_size=options["chunk_size"])
+                self.stdout.write(
+                    self.style.SUCCESS("Released %d UAVs, took %d off rent" % (released, held))
+                )
+                if not options["loop"]:
+                    return
+                time.sleep(options["interval"])
+                # Like the request handler, so that the loop does not keep
+                # connections past CONN_MAX_AGE or broken while it slept.
+                close_old_connections()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
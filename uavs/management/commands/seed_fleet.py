@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from uavs.models import UAV, UAVCategory, RentedUAV
+from uavs.seeding import seed_fleet
+from uavs.signals import UAV_CACHE_RESOURCE, UAV_CATEGORY_CACHE_RESOURCE
+from utils.cache import bump_versions
+from utils.query_plans import analyze
+
+
+class Command(BaseCommand):
+    """
+    Loads a deterministic synthetic fleet for local performance work, see
+    ``uavs.seeding.FleetGenerator``. A scale of 1 is 1,000 UAVs, 200 users
+    and about 10,000 bookings.
+
+    Usage:
+        python manage.py seed_fleet --scale 100
+        python manage.py seed_fleet --scale 0.1 --seed 42
+    """
+
+    help = "Loads a synthetic fleet of UAVs, users and bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", type=float, default=1, help="The fleet size, 1 is 1,000 UAVs"
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="The seed of the generated data"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="The number of rows loaded per transaction",
+        )
+
+    def handle(self, *args, **options):
+        if options["scale"] <= 0 or options["batch_size"] < 1:
+            raise CommandError("--scale and --batch-size must be positive")
+        if UAVCategory.objects.exists() or UAV.objects.exists() or RentedUAV.objects.exists():
+            raise CommandError("seed_fleet loads into a database without UAVs nor categories")
+
+        counts = seed_fleet(
+            scale=options["scale"], seed=options["seed"], batch_size=options["batch_size"]
+        )
+        seconds = counts.pop("seconds")
+        analyze(*counts)
+        bump_versions(UAV_CACHE_RESOURCE, UAV_CATEGORY_CACHE_RESOURCE)
+
+        for table, count in counts.items():
+            self.stdout.write("%s: %d rows" % (table, count))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded %d rows in %.2fs (%.0f rows/s) on %s"
+                % (sum(counts.values()), seconds, sum(counts.values()) / seconds, connection.vendor)
+            )
+        )
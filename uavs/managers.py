@@ -0,0 +1,83 @@
+import datetime
+from django.db.models import Exists, OuterRef
+from utils.managers import SoftDeleteQuerySet
+
+
+class UAVQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet for UAV with availability helpers.
+    """
+
+    def available(self, start_date: datetime.date, end_date: datetime.date):
+        """
+        Returns the active UAVs without an active booking sharing a day with
+        the given period.
+
+        The bookings are excluded with a ``NOT EXISTS`` anti-join rather than
+        a join and ``DISTINCT``: every UAV costs one probe of the
+        ``rented_uavs_uav_period_idx`` index, and the scan stops as soon as
+        a page of free UAVs is found.
+        """
+        bookings = self.model._meta.get_field("rented_uavs").related_model.objects
+        return self.active().filter(
+            ~Exists(bookings.filter(uav=OuterRef("pk")).overlapping(start_date, end_date))
+        )
+
+    def expired_rentals(self, today: datetime.date):
+        """
+        Returns the active UAVs taken off rent (``is_rental=False``) by a
+        booking that has started, and that no active booking covers today.
+
+        UAVs that were never booked keep their ``is_rental``, as it may have
+        been cleared by hand.
+        """
+        bookings = self.model._meta.get_field("rented_uavs").related_model.objects
+        return self.active().filter(
+            Exists(bookings.filter(uav=OuterRef("pk"), start_date__lte=today)),
+            ~Exists(bookings.filter(uav=OuterRef("pk")).overlapping(today, today)),
+            is_rental=False,
+        )
+
+    def started_rentals(self, today: datetime.date):
+        """
+        Returns the active UAVs still on rent (``is_rental=True``) that an
+        active booking covers today, i.e. booked in advance.
+        """
+        bookings = self.model._meta.get_field("rented_uavs").related_model.objects
+        return self.active().filter(
+            Exists(bookings.filter(uav=OuterRef("pk")).overlapping(today, today)),
+            is_rental=True,
+        )
+
+    def in_categories(self, category_ids):
+        """
+        Returns the UAVs of any of the given categories, with an ``EXISTS``
+        probe of the category through table instead of a join, so a UAV is
+        returned once, without ``DISTINCT``, and the ordering index of the
+        UAVs stays usable.
+        """
+        through = self.model.category.through
+        return self.filter(
+            Exists(
+                through.objects.filter(uav_id=OuterRef("pk"), uavcategory_id__in=category_ids)
+            )
+        )
+
+
+class RentedUAVQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet for RentedUAV with booking period helpers.
+
+    Booking periods are inclusive on both ends, a rental from the 1st to the
+    3rd occupies the 1st, 2nd and 3rd.
+    """
+
+    def overlapping(self, start_date: datetime.date, end_date: datetime.date):
+        """
+        Returns the active bookings that share at least one day with the
+        given period.
+
+        The lookups line up with the ``rented_uavs_uav_period_idx`` partial
+        index, so filtering this on a single UAV is one index range probe.
+        """
+        return self.active().filter(end_date__gte=start_date, start_date__lte=end_date)
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.4 on 2026-10-17 18:27
+
+from django.db import migrations, models
+from utils.operations import RunSQLForVendor
+
+
+SQLITE_OVERLAP_CHECK = """
+    SELECT RAISE(ABORT, 'rented_uavs_no_overlap')
+    WHERE EXISTS (
+        SELECT 1 FROM rented_uavs
+        WHERE uav_id = NEW.uav_id
+          AND is_active
+          AND end_date >= NEW.start_date
+          AND start_date <= NEW.end_date
+          AND id != NEW.id
+    );
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0003_alter_renteduav_options_alter_uav_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='renteduav',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['uav', 'end_date', 'start_date'], name='rented_uavs_uav_period_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='renteduav',
+            constraint=models.CheckConstraint(check=models.Q(('start_date__lte', models.F('end_date'))), name='rented_uavs_start_before_end'),
+        ),
+        RunSQLForVendor(
+            "postgresql",
+            sql="CREATE EXTENSION IF NOT EXISTS btree_gist",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        RunSQLForVendor(
+            "postgresql",
+            sql="""
+                ALTER TABLE rented_uavs ADD CONSTRAINT rented_uavs_no_overlap
+                EXCLUDE USING gist (
+                    uav_id WITH =,
+                    daterange(start_date, end_date, '[]') WITH &&
+                ) WHERE (is_active)
+            """,
+            reverse_sql="ALTER TABLE rented_uavs DROP CONSTRAINT rented_uavs_no_overlap",
+        ),
+        RunSQLForVendor(
+            "sqlite",
+            sql=[
+                "CREATE TRIGGER rented_uavs_no_overlap_insert "
+                "BEFORE INSERT ON rented_uavs WHEN NEW.is_active "
+                "BEGIN " + SQLITE_OVERLAP_CHECK + " END",
+                "CREATE TRIGGER rented_uavs_no_overlap_update "
+                "BEFORE UPDATE OF uav_id, start_date, end_date, is_active ON rented_uavs "
+                "WHEN NEW.is_active "
+                "BEGIN " + SQLITE_OVERLAP_CHECK + " END",
+            ],
+            reverse_sql=[
+                "DROP TRIGGER rented_uavs_no_overlap_insert",
+                "DROP TRIGGER rented_uavs_no_overlap_update",
+            ],
+        ),
+    ]
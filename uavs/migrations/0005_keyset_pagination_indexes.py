@@ -0,0 +1,29 @@
+# Generated by Django 4.2.4 on 2026-10-17 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0004_renteduav_booking_period'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='renteduav',
+            index=models.Index(fields=['created_at', 'id'], name='rented_uavs_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='renteduav',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='rented_uavs_user_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uav',
+            index=models.Index(fields=['created_at', 'id'], name='uavs_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uavcategory',
+            index=models.Index(fields=['created_at', 'id'], name='uav_categories_keyset_idx'),
+        ),
+    ]
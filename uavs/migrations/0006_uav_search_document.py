@@ -0,0 +1,55 @@
+# Generated by Django 4.2.4 on 2026-10-17 18:41
+
+from collections import defaultdict
+from django.db import migrations, models
+from utils.operations import RunSQLForVendor
+
+
+def build_search_documents(apps, schema_editor):
+    UAV = apps.get_model("uavs", "UAV")
+    category_names = defaultdict(list)
+    for uav_id, name in UAV.category.through.objects.values_list(
+        "uav_id", "uavcategory__name"
+    ):
+        category_names[uav_id].append(name)
+    uavs = list(UAV.objects.only("id", "brand", "model"))
+    for uav in uavs:
+        uav.search_document = " ".join(
+            [uav.brand, uav.model, *sorted(category_names[uav.pk])]
+        ).lower()
+    UAV.objects.bulk_update(uavs, ["search_document"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uav',
+            name='search_document',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        RunSQLForVendor(
+            "postgresql",
+            sql="CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        RunSQLForVendor(
+            "postgresql",
+            sql=[
+                # The expression matches the SearchVector of UAVSearchFilter.
+                "CREATE INDEX uavs_search_fts_idx ON uavs USING gin "
+                "(to_tsvector('simple'::regconfig, COALESCE(search_document, '')))",
+                "CREATE INDEX uavs_search_trgm_idx ON uavs USING gin "
+                "(search_document gin_trgm_ops)",
+            ],
+            reverse_sql=[
+                "DROP INDEX uavs_search_fts_idx",
+                "DROP INDEX uavs_search_trgm_idx",
+            ],
+        ),
+    ]
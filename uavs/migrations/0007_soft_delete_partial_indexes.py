@@ -0,0 +1,45 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0006_uav_search_document'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='renteduav',
+            name='rented_uavs_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='renteduav',
+            name='rented_uavs_user_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='uav',
+            name='uavs_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='uavcategory',
+            name='uav_categories_keyset_idx',
+        ),
+        migrations.AddIndex(
+            model_name='renteduav',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='rented_uavs_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='renteduav',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', 'created_at', 'id'], name='rented_uavs_user_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uav',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_rental', True)), fields=['created_at', 'id'], name='uavs_rental_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uavcategory',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='uav_categories_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:14
+
+from django.db import migrations, models
+import utils.uuids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0007_soft_delete_partial_indexes'),
+    ]
+
+    # The ids are generated in Python, so only the state changes: the tables
+    # are not rebuilt and the existing rows keep their uuid4 ids.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='renteduav',
+                    name='id',
+                    field=models.UUIDField(default=utils.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='uav',
+                    name='id',
+                    field=models.UUIDField(default=utils.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='uavcategory',
+                    name='id',
+                    field=models.UUIDField(default=utils.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
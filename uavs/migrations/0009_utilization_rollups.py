@@ -0,0 +1,30 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0008_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UtilizationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('fleet', 'Fleet'), ('brand', 'Brand'), ('category', 'Category'), ('uav', 'UAV')], max_length=16)),
+                ('key', models.CharField(blank=True, max_length=255)),
+                ('day', models.DateField()),
+                ('booked', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'utilization_rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='utilizationrollup',
+            constraint=models.UniqueConstraint(fields=('scope', 'key', 'day'), name='utilization_rollups_scope_key_day_uniq'),
+        ),
+    ]
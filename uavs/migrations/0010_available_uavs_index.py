@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0009_utilization_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uav',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='uavs_active_keyset_idx'),
+        ),
+    ]
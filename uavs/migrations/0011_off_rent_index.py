@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0010_available_uavs_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uav',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_rental', False)), fields=['id'], name='uavs_off_rent_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uavs', '0011_off_rent_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uav',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_rental', True)), fields=['brand'], name='uavs_brand_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='uav',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_rental', True)), fields=['model'], name='uavs_model_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='uav',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_rental', True)), fields=['weight'], name='uavs_weight_idx'),
+        ),
+    ]
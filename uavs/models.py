@@ -1,5 +1,7 @@
 from django.db import models
+from uavs.managers import RentedUAVQuerySet, UAVQuerySet
 from users.models import User
+from utils.managers import ActiveManager
 from utils.models import BaseModel
 
 
@@ -9,6 +11,13 @@ class UAVCategory(BaseModel):
     class Meta:
         db_table = "uav_categories"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="uav_categories_keyset_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
 
 class UAV(BaseModel):
@@ -17,10 +26,57 @@ class UAV(BaseModel):
     weight = models.FloatField()
     category = models.ManyToManyField(UAVCategory, related_name="uavs")
     is_rental = models.BooleanField(default=True)
+    # Brand, model and category names, kept up to date by uavs.signals and
+    # searched by uavs.search.UAVSearchFilter.
+    search_document = models.TextField(default="", editable=False)
+
+    objects = UAVQuerySet.as_manager()
+    active_objects = ActiveManager.from_queryset(UAVQuerySet)()
 
     class Meta:
         db_table = "uavs"
         ordering = ["-created_at"]
+        indexes = [
+            # Serves the UAV and rental UAV lists, which only show active
+            # rental UAVs.
+            models.Index(
+                fields=["created_at", "id"],
+                name="uavs_rental_keyset_idx",
+                condition=models.Q(is_active=True, is_rental=True),
+            ),
+            # Serves the available UAV search, which ignores is_rental.
+            models.Index(
+                fields=["created_at", "id"],
+                name="uavs_active_keyset_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # The prefix and range filters of the UAV lists, see
+            # uavs.filters.UAVFilter. The pattern operator classes let
+            # Postgres serve LIKE 'prefix%' whatever the collation.
+            models.Index(
+                fields=["brand"],
+                name="uavs_brand_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+                condition=models.Q(is_active=True, is_rental=True),
+            ),
+            models.Index(
+                fields=["model"],
+                name="uavs_model_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+                condition=models.Q(is_active=True, is_rental=True),
+            ),
+            models.Index(
+                fields=["weight"],
+                name="uavs_weight_idx",
+                condition=models.Q(is_active=True, is_rental=True),
+            ),
+            # The few UAVs off rent, walked by release_expired_rentals.
+            models.Index(
+                fields=["id"],
+                name="uavs_off_rent_idx",
+                condition=models.Q(is_active=True, is_rental=False),
+            ),
+        ]
 
 
 class RentedUAV(BaseModel):
@@ -29,6 +85,72 @@ class RentedUAV(BaseModel):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    objects = RentedUAVQuerySet.as_manager()
+    active_objects = ActiveManager.from_queryset(RentedUAVQuerySet)()
+
     class Meta:
         db_table = "rented_uavs"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="rented_uavs_keyset_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Keyset pagination of the rental records of a user.
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="rented_uavs_user_keyset_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Serves the overlap probe of ``RentedUAVQuerySet.overlapping``.
+            # ``end_date`` leads ``start_date`` since past bookings are the
+            # bulk of the table and ``end_date >= start`` skips them.
+            models.Index(
+                fields=["uav", "end_date", "start_date"],
+                name="rented_uavs_uav_period_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(start_date__lte=models.F("end_date")),
+                name="rented_uavs_start_before_end",
+            ),
+        ]
+
+
+class UtilizationRollup(models.Model):
+    """
+    The number of UAVs of a scope booked on a day, maintained incrementally
+    by ``uavs.rollups`` so that utilization reports never scan the bookings.
+
+    ``key`` is the brand, the category id or the UAV id of the row, and is
+    empty for the whole fleet.
+    """
+
+    SCOPE_FLEET = "fleet"
+    SCOPE_BRAND = "brand"
+    SCOPE_CATEGORY = "category"
+    SCOPE_UAV = "uav"
+    SCOPES = [
+        (SCOPE_FLEET, "Fleet"),
+        (SCOPE_BRAND, "Brand"),
+        (SCOPE_CATEGORY, "Category"),
+        (SCOPE_UAV, "UAV"),
+    ]
+
+    scope = models.CharField(max_length=16, choices=SCOPES)
+    key = models.CharField(max_length=255, blank=True)
+    day = models.DateField()
+    booked = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "utilization_rollups"
+        constraints = [
+            # Also the index of the reports, which read a range of days of
+            # the keys of a scope.
+            models.UniqueConstraint(
+                fields=["scope", "key", "day"], name="utilization_rollups_scope_key_day_uniq"
+            ),
+        ]
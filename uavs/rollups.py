@@ -0,0 +1,249 @@
+import datetime
+import json
+from collections import Counter, defaultdict
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import connection, transaction
+from django.db.models import Count, QuerySet
+from uavs.models import UAV, RentedUAV, UtilizationRollup
+from utils.db import load_rows
+
+Booking = Tuple[object, datetime.date, datetime.date]
+
+
+def iter_days(start: datetime.date, end: datetime.date) -> Iterator[datetime.date]:
+    # Counted rather than stepped past the end, which overflows at date.max.
+    for offset in range((end - start).days + 1):
+        yield start + datetime.timedelta(days=offset)
+
+
+def get_uav_dimensions(uav_ids: Optional[Iterable] = None) -> Dict[str, Tuple[str, List[str]]]:
+    """
+    Returns the brand and category ids of the given UAVs by UAV id, with two
+    queries. Every UAV is read when ``uav_ids`` is None, without sending
+    their ids back to the database.
+    """
+    uavs = UAV.objects.all()
+    relations = UAV.category.through.objects.all()
+    if uav_ids is not None:
+        uav_ids = list(uav_ids)
+        uavs = uavs.filter(pk__in=uav_ids)
+        relations = relations.filter(uav_id__in=uav_ids)
+    categories = defaultdict(list)
+    for uav_id, category_id in relations.values_list("uav_id", "uavcategory_id").iterator():
+        categories[str(uav_id)].append(str(category_id))
+    return {
+        str(uav_id): (brand, categories[str(uav_id)])
+        for uav_id, brand in uavs.values_list("pk", "brand").iterator()
+    }
+
+
+def get_active_bookings(bookings: QuerySet) -> List[Booking]:
+    """
+    Returns the ``(uav_id, start_date, end_date)`` of the active bookings of
+    the given RentedUAV queryset, as taken by ``apply_bookings``.
+    """
+    return list(
+        bookings.filter(is_active=True).values_list("uav_id", "start_date", "end_date")
+    )
+
+
+def get_scope_keys(uav_id: str, brand: str, category_ids: List[str]) -> List[Tuple[str, str]]:
+    """
+    Returns the ``(scope, key)`` rollups a booking of the UAV counts in.
+    """
+    return [
+        (UtilizationRollup.SCOPE_FLEET, ""),
+        (UtilizationRollup.SCOPE_BRAND, brand),
+        (UtilizationRollup.SCOPE_UAV, uav_id),
+    ] + [(UtilizationRollup.SCOPE_CATEGORY, category_id) for category_id in category_ids]
+
+
+def apply_bookings(bookings: Iterable[Booking], sign: int = 1) -> None:
+    """
+    Adds (``sign=1``) or removes (``sign=-1``) the days of the given
+    ``(uav_id, start_date, end_date)`` bookings to the rollups of their UAV,
+    brand, categories and of the fleet.
+
+    The bookings are keyed by the current brand and categories of their UAV,
+    so changing those (or deleting the UAV) must remove the bookings first
+    and add them back afterwards, see ``UAVService.update_object``.
+
+    Runs three queries whatever the number of bookings: the UAV dimensions
+    and a single upsert incrementing the rollup rows. On Postgres the rows
+    are passed as arrays and unnested, on SQLite as a JSON array read with
+    ``json_each``, so the statement has four parameters at most. The rows
+    are upserted in key order, so that concurrent bookings lock them in the
+    same order and cannot deadlock.
+    """
+    bookings = list(bookings)
+    if not bookings:
+        return
+    dimensions = get_uav_dimensions({uav_id for uav_id, _, _ in bookings})
+    increments = Counter()
+    for uav_id, start_date, end_date in bookings:
+        scope_keys = get_scope_keys(str(uav_id), *dimensions[str(uav_id)])
+        for day in iter_days(start_date, end_date):
+            for scope, key in scope_keys:
+                increments[(scope, key, day)] += sign
+    rows = [
+        (scope, key, connection.ops.adapt_datefield_value(day), count)
+        for (scope, key, day), count in sorted(increments.items())
+        if count
+    ]
+    if not rows:
+        return
+
+    names = {
+        column: connection.ops.quote_name(column)
+        for column in ("scope", "key", "day", "booked")
+    }
+    names["table"] = connection.ops.quote_name(UtilizationRollup._meta.db_table)
+    insert = "INSERT INTO %(table)s (%(scope)s, %(key)s, %(day)s, %(booked)s) " % names
+    upsert = (
+        " ON CONFLICT (%(scope)s, %(key)s, %(day)s) "
+        "DO UPDATE SET %(booked)s = %(table)s.%(booked)s + excluded.%(booked)s" % names
+    )
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                insert
+                + "SELECT * FROM unnest(%s::text[], %s::text[], %s::date[], %s::integer[]) "
+                "AS increments (scope, key, day, booked) ORDER BY scope, key, day"
+                + upsert,
+                [list(column) for column in zip(*rows)],
+            )
+        else:
+            # "WHERE true" tells the SQLite parser that ON CONFLICT is not a
+            # join constraint.
+            cursor.execute(
+                insert
+                + "SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), "
+                "json_extract(value, '$[2]'), json_extract(value, '$[3]') "
+                "FROM json_each(%s) WHERE true"
+                + upsert,
+                [json.dumps(rows)],
+            )
+
+
+def rebuild_rollups(batch_size: int = 10000) -> int:
+    """
+    Recomputes every rollup from the active bookings, in one transaction so
+    that reports keep reading the previous rollups until it commits.
+
+    The bookings are streamed in UAV order: the rows of a UAV are loaded as
+    soon as its bookings are read, only the brand, category and fleet
+    counters are kept in memory.
+
+    Returns:
+        int: The number of rollup rows.
+    """
+    with transaction.atomic():
+        UtilizationRollup.objects.all().delete()
+        dimensions = get_uav_dimensions()
+        shared = Counter()
+
+        def iter_uav_rows() -> Iterator[Tuple]:
+            bookings = (
+                RentedUAV.objects.filter(is_active=True)
+                .order_by("uav_id")
+                .values_list("uav_id", "start_date", "end_date")
+                .iterator(chunk_size=batch_size)
+            )
+            for uav_id, uav_bookings in groupby(bookings, key=itemgetter(0)):
+                uav_id = str(uav_id)
+                brand, category_ids = dimensions[uav_id]
+                days = Counter(
+                    day
+                    for _, start_date, end_date in uav_bookings
+                    for day in iter_days(start_date, end_date)
+                )
+                for scope, key in get_scope_keys(uav_id, brand, category_ids):
+                    if scope != UtilizationRollup.SCOPE_UAV:
+                        for day, count in days.items():
+                            shared[(scope, key, day)] += count
+                for day, count in sorted(days.items()):
+                    yield UtilizationRollup.SCOPE_UAV, uav_id, day, count
+
+        fields = ("scope", "key", "day", "booked")
+        count = load_rows(UtilizationRollup, fields, iter_uav_rows(), batch_size)
+        count += load_rows(
+            UtilizationRollup,
+            fields,
+            ((scope, key, day, booked) for (scope, key, day), booked in sorted(shared.items())),
+            batch_size,
+        )
+    return count
+
+
+def get_fleet_sizes(scope: str, keys: Iterable[str]) -> Dict[str, int]:
+    """
+    Returns the number of active UAVs of the given keys of the scope.
+    """
+    keys = list(keys)
+    if scope == UtilizationRollup.SCOPE_UAV:
+        return {key: 1 for key in keys}
+    if scope == UtilizationRollup.SCOPE_FLEET:
+        return {"": UAV.active_objects.count()}
+    if scope == UtilizationRollup.SCOPE_BRAND:
+        sizes = (
+            UAV.active_objects.filter(brand__in=keys)
+            .values_list("brand")
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+    else:
+        sizes = (
+            UAV.category.through.objects.filter(uav__is_active=True, uavcategory_id__in=keys)
+            .values_list("uavcategory_id")
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+    return {str(key): count for key, count in sizes}
+
+
+def get_utilization(
+    scope: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    keys: Optional[List[str]] = None,
+) -> List[Dict]:
+    """
+    Returns the utilization of the keys of the scope over the period, read
+    from the rollups with one index range scan.
+
+    Every result holds the ``key``, the current number of active ``uavs`` of
+    the key, the ``booked_days`` over the period, the ``utilization`` (booked
+    days over UAV days) and the ``daily`` booked UAVs of the days with
+    bookings. Without ``keys``, only the keys with bookings are returned.
+    """
+    rollups = UtilizationRollup.objects.filter(
+        scope=scope, day__range=(start_date, end_date), booked__gt=0
+    )
+    if scope == UtilizationRollup.SCOPE_FLEET:
+        keys = [""]
+    if keys is not None:
+        rollups = rollups.filter(key__in=keys)
+
+    daily = defaultdict(list)
+    for key, day, booked in rollups.order_by("key", "day").values_list("key", "day", "booked"):
+        daily[key].append({"day": day, "booked": booked})
+    keys = sorted(set(keys) if keys is not None else daily)
+    sizes = get_fleet_sizes(scope, keys)
+    period_days = (end_date - start_date).days + 1
+
+    results = []
+    for key in keys:
+        booked_days = sum(day["booked"] for day in daily[key])
+        capacity = sizes.get(key, 0) * period_days
+        results.append(
+            {
+                "key": key,
+                "uavs": sizes.get(key, 0),
+                "booked_days": booked_days,
+                "utilization": round(booked_days / capacity, 4) if capacity else None,
+                "daily": daily[key],
+            }
+        )
+    return results
@@ -0,0 +1,119 @@
+import re
+from collections import defaultdict
+from typing import Iterable, List
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from rest_framework import filters
+from uavs.models import UAV
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def build_search_document(brand: str, model: str, category_names: Iterable[str]) -> str:
+    """
+    Returns the text searched for a UAV: its brand, model and category
+    names, lower cased.
+    """
+    return " ".join([brand, model, *sorted(category_names)]).lower()
+
+
+def refresh_search_documents(uav_ids: Iterable) -> None:
+    """
+    Rebuilds the search document of the given UAVs with two queries and a
+    bulk update, whatever the number of UAVs.
+    """
+    uav_ids = list(uav_ids)
+    if not uav_ids:
+        return
+    category_names = defaultdict(list)
+    for uav_id, name in UAV.category.through.objects.filter(
+        uav_id__in=uav_ids
+    ).values_list("uav_id", "uavcategory__name"):
+        category_names[uav_id].append(name)
+    uavs = list(UAV.objects.filter(pk__in=uav_ids).only("id", "brand", "model"))
+    for uav in uavs:
+        uav.search_document = build_search_document(
+            uav.brand, uav.model, category_names[uav.pk]
+        )
+    UAV.objects.bulk_update(uavs, ["search_document"], batch_size=500)
+
+
+def search_terms(search: str) -> List[str]:
+    return [word.lower() for word in _WORD.findall(search)]
+
+
+class UAVSearchFilter(filters.BaseFilterBackend):
+    """
+    Ranked search of UAVs by brand, model and category names through the
+    denormalized ``UAV.search_document``, driven by the ``search`` query
+    parameter like DRF's ``SearchFilter``.
+
+    On Postgres every term is matched as a prefix through the
+    ``uavs_search_fts_idx`` full text GIN index, and the whole search
+    fuzzily through the ``uavs_search_trgm_idx`` trigram index, which
+    catches typos. Results are ranked by the full text rank plus the
+    trigram word similarity.
+
+    Other databases fall back to ``LIKE`` on the document, every term has
+    to appear, and words starting with a term rank first.
+
+    Both avoid the join through the category table and the ``DISTINCT`` of
+    ``SearchFilter``. The ranking replaces the default ordering, except in
+    keyset pagination mode which orders by ``(created_at, id)``.
+    """
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request.query_params.get(self.search_param, ""))
+        if not terms:
+            return queryset
+        if connection.vendor == "postgresql":
+            return self.filter_postgresql(queryset, terms)
+        return self.filter_portable(queryset, terms)
+
+    def filter_postgresql(self, queryset, terms: List[str]):
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+            TrigramWordSimilarity,
+        )
+
+        search = " ".join(terms)
+        query = SearchQuery(
+            " & ".join("%s:*" % term for term in terms), config="simple", search_type="raw"
+        )
+        # Must match the indexed expression of uavs_search_fts_idx.
+        vector = SearchVector("search_document", config="simple")
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(Q(search_vector=query) | Q(search_document__trigram_word_similar=search))
+            .annotate(
+                search_rank=SearchRank(vector, query)
+                + TrigramWordSimilarity(search, "search_document")
+            )
+            .order_by("-search_rank", "-created_at", "-id")
+        )
+
+    def filter_portable(self, queryset, terms: List[str]):
+        for term in terms:
+            queryset = queryset.filter(search_document__contains=term)
+        word_starts = [
+            Case(
+                When(
+                    Q(search_document__startswith=term)
+                    | Q(search_document__contains=" " + term),
+                    then=Value(1),
+                ),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for term in terms
+        ]
+        search_rank = word_starts[0]
+        for word_start in word_starts[1:]:
+            search_rank = search_rank + word_start
+        return queryset.annotate(search_rank=search_rank).order_by(
+            F("search_rank").desc(), "-created_at", "-id"
+        )
@@ -0,0 +1,218 @@
+import datetime
+import random
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from uavs.models import UAV, UAVCategory, RentedUAV
+from uavs.rollups import rebuild_rollups
+from uavs.search import build_search_document
+from users.models import User
+from utils.db import load_rows
+from utils.uuids import uuid7
+
+UAVS_PER_SCALE = 1000
+USERS_PER_SCALE = 200
+# The mean number of bookings of a UAV over its rental history.
+BOOKINGS_PER_UAV = 10
+HISTORY_DAYS = 730
+FUTURE_DAYS = 60
+
+CATEGORY_NAMES = [
+    "Agriculture", "Mapping", "Inspection", "Photography", "Cinematography",
+    "Delivery", "Surveillance", "Search and Rescue", "Racing", "Surveying",
+    "Firefighting", "Wildlife", "Construction", "Mining", "Energy",
+    "Telecom", "Insurance", "Real Estate", "Events", "Training",
+]
+BRANDS = [
+    "DJI", "Autel", "Parrot", "Skydio", "Yuneec", "senseFly",
+    "Freefly", "Wingtra", "Teal", "Quantum Systems", "Flyability", "Holy Stone",
+]
+MODEL_LINES = ["Air", "Mini", "Pro", "Max", "Agras", "Matrice", "Evo", "Anafi", "X"]
+# Rental lengths in days and their relative frequency, short rentals dominate.
+RENTAL_DAYS = [1, 2, 3, 5, 7, 14, 30]
+RENTAL_DAY_WEIGHTS = [30, 25, 15, 12, 10, 6, 2]
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """
+    Returns the cumulative weights of ``count`` items whose popularity
+    decreases like a Zipf distribution, the first item being the most
+    popular.
+    """
+    weights, total = [], 0.0
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+class FleetGenerator:
+    """
+    Generates the rows of a synthetic fleet, deterministically for a given
+    seed and day.
+
+    A scale of 1 is ``UAVS_PER_SCALE`` UAVs, ``USERS_PER_SCALE`` users and
+    about ``BOOKINGS_PER_UAV`` bookings per UAV, so a scale of 100 loads
+    around a million bookings. Category and brand popularity is skewed, a
+    few users make most of the bookings, and every UAV gets a history of
+    non-overlapping bookings of realistic lengths over the last two years
+    and the next two months. About 1% of the UAVs and 2% of the bookings
+    are soft deleted.
+
+    The ``*_rows`` methods yield tuples of the values of their ``*_FIELDS``
+    and must be consumed in order, as later rows reference earlier ids.
+    """
+
+    CATEGORY_FIELDS = ("id", "name", "is_active", "created_at", "updated_at")
+    USER_FIELDS = ("id", "email", "password", "is_staff", "is_superuser", "is_active", "date_joined")
+    UAV_FIELDS = (
+        "id", "brand", "model", "weight", "is_rental", "search_document",
+        "is_active", "created_at", "updated_at",
+    )
+    UAV_CATEGORY_FIELDS = ("uav", "uavcategory")
+    RENTED_UAV_FIELDS = (
+        "id", "uav", "user", "start_date", "end_date", "is_active", "created_at", "updated_at",
+    )
+
+    def __init__(self, scale: float = 1, seed: int = 0, today: Optional[datetime.date] = None):
+        self.random = random.Random(seed)
+        self.seed = seed
+        self.today = today or timezone.localdate()
+        self.uav_count = max(1, int(UAVS_PER_SCALE * scale))
+        self.user_count = max(1, int(USERS_PER_SCALE * scale))
+        self.category_ids: List[uuid.UUID] = []
+        self.user_ids: List[uuid.UUID] = []
+        self.uav_categories: List[Tuple[uuid.UUID, List[uuid.UUID]]] = []
+
+    def uuid(self, created_at: datetime.datetime) -> uuid.UUID:
+        """
+        Returns the time-ordered id of a row created at the given time.
+        """
+        return uuid7(int(created_at.timestamp() * 1000), self.random.getrandbits(74))
+
+    def moment(self, day: datetime.date) -> datetime.datetime:
+        """
+        Returns a random time of the given day.
+        """
+        return datetime.datetime.combine(
+            day, datetime.time(), tzinfo=datetime.timezone.utc
+        ) + datetime.timedelta(seconds=self.random.randrange(86400))
+
+    def past_moment(self, days: int = 3 * 365) -> datetime.datetime:
+        return self.moment(self.today - datetime.timedelta(days=self.random.randrange(1, days)))
+
+    def category_rows(self) -> Iterator[Tuple]:
+        for name in CATEGORY_NAMES:
+            created_at = self.past_moment()
+            category_id = self.uuid(created_at)
+            self.category_ids.append(category_id)
+            yield category_id, name, True, created_at, created_at
+
+    def user_rows(self) -> Iterator[Tuple]:
+        # Hashing is deliberately slow, every user shares a single hash.
+        password = make_password("fleet-%d" % self.seed)
+        for i in range(self.user_count):
+            date_joined = self.past_moment()
+            user_id = self.uuid(date_joined)
+            self.user_ids.append(user_id)
+            email = "fleet-%d-user-%d@example.com" % (self.seed, i)
+            yield user_id, email, password, False, False, True, date_joined
+
+    def uav_rows(self) -> Iterator[Tuple]:
+        category_weights = zipf_weights(len(self.category_ids))
+        brand_weights = zipf_weights(len(BRANDS), exponent=1.3)
+        for _ in range(self.uav_count):
+            created_at = self.past_moment()
+            uav_id = self.uuid(created_at)
+            brand = self.random.choices(BRANDS, cum_weights=brand_weights)[0]
+            model = "%s %d" % (self.random.choice(MODEL_LINES), self.random.randint(1, 40))
+            weight = round(min(max(self.random.lognormvariate(0.7, 0.9), 0.2), 60.0), 2)
+            categories = {
+                self.random.choices(self.category_ids, cum_weights=category_weights)[0]
+                for _ in range(self.random.randint(1, 3))
+            }
+            self.uav_categories.append((uav_id, sorted(categories)))
+            names = [CATEGORY_NAMES[self.category_ids.index(pk)] for pk in categories]
+            # is_rental is cleared by seed_fleet for the UAVs rented today.
+            yield (
+                uav_id, brand, model, weight, True,
+                build_search_document(brand, model, names),
+                self.random.random() >= 0.01, created_at, created_at,
+            )
+
+    def uav_category_rows(self) -> Iterator[Tuple]:
+        for uav_id, category_ids in self.uav_categories:
+            for category_id in category_ids:
+                yield uav_id, category_id
+
+    def rented_uav_rows(self) -> Iterator[Tuple]:
+        first_day = self.today - datetime.timedelta(days=HISTORY_DAYS)
+        last_day = self.today + datetime.timedelta(days=FUTURE_DAYS)
+        window = HISTORY_DAYS + FUTURE_DAYS
+        for uav_id, _ in self.uav_categories:
+            count = max(1, round(self.random.expovariate(1 / BOOKINGS_PER_UAV)))
+            slot = window // count
+            day = first_day
+            for _ in range(count):
+                days = self.random.choices(RENTAL_DAYS, weights=RENTAL_DAY_WEIGHTS)[0]
+                start = day + datetime.timedelta(
+                    days=self.random.randint(0, max(0, 2 * (slot - days)))
+                )
+                end = start + datetime.timedelta(days=days - 1)
+                if end > last_day:
+                    break
+                # A few power users book most of the fleet.
+                user_id = self.user_ids[int(len(self.user_ids) * self.random.random() ** 3)]
+                booked_on = start - datetime.timedelta(days=self.random.randint(0, 30))
+                created_at = self.moment(min(booked_on, self.today))
+                yield (
+                    self.uuid(created_at), uav_id, user_id, start, end,
+                    self.random.random() >= 0.02, created_at, created_at,
+                )
+                day = end + datetime.timedelta(days=1)
+
+
+def seed_fleet(
+    scale: float = 1,
+    seed: int = 0,
+    batch_size: int = 10000,
+    today: Optional[datetime.date] = None,
+) -> Dict:
+    """
+    Loads a synthetic fleet generated by ``FleetGenerator`` with
+    ``utils.db.load_rows``, i.e. ``COPY`` on Postgres, then builds its
+    utilization rollups.
+
+    Returns:
+        Dict: The number of rows loaded per table, and the elapsed
+        ``seconds``.
+    """
+    started = time.perf_counter()
+    generator = FleetGenerator(scale=scale, seed=seed, today=today)
+    counts = {
+        "uav_categories": load_rows(
+            UAVCategory, generator.CATEGORY_FIELDS, generator.category_rows(), batch_size
+        ),
+        "users": load_rows(User, generator.USER_FIELDS, generator.user_rows(), batch_size),
+        "uavs": load_rows(UAV, generator.UAV_FIELDS, generator.uav_rows(), batch_size),
+        "uavs_category": load_rows(
+            UAV.category.through,
+            generator.UAV_CATEGORY_FIELDS,
+            generator.uav_category_rows(),
+            batch_size,
+        ),
+        "rented_uavs": load_rows(
+            RentedUAV, generator.RENTED_UAV_FIELDS, generator.rented_uav_rows(), batch_size
+        ),
+    }
+    today = generator.today
+    UAV.objects.filter(
+        rented_uavs__is_active=True,
+        rented_uavs__start_date__lte=today,
+        rented_uavs__end_date__gte=today,
+    ).update(is_rental=False)
+    counts["utilization_rollups"] = rebuild_rollups(batch_size)
+    counts["seconds"] = time.perf_counter() - started
+    return counts
@@ -1,7 +1,9 @@
 from django.utils import timezone
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from rest_framework import serializers
 from uavs.models import UAVCategory, UAV, RentedUAV
+from uavs.services import RentedUAVService
+from users.models import User
 
 
 class UAVCategorySerializer(serializers.ModelSerializer):
@@ -28,6 +30,7 @@ class UAVSerializer(serializers.ModelSerializer):
     class Meta:
         model = UAV
         fields = ["id", "brand", "model", "category", "is_rental", "weight"]
+        extra_kwargs = {"category": {"queryset": UAVCategory.active_objects.all()}}
 
 
 class RentUAVSerializer(serializers.Serializer):
@@ -42,8 +45,11 @@ class RentUAVSerializer(serializers.Serializer):
     Methods:
     - validate_start_date: Validates that the start date is not before the current date.
     - validate_end_date: Validates that the end date is not before the current date.
-    - validate: Validates that the start date is not after the end date.
+    - validate: Validates that the start date is not after the end date, and
+      that the period is at most ``MAX_DAYS`` long.
     """
+    MAX_DAYS = 366
+
     uav_id = serializers.CharField(required=True)
     start_date = serializers.DateField(required=True)
     end_date = serializers.DateField(required=True)
@@ -68,13 +74,130 @@ class RentUAVSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 "The start date cannot be after the end date"
             )
+        if (attrs["end_date"] - attrs["start_date"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                "The period cannot be longer than %d days" % self.MAX_DAYS
+            )
+        return attrs
+
+
+class RentUAVBatchSerializer(serializers.Serializer):
+    """
+    Serializer for renting many UAVs at once.
+
+    Fields:
+    - items: list of RentUAVSerializer items, required, 1 to 100 entries
+    """
+    items = RentUAVSerializer(many=True, min_length=1, max_length=100)
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the availability calendars.
+
+    Fields:
+    - from: DateField, defaults to today
+    - to: DateField, defaults to the 90th day from ``from``
+    - uav_id: list of UUIDs, 1 to 100 entries, only read by the batched
+      calendar
+
+    Methods:
+    - validate: Validates the period, at most ``MAX_DAYS`` long.
+    """
+    DEFAULT_DAYS = 90
+    MAX_DAYS = 366
+
+    to = serializers.DateField(required=False)
+    uav_id = serializers.ListField(
+        child=serializers.UUIDField(), required=False, min_length=1, max_length=100
+    )
+
+    def get_fields(self):
+        # "from" is a Python keyword, it cannot be declared as an attribute.
+        fields = super().get_fields()
+        fields["from"] = serializers.DateField(required=False)
+        return fields
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        start_date = attrs.setdefault("from", timezone.localdate())
+        # Clamped, the default period of a late start would end past date.max.
+        default_days = min(self.DEFAULT_DAYS - 1, (date.max - start_date).days)
+        end_date = attrs.setdefault("to", start_date + timedelta(days=default_days))
+        if start_date > end_date:
+            raise serializers.ValidationError(
+                "The start date cannot be after the end date"
+            )
+        if (end_date - start_date).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                "The period cannot be longer than %d days" % self.MAX_DAYS
+            )
+        return attrs
+
+
+class AvailableUAVQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the available UAV search.
+
+    Fields:
+    - start: DateField, required
+    - end: DateField, required
+    - category: UUIDField, optional
+    - weight_max: FloatField, optional
+
+    Methods:
+    - validate: Validates that the start date is not after the end date.
+    """
+    start = serializers.DateField(required=True)
+    end = serializers.DateField(required=True)
+    category = serializers.UUIDField(required=False)
+    weight_max = serializers.FloatField(required=False, min_value=0)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError(
+                "The start date cannot be after the end date"
+            )
         return attrs
 
 
 class RentedUAVSerializer(serializers.ModelSerializer):
     """
     Serializer for the RentedUAV model.
+
+    Methods:
+    - validate: Validates the booking period, at most
+      ``RentUAVSerializer.MAX_DAYS`` long, and that it does not overlap
+      another active booking of the same UAV.
     """
     class Meta:
         model = RentedUAV
         fields = "__all__"
+        extra_kwargs = {
+            "uav": {"queryset": UAV.active_objects.all()},
+            "user": {"queryset": User.active_objects.all()},
+        }
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        instance = self.instance
+        uav = attrs.get("uav", getattr(instance, "uav", None))
+        start_date = attrs.get("start_date", getattr(instance, "start_date", None))
+        end_date = attrs.get("end_date", getattr(instance, "end_date", None))
+        if start_date > end_date:
+            raise serializers.ValidationError(
+                "The start date cannot be after the end date"
+            )
+        if (end_date - start_date).days >= RentUAVSerializer.MAX_DAYS:
+            raise serializers.ValidationError(
+                "The period cannot be longer than %d days" % RentUAVSerializer.MAX_DAYS
+            )
+        if attrs.get("is_active", getattr(instance, "is_active", True)):
+            if not RentedUAVService().is_available(
+                uav, start_date, end_date, exclude=instance
+            ):
+                raise serializers.ValidationError(
+                    "The UAV is already rented for the given dates"
+                )
+        return attrs
@@ -1,12 +1,33 @@
 import datetime
+import time
+import uuid
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Union
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from uavs.availability import sweep_periods
+from uavs.exceptions import UAVLockedError, UAVNotAvailableError
+from uavs.importers import ReadError, parse_uav_row
 from uavs.models import UAVCategory, UAV, RentedUAV
+from uavs.rollups import apply_bookings, get_active_bookings
+from uavs.search import build_search_document
+from uavs.signals import UAV_CACHE_RESOURCE, UAV_CATEGORY_CACHE_RESOURCE
 from users.models import User
+from utils.cache import bump_versions
+from utils.db import is_lock_conflict
 from utils.interfaces import Service
+from utils.iterators import chunked
 
 
 class UAVCategoryService(Service):
     """
     Service class for managing UAVCategory objects.
+
+    Every write invalidates the cached category lists, and the cached UAV
+    lists when it may change them (see ``utils.cache.bump_versions``).
     """
 
     def create_object(self, name: str, **fields) -> UAVCategory:
@@ -20,7 +41,9 @@ class UAVCategoryService(Service):
         Returns:
             UAVCategory: The newly created UAVCategory object.
         """
-        return UAVCategory.objects.create(name=name, **fields)
+        instance = UAVCategory.objects.create(name=name, **fields)
+        bump_versions(UAV_CATEGORY_CACHE_RESOURCE)
+        return instance
 
     def update_object(self, instance: UAVCategory, **fields) -> UAVCategory:
         """
@@ -36,6 +59,8 @@ class UAVCategoryService(Service):
         for key, value in fields.items():
             setattr(instance, key, value)
         instance.save()
+        # The UAV search results depend on the category names.
+        bump_versions(UAV_CATEGORY_CACHE_RESOURCE, UAV_CACHE_RESOURCE)
         return instance
 
     def delete_object(self, instance: UAVCategory) -> None:
@@ -47,34 +72,181 @@ class UAVCategoryService(Service):
         """
         instance.is_active = False
         instance.save()
+        bump_versions(UAV_CATEGORY_CACHE_RESOURCE, UAV_CACHE_RESOURCE)
+
+    def destroy_object(self, instance: UAVCategory) -> None:
+        """
+        Hard deletes the given UAVCategory object, and its UAV relations.
+        The bookings of its UAVs leave its utilization rollups.
+
+        Args:
+            instance (UAVCategory): The UAVCategory object to delete.
+        """
+        with transaction.atomic():
+            bookings = get_active_bookings(RentedUAV.objects.filter(uav__category=instance))
+            apply_bookings(bookings, sign=-1)
+            instance.delete()
+            apply_bookings(bookings)
+        bump_versions(UAV_CATEGORY_CACHE_RESOURCE, UAV_CACHE_RESOURCE)
 
 
 class RentedUAVService(Service):
     """
     Service class for creating, updating and deleting RentedUAV objects.
+
+    The booking periods of the active RentedUAV rows are the source of truth
+    for availability. Overlapping bookings of the same UAV are rejected by the
+    database as well (an exclusion constraint on Postgres, triggers on SQLite).
     """
 
+    def is_available(
+        self,
+        uav: UAV,
+        start_date: datetime.date,
+        end_date: datetime.date,
+        exclude: RentedUAV = None,
+    ) -> bool:
+        """
+        Checks whether the given UAV has no active booking in the given period.
+
+        Args:
+            uav (UAV): The UAV to check.
+            start_date (datetime.date): The first day of the period.
+            end_date (datetime.date): The last day of the period.
+            exclude (RentedUAV): A booking to ignore, e.g. the one being updated.
+
+        Returns:
+            bool: True if the UAV can be booked for the period.
+        """
+        bookings = RentedUAV.objects.filter(uav=uav).overlapping(start_date, end_date)
+        if exclude is not None:
+            bookings = bookings.exclude(pk=exclude.pk)
+        return not bookings.exists()
+
+    def get_availability(
+        self,
+        uav_ids: Iterable[Union[str, uuid.UUID]],
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ) -> Dict[uuid.UUID, List[Dict]]:
+        """
+        Returns the free and busy windows of the given UAVs over the given
+        period (see ``uavs.availability.sweep_periods``).
+
+        The bookings of every UAV are fetched with one query, a range probe
+        of the ``rented_uavs_uav_period_idx`` index per UAV that skips the
+        bookings ended before the period, then swept in start date order.
+
+        Args:
+            uav_ids (Iterable[Union[str, uuid.UUID]]): The ids of the UAVs.
+            start_date (datetime.date): The first day of the period.
+            end_date (datetime.date): The last day of the period.
+
+        Returns:
+            Dict[uuid.UUID, List[Dict]]: The windows of every given UAV by id.
+        """
+        uav_ids = [uuid.UUID(str(uav_id)) for uav_id in uav_ids]
+        bookings = (
+            RentedUAV.objects.filter(uav_id__in=uav_ids)
+            .overlapping(start_date, end_date)
+            .order_by("uav_id", "start_date")
+            .values_list("uav_id", "start_date", "end_date")
+        )
+        periods = {
+            uav_id: [period[1:] for period in uav_bookings]
+            for uav_id, uav_bookings in groupby(bookings, key=itemgetter(0))
+        }
+        return {
+            uav_id: sweep_periods(periods.get(uav_id, ()), start_date, end_date)
+            for uav_id in uav_ids
+        }
+
     def create_object(
         self,
         uav: UAV,
         user: User,
         start_date: datetime.datetime,
         end_date: datetime.datetime,
-        **_,
+        **fields,
     ) -> RentedUAV:
-        return RentedUAV.objects.create(
-            uav=uav, user=user, start_date=start_date, end_date=end_date
-        )
+        """
+        Creates a booking and adds it to the utilization rollups (see
+        ``uavs.rollups``) in the same transaction.
+        """
+        # No savepoint: callers such as rent_uav already run in one.
+        with transaction.atomic(savepoint=False):
+            instance = RentedUAV.objects.create(
+                uav=uav, user=user, start_date=start_date, end_date=end_date, **fields
+            )
+            if instance.is_active:
+                apply_bookings([(uav.pk, start_date, end_date)])
+        return instance
+
+    def create_objects(self, instances: List[RentedUAV]) -> List[RentedUAV]:
+        """
+        Inserts the given unsaved RentedUAV objects with a single query, and
+        adds them to the utilization rollups with a single upsert.
+
+        Raises:
+            UAVNotAvailableError: If one of them overlaps an existing booking.
+        """
+        try:
+            with transaction.atomic():
+                instances = RentedUAV.objects.bulk_create(instances)
+                apply_bookings(
+                    (instance.uav_id, instance.start_date, instance.end_date)
+                    for instance in instances
+                    if instance.is_active
+                )
+                return instances
+        except IntegrityError:
+            raise UAVNotAvailableError("The UAV is already rented for the given dates")
 
     def update_object(self, instance: RentedUAV, **fields) -> RentedUAV:
+        """
+        Updates a booking and moves its days in the utilization rollups: the
+        previous period is removed and the new one added, if still active.
+
+        The row is locked and read again first, so that the rollups move the
+        stored period even when another request updated it since ``instance``
+        was read. The given instance is refreshed with the saved row.
+        """
+        with transaction.atomic(savepoint=False):
+            current = RentedUAV.objects.select_for_update().get(pk=instance.pk)
+            previous = (current.uav_id, current.start_date, current.end_date)
+            was_active = current.is_active
+            for key, value in fields.items():
+                # Converted as they are stored, e.g. datetimes to their date,
+                # since the previous period is read back from the database.
+                field = RentedUAV._meta.get_field(key)
+                setattr(current, key, value if field.is_relation else field.to_python(value))
+            current.save()
+            if was_active:
+                apply_bookings([previous], sign=-1)
+            if current.is_active:
+                apply_bookings([(current.uav_id, current.start_date, current.end_date)])
+        for field in RentedUAV._meta.concrete_fields:
+            setattr(instance, field.attname, getattr(current, field.attname))
         for key, value in fields.items():
             setattr(instance, key, value)
-        instance.save()
         return instance
 
     def delete_object(self, instance: RentedUAV) -> None:
+        """
+        Soft deletes a booking and removes it from the utilization rollups.
+
+        Like ``update_object`` it reads the locked row, so a booking deleted
+        twice at once is removed from the rollups once.
+        """
+        with transaction.atomic(savepoint=False):
+            current = RentedUAV.objects.select_for_update().get(pk=instance.pk)
+            if current.is_active:
+                current.is_active = False
+                current.save()
+                apply_bookings(
+                    [(current.uav_id, current.start_date, current.end_date)], sign=-1
+                )
         instance.is_active = False
-        instance.save()
 
 
 class UAVService(Service):
@@ -82,7 +254,8 @@ class UAVService(Service):
     A service class for managing UAV objects.
 
     This class provides methods for creating, updating, and deleting UAV objects,
-    as well as renting UAVs and creating rented UAV objects.
+    as well as renting UAVs and creating rented UAV objects. Every write
+    invalidates the cached UAV lists (see ``utils.cache.bump_versions``).
 
     Attributes:
         rented_uav_service (RentedUAVService): A service object for managing rented UAVs.
@@ -95,46 +268,477 @@ class UAVService(Service):
         brand: str,
         model: str,
         weight: float,
-        category: UAVCategory,
-        is_rental: bool,
+        category: Union[UAVCategory, Iterable[UAVCategory]],
+        is_rental: bool = True,
         **_,
     ) -> UAV:
-        instance = UAV.objects.create(
-            brand=brand,
-            model=model,
-            weight=weight,
-            is_rental=is_rental,
-        )
-        instance.category.add(category)
+        categories = [category] if isinstance(category, UAVCategory) else category
+        with transaction.atomic():
+            instance = UAV.objects.create(
+                brand=brand,
+                model=model,
+                weight=weight,
+                is_rental=is_rental,
+            )
+            instance.category.add(*categories)
+        bump_versions(UAV_CACHE_RESOURCE)
         return instance
 
+    def import_objects(
+        self, rows: Iterable, chunk_size: int = 1000, numbered: bool = False
+    ) -> Dict:
+        """
+        Creates UAV objects from a stream of raw rows (see
+        ``uavs.importers.parse_uav_row``).
+
+        The rows are consumed in chunks of ``chunk_size``. Each chunk resolves
+        its yet unknown category names with one query, then inserts the UAV
+        rows and the category through rows with one ``bulk_create`` each, in
+        its own transaction. Invalid rows are skipped and reported.
+
+        A stream that cannot be read any further (``uavs.importers.ReadError``)
+        stops the import: the rows read before the failing line are still
+        imported, and the failing line is reported as ``read_error``.
+
+        Args:
+            rows (Iterable): The rows to import, consumed lazily.
+            chunk_size (int): The number of rows inserted per transaction.
+            numbered (bool): Whether the rows are ``(line, row)`` pairs, as
+                yielded by the ``uavs.importers`` readers. Otherwise rows
+                are numbered from 1.
+
+        Returns:
+            Dict: The number of ``created`` UAVs, the ``errors`` (line and
+            message of every skipped row), the ``read_error`` (line and
+            message) stopping the import or None, the elapsed ``seconds``
+            and the ``rows_per_second`` throughput.
+
+        Raises:
+            ValueError: If ``chunk_size`` is not positive.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        started = time.perf_counter()
+        created = 0
+        errors = []
+        category_ids = {}
+        through_model = UAV.category.through
+        read_error = None
+
+        def read_rows():
+            nonlocal read_error
+            try:
+                yield from rows if numbered else enumerate(rows, start=1)
+            except ReadError as e:
+                read_error = {"line": e.line, "error": e.message}
+
+        for chunk in chunked(read_rows(), chunk_size):
+            parsed_rows = []
+            for line, row in chunk:
+                try:
+                    parsed_rows.append((line, *parse_uav_row(row)))
+                except ValueError as e:
+                    errors.append({"line": line, "error": str(e)})
+
+            unknown_names = {
+                name for _, _, names in parsed_rows for name in names
+            } - category_ids.keys()
+            if unknown_names:
+                category_ids.update(
+                    UAVCategory.objects.filter(name__in=unknown_names, is_active=True)
+                    .order_by()
+                    .values_list("name", "id")
+                )
+
+            instances = []
+            through_instances = []
+            for line, fields, names in parsed_rows:
+                missing_names = [name for name in names if name not in category_ids]
+                if missing_names:
+                    errors.append(
+                        {
+                            "line": line,
+                            "error": "Unknown category: %s" % ", ".join(missing_names),
+                        }
+                    )
+                    continue
+                # bulk_create sends no signals, the search document is
+                # built here instead of by uavs.signals.
+                instance = UAV(
+                    search_document=build_search_document(
+                        fields["brand"], fields["model"], names
+                    ),
+                    **fields,
+                )
+                instances.append(instance)
+                through_instances.extend(
+                    through_model(uav_id=instance.pk, uavcategory_id=category_ids[name])
+                    for name in dict.fromkeys(names)
+                )
+
+            if instances:
+                with transaction.atomic():
+                    UAV.objects.bulk_create(instances)
+                    through_model.objects.bulk_create(through_instances)
+                    bump_versions(UAV_CACHE_RESOURCE)
+                created += len(instances)
+
+        seconds = time.perf_counter() - started
+        return {
+            "created": created,
+            "errors": errors,
+            "read_error": read_error,
+            "seconds": seconds,
+            "rows_per_second": created / seconds if seconds else 0.0,
+        }
+
     def update_object(self, instance: UAV, **fields) -> UAV:
+        categories = fields.pop("category", None)
+        # The utilization rollups are keyed by the brand and categories, the
+        # bookings of the UAV are moved to the new ones.
+        moved = categories is not None or fields.get("brand", instance.brand) != instance.brand
         for key, value in fields.items():
             setattr(instance, key, value)
-        instance.save()
+        with transaction.atomic():
+            bookings = get_active_bookings(instance.rented_uavs.all()) if moved else []
+            apply_bookings(bookings, sign=-1)
+            instance.save()
+            if categories is not None:
+                instance.category.set(categories)
+            apply_bookings(bookings)
+        bump_versions(UAV_CACHE_RESOURCE)
         return instance
 
     def delete_object(self, instance: UAV) -> None:
         instance.is_active = False
         instance.save()
+        bump_versions(UAV_CACHE_RESOURCE)
+
+    def destroy_object(self, instance: UAV) -> None:
+        """
+        Hard deletes the given UAV, with its bookings and category relations.
+        The bookings are removed from the utilization rollups.
+        """
+        with transaction.atomic():
+            apply_bookings(get_active_bookings(instance.rented_uavs.all()), sign=-1)
+            instance.delete()
+        bump_versions(UAV_CACHE_RESOURCE)
+
+    def release_expired_rentals(
+        self, today: datetime.date = None, chunk_size: int = 1000
+    ) -> int:
+        """
+        Puts back on rent the UAVs whose rentals have ended (see
+        ``UAVQuerySet.expired_rentals``).
+
+        The UAVs are walked in primary key order, ``chunk_size`` at a time,
+        and every chunk is one transaction: the rows are locked with ``SKIP
+        LOCKED`` and flipped with a single ``UPDATE ... WHERE id IN (...)``
+        that checks the conditions again. UAVs being rented or released by
+        another process are skipped and left to the next run, so several
+        processes can run it at once, and running it twice changes nothing.
+
+        Args:
+            today (datetime.date): The current day, today by default.
+            chunk_size (int): The number of UAVs updated per transaction.
+
+        Returns:
+            int: The number of released UAVs.
+        """
+        today = today or timezone.localdate()
+        return self._set_rental(lambda: UAV.objects.expired_rentals(today), True, chunk_size)
+
+    def hold_started_rentals(
+        self, today: datetime.date = None, chunk_size: int = 1000
+    ) -> int:
+        """
+        Takes off rent the UAVs whose booking has started since they were
+        booked (see ``UAVQuerySet.started_rentals``), as ``rent_uav`` only
+        clears ``is_rental`` for bookings covering the day they are made.
+        Runs like ``release_expired_rentals``.
+
+        Args:
+            today (datetime.date): The current day, today by default.
+            chunk_size (int): The number of UAVs updated per transaction.
+
+        Returns:
+            int: The number of UAVs taken off rent.
+        """
+        today = today or timezone.localdate()
+        return self._set_rental(lambda: UAV.objects.started_rentals(today), False, chunk_size)
+
+    def _set_rental(
+        self, get_candidates: Callable[[], QuerySet], is_rental: bool, chunk_size: int
+    ) -> int:
+        """
+        Sets ``is_rental`` on the UAVs returned by ``get_candidates``, see
+        ``release_expired_rentals``.
+
+        Returns:
+            int: The number of updated UAVs.
+        """
+        updated = 0
+        last_pk = None
+        while True:
+            with transaction.atomic():
+                candidates = get_candidates().order_by("pk")
+                if last_pk is not None:
+                    candidates = candidates.filter(pk__gt=last_pk)
+                pks = list(
+                    candidates.select_for_update(skip_locked=True).values_list(
+                        "pk", flat=True
+                    )[:chunk_size]
+                )
+                if not pks:
+                    break
+                count = (
+                    get_candidates()
+                    .filter(pk__in=pks)
+                    .update(is_rental=is_rental, updated_at=timezone.now())
+                )
+            updated += count
+            last_pk = pks[-1]
+        if updated:
+            bump_versions(UAV_CACHE_RESOURCE)
+        return updated
+
+    @classmethod
+    def lock_uav(cls, uav_id: Union[str, uuid.UUID]) -> UAV:
+        """
+        Fetches the UAV with the given id and locks its row until the end of
+        the current transaction.
+
+        The lock is taken with ``NOWAIT`` so a request never queues behind
+        another one renting the same UAV, it fails fast instead.
+
+        Raises:
+            UAV.DoesNotExist: If there is no UAV with the given id.
+            UAVLockedError: If the row is locked by another transaction.
+        """
+        try:
+            return UAV.objects.select_for_update(nowait=True).get(pk=uav_id)
+        except OperationalError as e:
+            if is_lock_conflict(e):
+                raise UAVLockedError(
+                    "The UAV is being rented by another request, please retry"
+                ) from e
+            raise
 
     @classmethod
     def rent_uav(
         cls,
-        uav: UAV,
+        uav: Union[UAV, str, uuid.UUID],
         user: User,
-        start_date: datetime.datetime,
-        end_date: datetime.datetime,
+        start_date: datetime.date,
+        end_date: datetime.date,
     ) -> RentedUAV:
-        if uav.is_rental:
-            instance = cls.rented_uav_service.create_object(
-                uav=uav,
-                user=user,
-                start_date=start_date,
-                end_date=end_date,
-            )
-            uav.is_rental = False
-            uav.save()
-            return instance
+        """
+        Books the given UAV for the given period.
+
+        The booking runs in a single transaction holding the UAV row lock (see
+        ``lock_uav``), so concurrent rentals of the same UAV are serialized.
+        It is accepted only if the UAV has no other active booking overlapping
+        the period. ``is_rental`` is only cleared when the booking covers
+        today, so booking a UAV for next month keeps it rentable now; it is
+        cleared when the booking starts by ``hold_started_rentals``.
+
+        Args:
+            uav (Union[UAV, str, uuid.UUID]): The UAV to rent, or its id.
+            user (User): The user renting the UAV.
+            start_date (datetime.date): The first day of the rental.
+            end_date (datetime.date): The last day of the rental.
+
+        Raises:
+            UAV.DoesNotExist: If there is no UAV with the given id.
+            UAVLockedError: If the UAV is being rented by another request.
+            UAVNotAvailableError: If the UAV is already booked in the period.
+        """
+        uav_id = uav.pk if isinstance(uav, UAV) else uav
+        try:
+            with transaction.atomic():
+                locked_uav = cls.lock_uav(uav_id)
+                if not locked_uav.is_active:
+                    raise UAVNotAvailableError("The UAV is not available")
+                if not cls.rented_uav_service.is_available(
+                    locked_uav, start_date, end_date
+                ):
+                    raise UAVNotAvailableError(
+                        "The UAV is already rented for the given dates"
+                    )
+
+                try:
+                    with transaction.atomic():
+                        instance = cls.rented_uav_service.create_object(
+                            uav=locked_uav,
+                            user=user,
+                            start_date=start_date,
+                            end_date=end_date,
+                        )
+                except IntegrityError:
+                    # A booking written outside of this lock, e.g. by an admin.
+                    raise UAVNotAvailableError(
+                        "The UAV is already rented for the given dates"
+                    )
+
+                if start_date <= timezone.localdate() <= end_date:
+                    locked_uav.is_rental = False
+                    locked_uav.save(update_fields=["is_rental", "updated_at"])
+                    bump_versions(UAV_CACHE_RESOURCE)
+        except OperationalError as e:
+            if is_lock_conflict(e):
+                raise UAVLockedError(
+                    "The UAV is being rented by another request, please retry"
+                ) from e
+            raise
+
+        if isinstance(uav, UAV):
+            uav.is_rental = locked_uav.is_rental
+        return instance
+
+    @classmethod
+    def rent_uavs(cls, user: User, items: List[Dict]) -> List[Dict]:
+        """
+        Books many UAVs for the given user in one transaction.
+
+        Runs a constant number of queries whatever the batch size: one to lock
+        the UAVs, at most one to tell missing UAVs from locked ones, one to
+        fetch the overlapping bookings, one insert and at most one update of
+        ``is_rental``. The UAV rows are locked in primary key order and rows
+        locked by another transaction are skipped, so concurrent batches
+        neither deadlock nor wait on each other. Each item is accepted or
+        rejected on its own, including against earlier items of the batch.
+        Should the insert still hit the overlap constraint, e.g. racing a
+        single rent of the same UAV, the accepted items are inserted one by
+        one and the conflicting ones reported.
+
+        Args:
+            user (User): The user renting the UAVs.
+            items (List[Dict]): Dicts with ``uav_id``, ``start_date`` and
+                ``end_date`` keys.
+
+        Returns:
+            List[Dict]: One result per item, in order, with the item fields, a
+            ``status`` (``rented``, ``conflict``, ``not_found`` or ``invalid``),
+            the ``id`` of the booking when rented and an ``error`` otherwise.
+        """
+        results = []
+        uav_ids = set()
+        for item in items:
+            result = {
+                "uav_id": str(item["uav_id"]),
+                "start_date": item["start_date"],
+                "end_date": item["end_date"],
+                "status": None,
+                "id": None,
+                "error": None,
+            }
+            try:
+                result["uav_pk"] = uuid.UUID(str(item["uav_id"]))
+                uav_ids.add(result["uav_pk"])
+            except ValueError:
+                result["status"] = "invalid"
+                result["error"] = "“%s” is not a valid UUID." % item["uav_id"]
+            results.append(result)
+
+        pending = [result for result in results if result["status"] is None]
+        try:
+            with transaction.atomic():
+                locked_uavs = {
+                    uav.pk: uav
+                    for uav in UAV.objects.select_for_update(skip_locked=True)
+                    .filter(pk__in=uav_ids)
+                    .order_by("pk")
+                }
+                skipped_ids = uav_ids - locked_uavs.keys()
+                existing_ids = (
+                    set(
+                        UAV.objects.filter(pk__in=skipped_ids).values_list(
+                            "pk", flat=True
+                        )
+                    )
+                    if skipped_ids
+                    else set()
+                )
+
+                bookings = defaultdict(list)
+                if locked_uavs and pending:
+                    overlapping = (
+                        RentedUAV.objects.filter(uav_id__in=locked_uavs.keys())
+                        .overlapping(
+                            min(result["start_date"] for result in pending),
+                            max(result["end_date"] for result in pending),
+                        )
+                        .values_list("uav_id", "start_date", "end_date")
+                    )
+                    for uav_id, start_date, end_date in overlapping:
+                        bookings[uav_id].append((start_date, end_date))
+
+                accepted = []
+                for result in pending:
+                    uav = locked_uavs.get(result["uav_pk"])
+                    start_date, end_date = result["start_date"], result["end_date"]
+                    if uav is None and result["uav_pk"] in existing_ids:
+                        result["status"] = "conflict"
+                        result["error"] = (
+                            "The UAV is being rented by another request, please retry"
+                        )
+                    elif uav is None:
+                        result["status"] = "not_found"
+                        result["error"] = "UAV matching query does not exist."
+                    elif not uav.is_active:
+                        result["status"] = "conflict"
+                        result["error"] = "The UAV is not available"
+                    elif any(
+                        booked_start <= end_date and start_date <= booked_end
+                        for booked_start, booked_end in bookings[uav.pk]
+                    ):
+                        result["status"] = "conflict"
+                        result["error"] = "The UAV is already rented for the given dates"
+                    else:
+                        bookings[uav.pk].append((start_date, end_date))
+                        instance = RentedUAV(
+                            uav=uav,
+                            user=user,
+                            start_date=start_date,
+                            end_date=end_date,
+                        )
+                        accepted.append((result, instance))
+                        result["status"] = "rented"
+                        result["id"] = instance.pk
+
+                if accepted:
+                    try:
+                        cls.rented_uav_service.create_objects(
+                            [instance for _, instance in accepted]
+                        )
+                    except UAVNotAvailableError:
+                        # The batch insert was rolled back to its savepoint.
+                        for result, instance in accepted:
+                            try:
+                                cls.rented_uav_service.create_objects([instance])
+                            except UAVNotAvailableError as e:
+                                result["status"] = "conflict"
+                                result["id"] = None
+                                result["error"] = str(e)
+                today = timezone.localdate()
+                rented_now_ids = {
+                    instance.uav_id
+                    for result, instance in accepted
+                    if result["status"] == "rented"
+                    and instance.start_date <= today <= instance.end_date
+                }
+                if rented_now_ids:
+                    UAV.objects.filter(pk__in=rented_now_ids).update(
+                        is_rental=False, updated_at=timezone.now()
+                    )
+                    bump_versions(UAV_CACHE_RESOURCE)
+        except OperationalError as e:
+            if is_lock_conflict(e):
+                raise UAVLockedError(
+                    "The UAVs are being rented by another request, please retry"
+                ) from e
+            raise
 
-        raise ValueError("The UAV is not rental")
+        for result in results:
+            result.pop("uav_pk", None)
+        return results
@@ -0,0 +1,67 @@
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from django.dispatch import receiver
+from uavs.models import UAV, UAVCategory
+from uavs.search import build_search_document, refresh_search_documents
+
+# Version keys of the cached responses, see utils.cache.ResponseCache. The
+# services bump them on every write.
+UAV_CACHE_RESOURCE = "uavs"
+UAV_CATEGORY_CACHE_RESOURCE = "uav-categories"
+
+
+@receiver(pre_save, sender=UAV)
+def build_new_uav_search_document(sender, instance: UAV, raw=False, **kwargs):
+    """
+    Builds the search document of a new UAV, which has no categories yet,
+    in the INSERT itself.
+    """
+    if not raw and instance._state.adding and not instance.search_document:
+        instance.search_document = build_search_document(instance.brand, instance.model, [])
+
+
+@receiver(post_save, sender=UAV)
+def refresh_uav_search_document(
+    sender, instance: UAV, created, raw=False, update_fields=None, **kwargs
+):
+    """
+    Rebuilds the search document of a saved UAV whose brand or model may
+    have changed.
+    """
+    if raw or created:
+        return
+    if update_fields is not None and not {"brand", "model"} & set(update_fields):
+        return
+    refresh_search_documents([instance.pk])
+
+
+@receiver(m2m_changed, sender=UAV.category.through)
+def refresh_categorized_search_documents(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """
+    Rebuilds the search documents of the UAVs whose categories changed,
+    from either side of the relation.
+    """
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+    if not reverse:
+        if action != "pre_clear":
+            refresh_search_documents([instance.pk])
+    elif action == "pre_clear":
+        # The cleared UAVs are unknown once the rows are gone.
+        instance._cleared_uav_ids = list(instance.uavs.values_list("pk", flat=True))
+    elif action == "post_clear":
+        refresh_search_documents(getattr(instance, "_cleared_uav_ids", []))
+    else:
+        refresh_search_documents(pk_set)
+
+
+@receiver(post_save, sender=UAVCategory)
+def refresh_category_search_documents(
+    sender, instance: UAVCategory, created, raw=False, **kwargs
+):
+    """
+    Rebuilds the search documents of the UAVs of a renamed category.
+    """
+    if not created and not raw:
+        refresh_search_documents(instance.uavs.values_list("pk", flat=True))
@@ -0,0 +1,635 @@
+import asyncio
+import base64
+import io
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from unittest import mock
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, connections, transaction
+from django.db.backends.utils import CursorWrapper
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from model_mommy import mommy
+from rest_framework import filters
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from uavs.models import UAV, UAVCategory, RentedUAV
+from uavs.serializers import UAVSerializer
+from uavs.services import RentedUAVService, UAVService
+from uavs.views import UAVViewSet
+from users.models import User
+from utils.benchmarks import bench_scale, benchmark, measure, report
+from utils.db import load_rows
+from utils.projections import get_field_plan
+from utils.query_plans import analyze, explain
+from utils.uuids import uuid7
+
+
+def seed_bookings(uav_count: int, bookings_per_uav: int):
+    """
+    Creates ``uav_count`` UAVs, each with ``bookings_per_uav`` past,
+    non-overlapping two day bookings.
+    """
+    user = mommy.make(User)
+    uavs = UAV.objects.bulk_create(
+        [
+            UAV(brand="Brand %d" % i, model="Model %d" % i, weight=1.0)
+            for i in range(uav_count)
+        ]
+    )
+    today = timezone.localdate()
+    RentedUAV.objects.bulk_create(
+        [
+            RentedUAV(
+                uav=uav,
+                user=user,
+                start_date=today - timedelta(days=3 * (j + 1)),
+                end_date=today - timedelta(days=3 * (j + 1) - 1),
+            )
+            for uav in uavs
+            for j in range(bookings_per_uav)
+        ],
+        batch_size=1000,
+    )
+    return uavs
+
+
+class RentedUAVQueryPlanTestCase(TestCase):
+    def setUp(self):
+        self.uav = seed_bookings(uav_count=5, bookings_per_uav=20)[0]
+        self.today = timezone.localdate()
+
+    def test_overlap_check_uses_period_index(self):
+        plan = explain(
+            RentedUAV.objects.filter(uav=self.uav).overlapping(
+                self.today, self.today + timedelta(days=3)
+            )
+        )
+        self.assertIn("rented_uavs_uav_period_idx", plan)
+
+
+@benchmark
+class BookingBenchmark(TestCase):
+    """
+    Times the availability check with and without the period index.
+
+    Without it, the check falls back to the ``uav_id`` foreign key index and
+    has to visit every historical booking of the UAV.
+    """
+
+    def setUp(self):
+        self.uavs = seed_bookings(
+            uav_count=bench_scale("uavs", 20),
+            bookings_per_uav=bench_scale("bookings_per_uav", 2000),
+        )
+        self.service = RentedUAVService()
+        self.today = timezone.localdate()
+
+    def check_availability(self):
+        for uav in self.uavs:
+            self.service.is_available(uav, self.today, self.today + timedelta(days=7))
+
+    def test_availability_check(self):
+        indexed = measure(self.check_availability, iterations=20)
+        report("availability per fleet (indexed)", indexed)
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX rented_uavs_uav_period_idx")
+        scanned = measure(self.check_availability, iterations=20)
+        report("availability per fleet (no index)", scanned)
+
+        self.assertLess(indexed["p50"], scanned["p50"])
+
+
+def primary_key_size(table: str) -> int:
+    """
+    Returns the size in bytes of the primary key index of the table.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_relation_size(%s)", [table + "_pkey"])
+        else:
+            cursor.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name IN ("
+                "SELECT name FROM sqlite_master WHERE tbl_name = %s "
+                "AND name LIKE 'sqlite_autoindex_%%')",
+                [table],
+            )
+        return cursor.fetchone()[0]
+
+
+@benchmark
+class AvailabilityBenchmark(TestCase):
+    """
+    Times the 90 day availability calendar of a UAV with a long booking
+    history, and of a batch of UAVs.
+    """
+
+    def setUp(self):
+        self.uavs = seed_bookings(
+            uav_count=100, bookings_per_uav=bench_scale("availability_bookings", 1000)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=mommy.make(User))
+
+    def test_calendar_latency(self):
+        today = timezone.localdate()
+        plan = explain(
+            RentedUAV.objects.filter(uav=self.uavs[0]).overlapping(
+                today, today + timedelta(days=89)
+            )
+        )
+        self.assertIn("rented_uavs_uav_period_idx", plan)
+
+        url = "/api/v1/uavs/%s/availability/" % self.uavs[0].pk
+        self.assertEqual(self.client.get(url).status_code, 200)
+        single = measure(lambda: self.client.get(url), iterations=50)
+        report("availability, 1 UAV", single)
+
+        params = {"uav_id": [str(uav.pk) for uav in self.uavs]}
+        self.assertEqual(self.client.get("/api/v1/uavs/availability/", params).status_code, 200)
+        batch = measure(
+            lambda: self.client.get("/api/v1/uavs/availability/", params), iterations=20
+        )
+        report("availability, %d UAVs" % len(self.uavs), batch)
+        self.assertLess(single["p50"], 10)
+
+
+@benchmark
+class AvailableUAVBenchmark(TestCase):
+    """
+    Times the available UAV search, its ``NOT EXISTS`` anti-join against a
+    ``NOT IN`` over the overlapping bookings, which has to collect every
+    booked UAV before returning the first row.
+
+    The full size run is 100k UAVs and 5M bookings, e.g. on Postgres:
+
+        RUN_BENCHMARKS=1 BENCH_AVAILABLE_UAVS=100000 BENCH_AVAILABLE_BOOKINGS=50 \
+            python manage.py test uavs.tests.test_benchmarks.AvailableUAVBenchmark
+    """
+
+    URL = "/api/v1/uavs/available/"
+
+    def setUp(self):
+        uav_count = bench_scale("available_uavs", 10000)
+        bookings_per_uav = bench_scale("available_bookings", 50)
+        self.today = timezone.localdate()
+        user = mommy.make(User)
+        self.categories = UAVCategory.objects.bulk_create(
+            [UAVCategory(name="Category %d" % i) for i in range(10)]
+        )
+        now = timezone.now()
+        uav_ids = [uuid7() for _ in range(uav_count)]
+        load_rows(
+            UAV,
+            (
+                "id", "brand", "model", "weight", "is_rental", "search_document",
+                "is_active", "created_at", "updated_at",
+            ),
+            (
+                (uav_id, "Brand", "Model", float(i % 20), True, "", True, now, now)
+                for i, uav_id in enumerate(uav_ids)
+            ),
+        )
+        load_rows(
+            UAV.category.through,
+            ("uav", "uavcategory"),
+            ((uav_id, self.categories[i % 10].pk) for i, uav_id in enumerate(uav_ids)),
+        )
+
+        def booking_rows():
+            for i, uav_id in enumerate(uav_ids):
+                # Two out of three UAVs are booked over the searched week.
+                first_day = self.today - timedelta(days=3 * (bookings_per_uav - 1) - i % 3)
+                for j in range(bookings_per_uav):
+                    start = first_day + timedelta(days=3 * j)
+                    end = start + timedelta(days=1)
+                    yield uuid7(), uav_id, user.pk, start, end, True, now, now
+
+        load_rows(
+            RentedUAV,
+            (
+                "id", "uav", "user", "start_date", "end_date", "is_active",
+                "created_at", "updated_at",
+            ),
+            booking_rows(),
+        )
+        analyze("uavs", "uavs_category", "rented_uavs")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def test_search_latency(self):
+        start, end = self.today, self.today + timedelta(days=6)
+        cases = [
+            ("period", {}),
+            ("period, category", {"category": self.categories[3].pk}),
+            ("period, category, weight", {"category": self.categories[3].pk, "weight_max": 2}),
+        ]
+        for name, params in cases:
+            params = dict(params, start=start, end=end)
+            response = self.client.get(self.URL, params)
+            self.assertEqual(response.status_code, 200)
+            report(
+                "available UAVs, %s" % name,
+                measure(lambda: self.client.get(self.URL, params), iterations=20),
+            )
+
+        not_in = UAV.active_objects.exclude(
+            pk__in=RentedUAV.objects.overlapping(start, end).values("uav_id")
+        ).order_by("-created_at", "-id")
+        report("NOT IN, period", measure(lambda: list(not_in[:11]), iterations=20))
+        anti_join = UAV.objects.available(start, end).order_by("-created_at", "-id")
+        report("NOT EXISTS, period", measure(lambda: list(anti_join[:11]), iterations=20))
+
+
+@benchmark
+class PrimaryKeyBenchmark(TestCase):
+    """
+    Compares loading rented UAVs keyed by random (v4) and time-ordered (v7)
+    UUIDs, in insert throughput and primary key index size.
+
+    Random keys insert into any leaf of the index and split pages all over
+    it, time-ordered keys append to its rightmost leaf.
+    """
+
+    def setUp(self):
+        self.rows = bench_scale("pk_rows", 200000)
+        self.user = mommy.make(User)
+        self.uav_ids = [uav.pk for uav in mommy.make(UAV, _quantity=100)]
+
+    def load(self, make_id) -> float:
+        first_day = date(2000, 1, 1)
+        rows = (
+            (
+                make_id(i),
+                self.uav_ids[i % len(self.uav_ids)],
+                self.user.pk,
+                first_day + timedelta(days=2 * (i // len(self.uav_ids))),
+                first_day + timedelta(days=2 * (i // len(self.uav_ids))),
+                True,
+                timezone.now(),
+                timezone.now(),
+            )
+            for i in range(self.rows)
+        )
+        started = time.perf_counter()
+        load_rows(
+            RentedUAV,
+            ("id", "uav", "user", "start_date", "end_date", "is_active", "created_at", "updated_at"),
+            rows,
+        )
+        return time.perf_counter() - started
+
+    def test_insert_throughput_and_index_size(self):
+        started_ms = int(time.time() * 1000)
+        results = {}
+        for name, make_id in (
+            ("uuid7", lambda i: uuid7(started_ms + i)),
+            ("uuid4", lambda i: uuid.uuid4()),
+        ):
+            # Every load starts from the empty table, its rows are rolled back.
+            sid = transaction.savepoint()
+            seconds = self.load(make_id)
+            results[name] = primary_key_size("rented_uavs")
+            transaction.savepoint_rollback(sid)
+            print(
+                "\n[bench] %s keys: %.0f rows/s, primary key %.1f MiB"
+                % (name, self.rows / seconds, results[name] / 2 ** 20)
+            )
+
+        # SQLite rebalances the siblings of a split page, so random keys
+        # fill its pages about as well. Postgres splits them in halves.
+        if connection.vendor == "postgresql":
+            self.assertLess(results["uuid7"], results["uuid4"])
+
+
+@benchmark
+class PaginationBenchmark(TestCase):
+    """
+    Compares the latency of the first and a deep page of the rented UAV list
+    with page number and keyset pagination.
+    """
+
+    URL = "/api/v1/rented-uavs/"
+
+    def setUp(self):
+        self.pages = bench_scale("pages", 10000)
+        seed_bookings(uav_count=100, bookings_per_uav=self.pages // 10)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser(
+            email="bench@example.com", password="bench"
+        ))
+
+    def cursor_at(self, offset):
+        instance = RentedUAV.objects.order_by("-created_at", "-id")[offset]
+        payload = json.dumps([instance.created_at.isoformat(), str(instance.id), False])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def test_page_latency(self):
+        deep_cursor = self.cursor_at((self.pages - 1) * 10 - 1)
+        cases = [
+            ("page number, page 1", {"page": 1}),
+            ("page number, page %d" % self.pages, {"page": self.pages}),
+            ("keyset, page 1", {"cursor": ""}),
+            ("keyset, page %d" % self.pages, {"cursor": deep_cursor}),
+        ]
+        results = {}
+        for name, params in cases:
+            self.assertEqual(self.client.get(self.URL, params).status_code, 200)
+            results[name] = measure(lambda: self.client.get(self.URL, params), iterations=20)
+            report(name, results[name])
+
+        self.assertLess(
+            results["keyset, page %d" % self.pages]["p50"],
+            results["page number, page %d" % self.pages]["p50"],
+        )
+
+
+@benchmark
+class SearchBenchmark(TestCase):
+    """
+    Compares DRF's SearchFilter over ``brand`` and ``category__name`` with
+    the search document backed UAVSearchFilter.
+    """
+
+    URL = "/api/v1/uavs/"
+
+    def setUp(self):
+        categories = [UAVCategory.objects.create(name="Category %d" % i) for i in range(50)]
+        UAVService().import_objects(
+            {
+                "brand": "Brand %d" % (i % 500),
+                "model": "Model %d" % i,
+                "weight": 1.0,
+                "category": [categories[i % 50].name, categories[(i * 7) % 50].name],
+            }
+            for i in range(bench_scale("uavs", 20000))
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser(
+            email="bench@example.com", password="bench"
+        ))
+
+    def measure_search(self, search):
+        return measure(lambda: self.client.get(self.URL, {"search": search}), iterations=20)
+
+    def test_search_latency(self):
+        searches = ["brand 42", "category 7"]
+        with mock.patch.multiple(
+            UAVViewSet,
+            filter_backends=[filters.SearchFilter],
+            search_fields=["brand", "category__name"],
+            create=True,
+        ):
+            baseline = {search: self.measure_search(search) for search in searches}
+        for search in searches:
+            report("SearchFilter %r" % search, baseline[search])
+            indexed = self.measure_search(search)
+            report("UAVSearchFilter %r" % search, indexed)
+
+
+@benchmark
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FilterBenchmark(TestCase):
+    """
+    Times the UAV list with combined UAVFilter filters, and compares the
+    ``EXISTS`` category filter with a join through the categories, which
+    needs a ``DISTINCT`` as soon as several categories are given.
+    """
+
+    URL = "/api/v1/uavs/"
+
+    def setUp(self):
+        self.categories = [UAVCategory.objects.create(name="Category %d" % i) for i in range(50)]
+        UAVService().import_objects(
+            {
+                "brand": "Brand %d" % (i % 500),
+                "model": "Model %d" % i,
+                "weight": float(i % 60),
+                "category": [self.categories[i % 50].name, self.categories[(i * 7) % 50].name],
+            }
+            for i in range(bench_scale("uavs", 20000))
+        )
+        analyze("uavs", "uavs_category")
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser(
+            email="bench@example.com", password="bench"
+        ))
+
+    def test_filter_latency(self):
+        category_ids = [str(category.pk) for category in self.categories[:5]]
+        cases = [
+            ("brand prefix", {"brand": "Brand 4"}),
+            ("weight range", {"weight_min": 10, "weight_max": 20}),
+            ("categories", {"category": ",".join(category_ids)}),
+            (
+                "combined",
+                {
+                    "brand": "Brand 4",
+                    "weight_max": 30,
+                    "created_at_after": (timezone.now() - timedelta(days=1)).isoformat(),
+                    "category": ",".join(category_ids),
+                },
+            ),
+        ]
+        for name, params in cases:
+            self.assertEqual(self.client.get(self.URL, params).status_code, 200)
+            report(
+                "UAVFilter %s" % name,
+                measure(lambda: self.client.get(self.URL, params), iterations=20),
+            )
+
+        joined = UAV.active_objects.filter(category__in=category_ids).distinct()
+        report("categories, join", measure(lambda: list(joined[:10]), iterations=20))
+        exists = UAV.active_objects.in_categories(category_ids)
+        report("categories, EXISTS", measure(lambda: list(exists[:10]), iterations=20))
+
+
+@benchmark
+class SerializationBenchmark(TestCase):
+    """
+    Times the rendering of 1,000 UAV rows from prefetched model instances
+    through ``UAVSerializer``, and from ``values()`` rows through its
+    compiled field plan. Both include the queries and the JSON rendering,
+    which must be byte for byte the same.
+    """
+
+    def setUp(self):
+        self.rows = bench_scale("serialized_rows", 1000)
+        categories = [UAVCategory.objects.create(name="Category %d" % i) for i in range(10)]
+        UAVService().import_objects(
+            {
+                "brand": "Brand %d" % (i % 50),
+                "model": "Model %d" % i,
+                "weight": i / 7,
+                "category": [categories[i % 10].name, categories[(i * 3) % 10].name],
+            }
+            for i in range(self.rows)
+        )
+        self.queryset = UAV.active_objects.order_by("-created_at", "-id")
+        self.plan = get_field_plan(UAVSerializer)
+
+    def render_instances(self):
+        queryset = self.queryset.prefetch_related("category")
+        return JSONRenderer().render(UAVSerializer(queryset, many=True).data)
+
+    def render_rows(self):
+        return JSONRenderer().render(self.plan.render(self.plan.project(self.queryset)))
+
+    def test_rendering_cost(self):
+        self.assertEqual(self.render_rows(), self.render_instances())
+        results = {}
+        for name, func in (("serializer", self.render_instances), ("field plan", self.render_rows)):
+            results[name] = {
+                key: value * 1000 / self.rows
+                for key, value in measure(func, iterations=20).items()
+            }
+            report("%s, per 1,000 rows" % name, results[name])
+        self.assertLess(results["field plan"]["p50"], results["serializer"]["p50"])
+
+
+def load_report(name: str, latencies, elapsed: float) -> None:
+    """
+    Prints the throughput and latency percentiles of a load test.
+    """
+    latencies = sorted(latencies)
+    print(
+        "\n[bench] %s: %d requests, %.1f requests/sec, p50=%.3fms, p95=%.3fms"
+        % (
+            name,
+            len(latencies),
+            len(latencies) / elapsed,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000,
+        )
+    )
+
+
+@benchmark
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class AsyncReadPathBenchmark(TransactionTestCase):
+    """
+    Load tests the UAV list at high concurrency through the WSGI handler with
+    a fixed pool of worker threads, like a threaded WSGI server, and through
+    the ASGI handler with concurrent requests, like uvicorn, once with the
+    sync viewset and once with the async view.
+
+    Every query is delayed by ``BENCH_QUERY_LATENCY_MS`` (5 by default) to
+    stand in for the network round trip to Postgres, which is the time sync
+    views hold their thread for. The response cache is disabled.
+    """
+
+    SYNC_URL = "/api/v1/uavs/rental/"
+    ASYNC_URL = "/api/v1/async/uavs/rental/"
+
+    def setUp(self):
+        self.requests = bench_scale("async_requests", 500)
+        self.concurrency = bench_scale("async_concurrency", 100)
+        self.wsgi_threads = bench_scale("wsgi_threads", 8)
+        self.query_latency = bench_scale("query_latency_ms", 5) / 1000
+        category = UAVCategory.objects.create(name="Mapping")
+        for uav in UAV.objects.bulk_create(
+            [UAV(brand="Brand %d" % i, model="Model %d" % i, weight=1.0) for i in range(100)]
+        ):
+            uav.category.add(category)
+        user = User.objects.create_superuser(email="bench@example.com", password="bench")
+        self.authorization = ("Token %s" % Token.objects.create(user=user).key).encode()
+
+    def slow_execute(self, execute):
+        def wrapper(cursor, *args, **kwargs):
+            time.sleep(self.query_latency)
+            return execute(cursor, *args, **kwargs)
+
+        return wrapper
+
+    def wsgi_get(self, application, path):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "testserver",
+            "HTTP_AUTHORIZATION": self.authorization.decode(),
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+        }
+        started = time.perf_counter()
+        try:
+            statuses = []
+            body = application(environ, lambda status, headers: statuses.append(status))
+            b"".join(body)
+            self.assertTrue(statuses[0].startswith("200"))
+            return time.perf_counter() - started
+        finally:
+            connections.close_all()
+
+    async def asgi_get(self, application, path, semaphore):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"authorization", self.authorization)],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 0),
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        async with semaphore:
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            self.assertEqual(messages[0]["status"], 200)
+            return time.perf_counter() - started
+
+    def run_wsgi(self, path):
+        application = WSGIHandler()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.wsgi_threads) as executor:
+            latencies = list(
+                executor.map(lambda _: self.wsgi_get(application, path), range(self.requests))
+            )
+        return latencies, time.perf_counter() - started
+
+    def run_asgi(self, path):
+        application = ASGIHandler()
+
+        async def run():
+            semaphore = asyncio.Semaphore(self.concurrency)
+            return await asyncio.gather(
+                *(self.asgi_get(application, path, semaphore) for _ in range(self.requests))
+            )
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run())
+        return latencies, time.perf_counter() - started
+
+    def test_concurrent_reads(self):
+        with mock.patch.object(CursorWrapper, "_execute", self.slow_execute(CursorWrapper._execute)):
+            load_report(
+                "WSGI, sync viewset, %d threads" % self.wsgi_threads,
+                *self.run_wsgi(self.SYNC_URL),
+            )
+            load_report(
+                "ASGI, sync viewset, %d concurrent" % self.concurrency,
+                *self.run_asgi(self.SYNC_URL),
+            )
+            load_report(
+                "ASGI, async view, %d concurrent" % self.concurrency,
+                *self.run_asgi(self.ASYNC_URL),
+            )
@@ -0,0 +1,290 @@
+import datetime
+import tempfile
+from unittest import mock
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db.models import Count, Sum
+from django.utils import timezone
+from model_mommy import mommy
+from uavs.management.commands.bench import Command as BenchCommand
+from uavs.models import UAV, UAVCategory, RentedUAV, UtilizationRollup
+from uavs.seeding import FleetGenerator
+from users.models import User
+from utils.benchmarks import compare
+
+
+class ImportUAVsCommandTestCase(TestCase):
+    def setUp(self):
+        UAVCategory.objects.create(name="Category 1")
+        UAVCategory.objects.create(name="Category 2")
+
+    def import_file(self, suffix, content):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix) as file:
+            file.write(content)
+            file.flush()
+            out = StringIO()
+            call_command("import_uavs", file.name, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import_csv(self):
+        output = self.import_file(
+            ".csv",
+            "brand,model,weight,is_rental,category\n"
+            "Brand 1,Model 1,1.5,true,Category 1|Category 2\n"
+            "Brand 2,Model 2,2,false,Category 2\n",
+        )
+        self.assertIn("Imported 2 UAVs", output)
+        self.assertEqual(UAV.objects.count(), 2)
+        self.assertFalse(UAV.objects.get(brand="Brand 2").is_rental)
+        self.assertEqual(UAV.objects.get(brand="Brand 1").category.count(), 2)
+
+    def test_import_ndjson(self):
+        output = self.import_file(
+            ".ndjson",
+            '{"brand": "Brand 1", "model": "Model 1", "weight": 1, "category": "Category 1"}\n'
+            "\n"
+            '{"brand": "Brand 2", "model": "Model 2", "weight": 2, "category": ["Category 3"]}\n',
+        )
+        self.assertIn("Imported 1 UAVs", output)
+        self.assertIn("1 rows skipped", output)
+        self.assertEqual(UAV.objects.count(), 1)
+
+    def test_stops_at_unreadable_line(self):
+        with self.assertRaisesMessage(CommandError, "Stopped at line 2"):
+            self.import_file(
+                ".ndjson",
+                '{"brand": "Brand 1", "model": "Model 1", "weight": 1, "category": "Category 1"}\n'
+                "{not json\n",
+            )
+        self.assertEqual(UAV.objects.count(), 1)
+
+    def test_chunk_size_must_be_positive(self):
+        with self.assertRaisesMessage(CommandError, "--chunk-size must be positive"):
+            call_command("import_uavs", "-", "--format", "csv", "--chunk-size", "0")
+
+
+class PurgeSoftDeletedCommandTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@gmail.com", password="testpass")
+        self.category = mommy.make(UAVCategory)
+        self.active_uav = mommy.make(UAV, category=[self.category])
+        self.old_uav = mommy.make(UAV, category=[self.category], is_active=False)
+        self.recent_uav = mommy.make(UAV, category=[self.category], is_active=False)
+        self.old_record = RentedUAV.objects.create(
+            uav=self.active_uav,
+            user=self.user,
+            start_date="2021-01-01",
+            end_date="2021-01-02",
+            is_active=False,
+        )
+        # updated_at is set on save, so the deletion time is backdated with
+        # a queryset update.
+        old = timezone.now() - datetime.timedelta(days=40)
+        UAV.objects.filter(pk=self.old_uav.pk).update(updated_at=old)
+        RentedUAV.objects.filter(pk=self.old_record.pk).update(updated_at=old)
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command("purge_soft_deleted", *args, stdout=out)
+        return out.getvalue()
+
+    def test_purge_soft_deleted(self):
+        output = self.purge("--days", "30", "--chunk-size", "1")
+        self.assertIn("Purged 1 RentedUAV rows", output)
+        self.assertIn("Purged 1 UAV rows", output)
+        self.assertIn("Purged 0 UAVCategory rows", output)
+        self.assertEqual(
+            set(UAV.objects.values_list("pk", flat=True)),
+            {self.active_uav.pk, self.recent_uav.pk},
+        )
+        self.assertFalse(RentedUAV.objects.exists())
+
+    def test_active_rows_are_not_purged(self):
+        booking = RentedUAV.objects.create(
+            uav=self.old_uav, user=self.user, start_date="2021-02-01", end_date="2021-02-02"
+        )
+        old_category = mommy.make(UAVCategory, is_active=False)
+        self.active_uav.category.add(old_category)
+        old = timezone.now() - datetime.timedelta(days=40)
+        UAVCategory.objects.filter(pk=old_category.pk).update(updated_at=old)
+
+        output = self.purge("--days", "30")
+        self.assertIn("Purged 0 UAV rows", output)
+        self.assertIn("Purged 0 UAVCategory rows", output)
+        self.assertTrue(RentedUAV.objects.filter(pk=booking.pk).exists())
+        self.assertTrue(self.active_uav.category.filter(pk=old_category.pk).exists())
+
+    def test_dry_run(self):
+        output = self.purge("--dry-run")
+        self.assertIn("Would purge 1 UAV rows", output)
+        self.assertEqual(UAV.objects.count(), 3)
+        self.assertEqual(RentedUAV.objects.count(), 1)
+
+    def test_active_managers_hide_soft_deleted_rows(self):
+        self.assertEqual(list(UAV.active_objects.all()), [self.active_uav])
+        self.assertEqual(UAV.objects.count(), 3)
+        self.assertEqual(UAV.objects.deleted().count(), 2)
+        self.assertFalse(RentedUAV.active_objects.exists())
+
+
+class BenchCommandTestCase(TestCase):
+    def test_every_endpoint_responds(self):
+        command = BenchCommand()
+        command.seed(uav_count=8, user_count=3)
+        results = command.run(iterations=2)
+        self.assertEqual(
+            set(results), {name for name, path, data in command.get_endpoints()}
+        )
+        self.assertEqual(results["users-me"]["queries"], 0)
+        for stats in results.values():
+            self.assertGreater(stats["p50"], 0)
+
+    def test_compare(self):
+        baseline = {"list": {"p50": 10.0, "queries": 3, "alloc_kib": 100.0}}
+        self.assertEqual(
+            compare({"list": {"p50": 12.0, "queries": 3, "alloc_kib": 104.0}}, baseline), []
+        )
+        self.assertEqual(
+            compare({"list": {"p50": 20.0, "queries": 4, "alloc_kib": 100.0}}, baseline),
+            ["list: 4 queries per request, was 3", "list: p50 20.00, was 10.00 (+100%)"],
+        )
+        # Small absolute growths are noise.
+        self.assertEqual(
+            compare(
+                {"list": {"p50": 0.5, "queries": 3, "alloc_kib": 1.0}},
+                {"list": {"p50": 0.1, "queries": 3, "alloc_kib": 0.1}},
+            ),
+            [],
+        )
+
+
+class SeedFleetCommandTestCase(TestCase):
+    def test_seed_fleet(self):
+        out = StringIO()
+        call_command("seed_fleet", "--scale", "0.05", "--batch-size", "100", stdout=out)
+        self.assertIn("uavs: 50 rows", out.getvalue())
+        self.assertEqual(UAV.objects.count(), 50)
+        self.assertEqual(User.objects.count(), 10)
+        self.assertGreater(RentedUAV.objects.count(), 50)
+        self.assertFalse(UAV.objects.annotate(n=Count("category")).filter(n=0).exists())
+        self.assertFalse(UAV.objects.filter(search_document="").exists())
+
+        today = timezone.localdate()
+        rented_today = set(
+            RentedUAV.objects.filter(
+                is_active=True, start_date__lte=today, end_date__gte=today
+            ).values_list("uav_id", flat=True)
+        )
+        self.assertEqual(
+            set(UAV.objects.filter(is_rental=False).values_list("pk", flat=True)), rented_today
+        )
+        user = User.objects.first()
+        self.assertTrue(user.check_password("fleet-0"))
+        fleet = UtilizationRollup.objects.filter(scope="fleet").aggregate(total=Sum("booked"))
+        self.assertEqual(
+            fleet["total"],
+            sum(
+                (booking.end_date - booking.start_date).days + 1
+                for booking in RentedUAV.objects.filter(is_active=True)
+            ),
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("seed_fleet", stdout=StringIO())
+
+    def test_generator_is_deterministic(self):
+        def generate(seed):
+            generator = FleetGenerator(scale=0.01, seed=seed, today=datetime.date(2024, 1, 1))
+            return [
+                list(rows())
+                for rows in (
+                    generator.category_rows,
+                    lambda: [row[:2] for row in generator.user_rows()],
+                    generator.uav_rows,
+                    generator.uav_category_rows,
+                    generator.rented_uav_rows,
+                )
+            ]
+
+        self.assertEqual(generate(1), generate(1))
+        self.assertNotEqual(generate(1), generate(2))
+
+    def test_bookings_do_not_overlap(self):
+        generator = FleetGenerator(scale=0.05)
+        for rows in (generator.category_rows, generator.user_rows, generator.uav_rows):
+            list(rows())
+        bookings = {}
+        for _, uav_id, _, start, end, *_ in generator.rented_uav_rows():
+            self.assertLessEqual(start, end)
+            self.assertGreater(start, bookings.get(uav_id, datetime.date.min))
+            bookings[uav_id] = end
+
+
+class RebuildRollupsCommandTestCase(TestCase):
+    def test_rebuild_rollups(self):
+        user = mommy.make(User)
+        uav = mommy.make(UAV, brand="Brand", category=[mommy.make(UAVCategory)])
+        # Written without the service, so only a rebuild counts it.
+        RentedUAV.objects.create(
+            uav=uav, user=user, start_date="2024-01-01", end_date="2024-01-03"
+        )
+        RentedUAV.objects.create(
+            uav=uav, user=user, start_date="2024-01-05", end_date="2024-01-05", is_active=False
+        )
+        UtilizationRollup.objects.create(scope="fleet", key="", day="2023-01-01", booked=7)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command("rebuild_rollups", "--batch-size", "1", stdout=out)
+        self.assertIn("Rebuilt 12 rollup rows", out.getvalue())
+        # The dimensions of every UAV are read without a list of their ids.
+        self.assertFalse([query for query in queries if " IN (" in query["sql"]])
+        self.assertEqual(
+            list(
+                UtilizationRollup.objects.filter(scope="brand")
+                .order_by("day")
+                .values_list("key", "day", "booked")
+            ),
+            [
+                ("Brand", datetime.date(2024, 1, 1), 1),
+                ("Brand", datetime.date(2024, 1, 2), 1),
+                ("Brand", datetime.date(2024, 1, 3), 1),
+            ],
+        )
+        self.assertFalse(UtilizationRollup.objects.filter(day="2023-01-01").exists())
+
+
+class ReleaseExpiredRentalsCommandTestCase(TestCase):
+    def setUp(self):
+        user = mommy.make(User)
+        self.uav = mommy.make(UAV, is_rental=False)
+        RentedUAV.objects.create(
+            uav=self.uav, user=user, start_date="2021-01-01", end_date="2021-01-02"
+        )
+
+    def test_release_expired_rentals(self):
+        out = StringIO()
+        call_command("release_expired_rentals", stdout=out)
+        self.assertIn("Released 1 UAVs, took 0 off rent", out.getvalue())
+        self.uav.refresh_from_db()
+        self.assertTrue(self.uav.is_rental)
+
+    def test_loop(self):
+        out = StringIO()
+        with mock.patch(
+            "uavs.management.commands.release_expired_rentals.time.sleep",
+            side_effect=[None, KeyboardInterrupt],
+        ) as sleep, mock.patch(
+            # It would close the connection of the test transaction.
+            "uavs.management.commands.release_expired_rentals.close_old_connections"
+        ) as close_old_connections:
+            call_command("release_expired_rentals", "--loop", "--interval", "5", stdout=out)
+        sleep.assert_called_with(5)
+        close_old_connections.assert_called_once_with()
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ["Released 1 UAVs, took 0 off rent", "Released 0 UAVs, took 0 off rent", "Stopped"],
+        )
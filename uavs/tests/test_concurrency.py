@@ -0,0 +1,68 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.test import APIClient
+from uavs.models import UAV, RentedUAV
+from users.models import User
+from utils.benchmarks import bench_scale
+
+
+class RentStressTestCase(TransactionTestCase):
+    """
+    Fires concurrent rent requests at a small fleet from many threads.
+
+    Every request either books the UAV (201) or is turned away with a 409,
+    and no UAV ends up with two overlapping active bookings.
+    """
+
+    UAV_RENT_URL = "/api/v1/uavs/rent/"
+
+    def setUp(self):
+        self.user = mommy.make(User)
+        self.uavs = mommy.make(UAV, _quantity=5)
+        self.today = timezone.localdate()
+
+    def rent(self, uav_id, offset):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        try:
+            response = client.post(
+                self.UAV_RENT_URL,
+                data={
+                    "uav_id": uav_id,
+                    "start_date": str(self.today + timedelta(days=offset)),
+                    "end_date": str(self.today + timedelta(days=offset + 2)),
+                },
+            )
+            return response.status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_rent_has_no_double_booking(self):
+        request_count = bench_scale("rent_requests", 200)
+        rng = random.Random(42)
+        requests = [
+            (rng.choice(self.uavs).id, rng.randrange(10))
+            for _ in range(request_count)
+        ]
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            statuses = list(executor.map(lambda args: self.rent(*args), requests))
+
+        self.assertTrue(
+            set(statuses) <= {status.HTTP_201_CREATED, status.HTTP_409_CONFLICT}
+        )
+        self.assertEqual(statuses.count(201), RentedUAV.objects.count())
+        for uav in self.uavs:
+            bookings = sorted(
+                RentedUAV.objects.filter(uav=uav, is_active=True).values_list(
+                    "start_date", "end_date"
+                )
+            )
+            for previous, current in zip(bookings, bookings[1:]):
+                self.assertLess(previous[1], current[0])
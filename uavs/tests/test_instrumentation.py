@@ -0,0 +1,94 @@
+import asyncio
+from contextlib import ExitStack
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import override_settings
+from model_mommy import mommy
+from rest_framework.test import APITestCase
+from uavs.models import UAV, UAVCategory
+from uavs.views import UAVViewSet
+from users.models import User
+from utils.cache import response_cache
+from utils.instrumentation import QueryRecorder, fingerprint, install_all_query_recording
+from utils.testing import QueryBudgetMixin
+
+
+def without_optimizations():
+    """
+    Renders the UAV list from model instances without prefetching, i.e.
+    with an N+1 on the categories.
+    """
+    stack = ExitStack()
+    stack.enter_context(
+        mock.patch.object(UAVViewSet, "optimize_queryset", lambda self, queryset: queryset)
+    )
+    stack.enter_context(mock.patch("utils.mixins.get_field_plan", return_value=None))
+    return stack
+
+
+class QueryInstrumentationTestCase(QueryBudgetMixin, APITestCase):
+    BASE_URL = "/api/v1/uavs/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        user = User.objects.create_superuser(email='testuser@gmail.com', password='testpass')
+        self.client.force_authenticate(user=user)
+        mommy.make(UAV, category=[mommy.make(UAVCategory)], _quantity=5)
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM uavs WHERE id IN (%s, %s,  %s) AND weight > 1.5"),
+            fingerprint("SELECT * FROM uavs WHERE id IN (%s) AND weight > 3"),
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM uavs WHERE brand = 'it''s'"),
+            "SELECT * FROM uavs WHERE brand = ?",
+        )
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.BASE_URL)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="4 queries"$')
+
+    @override_settings(QUERY_N_PLUS_ONE_THRESHOLD=3)
+    def test_n_plus_one_is_logged(self):
+        with without_optimizations():
+            with self.assertLogs("utils.middleware", level="WARNING") as logs:
+                self.client.get(self.BASE_URL)
+        self.assertIn("executed 5 times", logs.output[0])
+
+    def test_query_budget(self):
+        with self.assertQueryBudget(4):
+            self.client.get(self.BASE_URL)
+        response_cache.cache.clear()
+        with without_optimizations():
+            with self.assertRaises(AssertionError):
+                with self.assertQueryBudget(4):
+                    self.client.get(self.BASE_URL)
+
+    def test_nested_recordings(self):
+        outer, inner = QueryRecorder(), QueryRecorder()
+        with outer.record():
+            UAV.objects.count()
+            with inner.record():
+                UAV.objects.count()
+        UAV.objects.count()
+        self.assertEqual((outer.count, inner.count), (2, 1))
+
+    async def test_concurrent_recordings_are_isolated(self):
+        # Both run their queries on the same thread and connection, the way
+        # concurrent ASGI requests do.
+        await sync_to_async(install_all_query_recording)()
+
+        async def run(queries, started, other_started):
+            recorder = QueryRecorder()
+            with recorder.record(install=False):
+                started.set()
+                await other_started.wait()
+                for _ in range(queries):
+                    await UAV.objects.acount()
+                    await asyncio.sleep(0)
+            return recorder.count
+
+        first, second = asyncio.Event(), asyncio.Event()
+        counts = await asyncio.gather(run(2, first, second), run(5, second, first))
+        self.assertEqual(counts, [2, 5])
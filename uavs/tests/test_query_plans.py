@@ -0,0 +1,88 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from uavs.models import UAV, UAVCategory, RentedUAV
+from users.models import User
+from utils.benchmarks import bench_scale
+from utils.cache import response_cache
+from utils.query_plans import QueryPlanAssertionsMixin, analyze, explain_sql
+
+
+class EndpointQueryPlanTestCase(QueryPlanAssertionsMixin, APITestCase):
+    """
+    Fails when the page query of a list endpoint stops being served by its
+    index, i.e. regresses to a full table scan or an explicit sort.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(email="testuser@gmail.com", password="testpass")
+        rows = bench_scale("plan_rows", 2000)
+        UAVCategory.objects.bulk_create(
+            [UAVCategory(name="Category %d" % i, is_active=i % 10 != 0) for i in range(rows // 10)]
+        )
+        uavs = UAV.objects.bulk_create(
+            [
+                UAV(
+                    brand="Brand %d" % i,
+                    model="Model %d" % i,
+                    weight=1.0,
+                    is_rental=i % 4 != 0,
+                    is_active=i % 10 != 0,
+                )
+                for i in range(rows)
+            ],
+            batch_size=1000,
+        )
+        today = timezone.localdate()
+        RentedUAV.objects.bulk_create(
+            [
+                RentedUAV(
+                    uav=uav,
+                    user=cls.user,
+                    start_date=today - timedelta(days=2),
+                    end_date=today - timedelta(days=1),
+                    is_active=i % 10 != 0,
+                )
+                for i, uav in enumerate(uavs)
+            ],
+            batch_size=1000,
+        )
+        analyze("uav_categories", "uavs", "rented_uavs")
+
+    def setUp(self):
+        response_cache.cache.clear()
+        self.client.force_authenticate(user=self.user)
+
+    def assertEndpointUsesIndex(self, url, table, index):
+        for params in ({}, {"cursor": ""}):
+            self.assertUsesIndex(self.capture_page_query(url, table, params), table, index)
+        # A deeper keyset page adds the position range to the same scan.
+        next_page = self.client.get(url, {"cursor": ""}).json()["next"]
+        self.assertUsesIndex(self.capture_page_query(next_page, table), table, index)
+
+    def test_uav_list(self):
+        self.assertEndpointUsesIndex("/api/v1/uavs/", "uavs", "uavs_rental_keyset_idx")
+
+    def test_rental_uav_list(self):
+        self.assertEndpointUsesIndex("/api/v1/uavs/rental/", "uavs", "uavs_rental_keyset_idx")
+
+    def test_available_uav_list(self):
+        today = timezone.localdate()
+        params = {"start": today, "end": today + timedelta(days=7)}
+        url = "/api/v1/uavs/available/"
+        sql = self.capture_page_query(url, "uavs", params)
+        self.assertUsesIndex(sql, "uavs", "uavs_active_keyset_idx")
+        self.assertIn("rented_uavs_uav_period_idx", explain_sql(sql))
+        next_page = self.client.get(url, params).json()["next"]
+        self.assertUsesIndex(
+            self.capture_page_query(next_page, "uavs"), "uavs", "uavs_active_keyset_idx"
+        )
+
+    def test_uav_category_list(self):
+        self.assertEndpointUsesIndex(
+            "/api/v1/uav-categories/", "uav_categories", "uav_categories_keyset_idx"
+        )
+
+    def test_rented_uav_list(self):
+        self.assertEndpointUsesIndex("/api/v1/rented-uavs/", "rented_uavs", "rented_uavs_keyset_idx")
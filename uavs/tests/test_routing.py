@@ -0,0 +1,142 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from uavs.models import UAV, UAVCategory
+from users.models import User
+from utils.cache import response_cache
+from utils.routers import PrimaryReplicaRouter, replica_reads, stick_to_primary
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class PrimaryReplicaRouterTestCase(TestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_replicas_only_when_allowed(self):
+        self.assertEqual(self.router.db_for_read(UAV), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(UAV), "replica")
+            self.assertEqual(self.router.db_for_write(UAV), "default")
+            with replica_reads(False):
+                self.assertEqual(self.router.db_for_read(UAV), "default")
+        self.assertEqual(self.router.db_for_read(UAV), "default")
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(UAV), "default")
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(self.router.allow_migrate("default", "uavs"))
+        self.assertFalse(self.router.allow_migrate("replica", "uavs"))
+
+
+@override_settings(REPLICA_DATABASES=["replica"])
+class ReplicaReadMixinTestCase(APITestCase):
+    """
+    The replica is replaced by the primary through ``random.choice``, whose
+    calls tell which queries the router sent to a replica.
+    """
+
+    BASE_URL = "/api/v1/uavs/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        self.user = User.objects.create_superuser(email='testuser@gmail.com', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.uav = mommy.make(UAV, category=[mommy.make(UAVCategory)], is_rental=True)
+
+    def get_routed(self, url, **params):
+        with mock.patch("utils.routers.random.choice", return_value="default") as choice:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return choice.called
+
+    def test_read_actions_use_the_replica(self):
+        for url in (
+            self.BASE_URL,
+            self.BASE_URL + "rental/",
+            "%s%s/" % (self.BASE_URL, self.uav.id),
+            "/api/v1/rented-uavs/",
+            "/api/v1/users/me/rental-records/",
+        ):
+            self.assertTrue(self.get_routed(url), url)
+        self.assertFalse(self.get_routed("/api/v1/users/me/"))
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        today = timezone.localdate()
+        response = self.client.post(
+            self.BASE_URL + "rent/",
+            {"uav_id": self.uav.id, "start_date": today + timedelta(days=1), "end_date": today + timedelta(days=2)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(self.get_routed("/api/v1/rented-uavs/"))
+
+        self.client.force_authenticate(user=mommy.make(User, is_superuser=True))
+        self.assertTrue(self.get_routed("/api/v1/rented-uavs/"))
+
+    def test_failed_write_does_not_stick(self):
+        response = self.client.post(self.BASE_URL + "rent/", {"uav_id": self.uav.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(self.get_routed(self.BASE_URL))
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_stickiness_expires(self):
+        stick_to_primary(self.user)
+        self.assertTrue(self.get_routed(self.BASE_URL))
+
+    def test_replica_responses_are_not_cached_right_after_a_write(self):
+        with mock.patch("utils.routers.random.choice", return_value="default"):
+            self.client.get(self.BASE_URL)
+            self.assertEqual(self.client.get(self.BASE_URL)["X-Cache"], "MISS")
+            with override_settings(REPLICA_STICKY_SECONDS=0):
+                self.client.get(self.BASE_URL)
+                self.assertEqual(self.client.get(self.BASE_URL)["X-Cache"], "HIT")
+
+
+@skipUnless("replica" in settings.DATABASES, "Needs a replica database, see core.settings_replica")
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """
+    Runs against the two SQLite databases of ``core.settings_replica``.
+    """
+
+    databases = "__all__"
+    BASE_URL = "/api/v1/uavs/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        self.user = User.objects.create_superuser(email='testuser@gmail.com', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        mommy.make(UAV, category=[mommy.make(UAVCategory)], is_rental=True, _quantity=3)
+
+    def get(self, url):
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(primary), len(replica)
+
+    def test_reads_and_writes(self):
+        response, primary, replica = self.get(self.BASE_URL)
+        self.assertEqual(response.json()["count"], 3)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        payload = {'brand': 'New', 'model': 'M1', 'weight': 1.0, 'category': [UAVCategory.objects.get().id]}
+        with CaptureQueriesContext(connections["replica"]) as replica_writes:
+            response = self.client.post(self.BASE_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(replica_writes), 0)
+
+        response, primary, replica = self.get(self.BASE_URL)
+        self.assertEqual(response.json()["count"], 4)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
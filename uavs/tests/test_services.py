@@ -1,9 +1,18 @@
-from datetime import timedelta
+import io
+import json
+import uuid
+from datetime import date, timedelta
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.test import TestCase
-from uavs.models import UAVCategory, UAV, RentedUAV
+from uavs.availability import sweep_periods
+from uavs.exceptions import UAVNotAvailableError
+from uavs.importers import read_ndjson
+from uavs.models import UAVCategory, UAV, RentedUAV, UtilizationRollup
+from uavs.rollups import get_utilization, rebuild_rollups
 from users.models import User
 from uavs.services import UAVCategoryService, UAVService, RentedUAVService
+from utils.uuids import uuid7
 
 
 class UAVCategoryServiceTestCase(TestCase):
@@ -52,6 +61,16 @@ class UAVServiceTestCase(TestCase):
         updated_uav = self.service.update_object(uav, brand="Updated Brand")
         self.assertEqual(updated_uav.brand, "Updated Brand")
 
+    def test_create_and_update_categories(self):
+        other = UAVCategory.objects.create(name="Other Category")
+        uav = self.service.create_object(
+            brand="Test Brand", model="Test Model", weight=1.0, category=[self.category, other]
+        )
+        self.assertEqual(uav.category.count(), 2)
+        self.service.update_object(uav, category=[other])
+        self.assertEqual(list(uav.category.all()), [other])
+        self.assertIn("other category", UAV.objects.get(pk=uav.pk).search_document)
+
     def test_delete_object(self):
         uav = self.service.create_object(
             brand="Test Brand",
@@ -98,10 +117,10 @@ class UAVRentedServiceTestCase(TestCase):
             end_date=self.end_date,
         )
         updated_rented_uav = self.service.update_object(
-            rented_uav, start_date=self.start_date + timedelta(days=2)
+            rented_uav, end_date=self.end_date + timedelta(days=2)
         )
         self.assertEqual(
-            updated_rented_uav.start_date, self.start_date + timedelta(days=2)
+            updated_rented_uav.end_date, self.end_date + timedelta(days=2)
         )
 
     def test_delete_object(self):
@@ -114,3 +133,477 @@ class UAVRentedServiceTestCase(TestCase):
         self.service.delete_object(rented_uav)
         db_rented_uav = RentedUAV.objects.get(pk=rented_uav.pk)
         self.assertFalse(db_rented_uav.is_active)
+
+
+class UAVBookingTestCase(TestCase):
+    def setUp(self):
+        self.uav = UAV.objects.create(
+            brand="Test Brand",
+            model="Test Model",
+            weight=1.0,
+            is_rental=True,
+        )
+        self.user = User.objects.create(email="testuser@testmail.com")
+        self.today = timezone.localdate()
+
+    def test_rent_uav_rejects_overlapping_booking(self):
+        UAVService.rent_uav(
+            self.uav, self.user, self.today, self.today + timedelta(days=3)
+        )
+        with self.assertRaises(UAVNotAvailableError):
+            UAVService.rent_uav(
+                self.uav,
+                self.user,
+                self.today + timedelta(days=3),
+                self.today + timedelta(days=5),
+            )
+        self.assertEqual(RentedUAV.objects.filter(uav=self.uav).count(), 1)
+
+    def test_rent_uav_accepts_adjacent_booking(self):
+        UAVService.rent_uav(
+            self.uav, self.user, self.today, self.today + timedelta(days=3)
+        )
+        UAVService.rent_uav(
+            self.uav,
+            self.user,
+            self.today + timedelta(days=4),
+            self.today + timedelta(days=5),
+        )
+        self.assertEqual(RentedUAV.objects.filter(uav=self.uav).count(), 2)
+
+    def test_rent_uav_ignores_deleted_booking(self):
+        rented_uav = UAVService.rent_uav(
+            self.uav, self.user, self.today, self.today + timedelta(days=3)
+        )
+        RentedUAVService().delete_object(rented_uav)
+        UAVService.rent_uav(
+            self.uav, self.user, self.today, self.today + timedelta(days=3)
+        )
+        self.assertEqual(RentedUAV.objects.filter(uav=self.uav).count(), 2)
+
+    def test_future_booking_keeps_uav_rental(self):
+        UAVService.rent_uav(
+            self.uav,
+            self.user,
+            self.today + timedelta(days=30),
+            self.today + timedelta(days=31),
+        )
+        self.uav.refresh_from_db()
+        self.assertTrue(self.uav.is_rental)
+
+    def test_current_booking_clears_is_rental(self):
+        UAVService.rent_uav(
+            self.uav, self.user, self.today, self.today + timedelta(days=1)
+        )
+        self.uav.refresh_from_db()
+        self.assertFalse(self.uav.is_rental)
+
+    def test_database_rejects_overlapping_booking(self):
+        RentedUAV.objects.create(
+            uav=self.uav,
+            user=self.user,
+            start_date=self.today,
+            end_date=self.today + timedelta(days=3),
+        )
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                RentedUAV.objects.create(
+                    uav=self.uav,
+                    user=self.user,
+                    start_date=self.today + timedelta(days=1),
+                    end_date=self.today + timedelta(days=2),
+                )
+
+
+class ReleaseExpiredRentalsTestCase(TestCase):
+    def setUp(self):
+        self.service = UAVService()
+        self.user = User.objects.create_user(email="testuser@gmail.com", password="testpass")
+        self.today = date(2024, 1, 10)
+
+    def make_uav(self, *bookings, **fields):
+        uav = UAV.objects.create(brand="Brand", model="Model", weight=1, **fields)
+        for start_date, end_date, is_active in bookings:
+            RentedUAV.objects.create(
+                uav=uav,
+                user=self.user,
+                start_date=start_date,
+                end_date=end_date,
+                is_active=is_active,
+            )
+        return uav
+
+    def test_release_expired_rentals(self):
+        ended = self.make_uav((date(2024, 1, 1), date(2024, 1, 9), True), is_rental=False)
+        ended_with_future_booking = self.make_uav(
+            (date(2024, 1, 1), date(2024, 1, 2), True),
+            (date(2024, 2, 1), date(2024, 2, 2), True),
+            is_rental=False,
+        )
+        cancelled = self.make_uav((date(2024, 1, 9), date(2024, 1, 12), False), is_rental=False)
+        rented = self.make_uav((date(2024, 1, 9), date(2024, 1, 10), True), is_rental=False)
+        never_booked = self.make_uav(is_rental=False)
+        booked_later = self.make_uav((date(2024, 2, 1), date(2024, 2, 2), True), is_rental=False)
+        deleted = self.make_uav(
+            (date(2024, 1, 1), date(2024, 1, 2), True), is_rental=False, is_active=False
+        )
+
+        self.assertEqual(self.service.release_expired_rentals(self.today, chunk_size=1), 3)
+        self.assertEqual(
+            set(UAV.objects.filter(is_rental=True).values_list("pk", flat=True)),
+            {ended.pk, ended_with_future_booking.pk, cancelled.pk},
+        )
+        for uav in (rented, never_booked, booked_later, deleted):
+            uav.refresh_from_db()
+            self.assertFalse(uav.is_rental)
+        self.assertEqual(self.service.release_expired_rentals(self.today), 0)
+
+    def test_hold_started_rentals(self):
+        started = self.make_uav((date(2024, 1, 10), date(2024, 1, 12), True))
+        ending = self.make_uav((date(2024, 1, 5), date(2024, 1, 10), True))
+        upcoming = self.make_uav((date(2024, 1, 11), date(2024, 1, 12), True))
+        cancelled = self.make_uav((date(2024, 1, 9), date(2024, 1, 12), False))
+        ended = self.make_uav((date(2024, 1, 1), date(2024, 1, 9), True))
+
+        self.assertEqual(self.service.hold_started_rentals(self.today, chunk_size=1), 2)
+        self.assertEqual(
+            set(UAV.objects.filter(is_rental=False).values_list("pk", flat=True)),
+            {started.pk, ending.pk},
+        )
+        self.assertEqual(self.service.hold_started_rentals(self.today), 0)
+        self.assertEqual(self.service.release_expired_rentals(self.today), 0)
+        self.assertEqual(
+            self.service.release_expired_rentals(self.today + timedelta(days=3)), 2
+        )
+        for uav in (upcoming, cancelled, ended):
+            uav.refresh_from_db()
+            self.assertTrue(uav.is_rental)
+
+    def test_release_expired_rentals_query_count_per_chunk(self):
+        for _ in range(4):
+            self.make_uav((date(2024, 1, 1), date(2024, 1, 2), True), is_rental=False)
+        # Per chunk the savepoint, the candidates, the update and the
+        # release of the savepoint, then the empty last chunk and the cache
+        # version bump.
+        with self.assertNumQueries(2 * 4 + 3):
+            self.assertEqual(self.service.release_expired_rentals(self.today, chunk_size=2), 4)
+
+
+class UAVImportTestCase(TestCase):
+    def setUp(self):
+        self.service = UAVService()
+        self.categories = [
+            UAVCategory.objects.create(name="Category %d" % i) for i in range(3)
+        ]
+
+    def rows(self, count):
+        return [
+            {
+                "brand": "Brand %d" % i,
+                "model": "Model %d" % i,
+                "weight": i,
+                "category": ["Category %d" % (i % 3), "Category 0"],
+            }
+            for i in range(count)
+        ]
+
+    def test_import_objects(self):
+        result = self.service.import_objects(self.rows(10), chunk_size=4)
+        self.assertEqual(result["created"], 10)
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(UAV.objects.count(), 10)
+        self.assertEqual(
+            set(UAV.objects.get(brand="Brand 1").category.values_list("name", flat=True)),
+            {"Category 0", "Category 1"},
+        )
+
+    def test_import_objects_reports_invalid_rows(self):
+        rows = self.rows(2) + [
+            {"brand": "", "model": "Model", "weight": 1, "category": "Category 0"},
+            {"brand": "Brand", "model": "Model", "weight": "x", "category": "Category 0"},
+            {"brand": "Brand", "model": "Model", "weight": 1, "category": "Unknown"},
+        ]
+        result = self.service.import_objects(rows)
+        self.assertEqual(result["created"], 2)
+        self.assertEqual([error["line"] for error in result["errors"]], [3, 4, 5])
+
+    def test_import_objects_stops_at_unreadable_line(self):
+        lines = [json.dumps(row) for row in self.rows(5)]
+        lines.insert(3, "{not json")
+        result = self.service.import_objects(
+            read_ndjson(io.StringIO("\n".join(lines))), chunk_size=2, numbered=True
+        )
+        self.assertEqual(result["created"], 3)
+        self.assertEqual(result["read_error"]["line"], 4)
+        self.assertEqual(UAV.objects.count(), 3)
+
+    def test_import_objects_rejects_empty_chunks(self):
+        with self.assertRaises(ValueError):
+            self.service.import_objects(self.rows(1), chunk_size=0)
+
+    def test_import_objects_query_count_per_chunk(self):
+        # One category lookup, the UAV insert, the through insert and the
+        # savepoint of the chunk transaction.
+        with self.assertNumQueries(5):
+            self.service.import_objects(self.rows(100), chunk_size=100)
+
+
+class TimeOrderedIdTestCase(TestCase):
+    def test_new_rows_get_time_ordered_ids(self):
+        category = UAVCategory.objects.create(name="Category")
+        user = User.objects.create_user(email="testuser@gmail.com", password="testpass")
+        self.assertEqual(category.pk.version, 7)
+        self.assertEqual(user.pk.version, 7)
+
+    def test_uuid7_is_ordered_by_time(self):
+        self.assertLess(uuid7(1000, random_bits=2**74 - 1), uuid7(1001, random_bits=0))
+        uid = uuid7(1000, random_bits=0)
+        self.assertEqual(uid.int >> 80, 1000)
+        self.assertEqual(uid.variant, uuid.RFC_4122)
+
+
+class UtilizationRollupTestCase(TestCase):
+    def setUp(self):
+        self.service = RentedUAVService()
+        self.user = User.objects.create_user(email="testuser@gmail.com", password="testpass")
+        self.categories = [UAVCategory.objects.create(name="Category %d" % i) for i in range(2)]
+        self.uavs = []
+        for i in range(3):
+            uav = UAV.objects.create(brand="Brand %d" % (i % 2), model="Model", weight=1)
+            uav.category.set(self.categories[: i % 2 + 1])
+            self.uavs.append(uav)
+        self.today = timezone.localdate()
+
+    def get_rollups(self):
+        return set(
+            UtilizationRollup.objects.filter(booked__gt=0).values_list(
+                "scope", "key", "day", "booked"
+            )
+        )
+
+    def assertRollupsMatchRebuild(self):
+        incremental = self.get_rollups()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.get_rollups())
+
+    def test_create_update_delete_maintain_rollups(self):
+        booking = self.service.create_object(
+            uav=self.uavs[0],
+            user=self.user,
+            start_date=self.today,
+            end_date=self.today + timedelta(days=2),
+        )
+        self.service.create_objects(
+            [
+                RentedUAV(uav=uav, user=self.user, start_date=self.today, end_date=self.today)
+                for uav in self.uavs[1:]
+            ]
+        )
+        self.assertEqual(
+            UtilizationRollup.objects.get(scope="fleet", key="", day=self.today).booked, 3
+        )
+        self.assertEqual(
+            UtilizationRollup.objects.get(scope="brand", key="Brand 0", day=self.today).booked, 2
+        )
+        self.assertRollupsMatchRebuild()
+
+        self.service.update_object(
+            booking, uav=self.uavs[1], start_date=self.today + timedelta(days=1)
+        )
+        self.assertEqual(
+            UtilizationRollup.objects.get(
+                scope="uav", key=str(self.uavs[0].pk), day=self.today + timedelta(days=1)
+            ).booked,
+            0,
+        )
+        self.assertRollupsMatchRebuild()
+
+        self.service.delete_object(booking)
+        self.service.delete_object(booking)
+        self.assertEqual(
+            UtilizationRollup.objects.get(
+                scope="fleet", key="", day=self.today + timedelta(days=1)
+            ).booked,
+            0,
+        )
+        self.assertRollupsMatchRebuild()
+
+    def test_stale_instances_move_the_stored_period(self):
+        booking = self.service.create_object(
+            uav=self.uavs[0], user=self.user, start_date=self.today, end_date=self.today
+        )
+        stale = RentedUAV.objects.get(pk=booking.pk)
+        self.service.update_object(booking, end_date=self.today + timedelta(days=2))
+        updated = self.service.update_object(stale, start_date=self.today + timedelta(days=1))
+        self.assertEqual(updated.end_date, self.today + timedelta(days=2))
+        self.assertRollupsMatchRebuild()
+
+        stale = RentedUAV.objects.get(pk=booking.pk)
+        self.service.delete_object(booking)
+        self.service.delete_object(stale)
+        self.assertFalse(stale.is_active)
+        self.assertEqual(self.get_rollups(), set())
+
+    def test_brand_and_category_changes_move_the_rollups(self):
+        booking = self.service.create_object(
+            uav=self.uavs[0], user=self.user, start_date=self.today, end_date=self.today
+        )
+        UAVService().update_object(self.uavs[0], brand="Brand 2", category=[self.categories[1]])
+        self.assertRollupsMatchRebuild()
+        UAVCategoryService().destroy_object(self.categories[1])
+        self.assertRollupsMatchRebuild()
+        self.service.delete_object(booking)
+        self.assertEqual(UtilizationRollup.objects.exclude(booked=0).count(), 0)
+
+    def test_destroyed_uavs_leave_the_rollups(self):
+        for uav in self.uavs[:2]:
+            self.service.create_object(
+                uav=uav, user=self.user, start_date=self.today, end_date=self.today
+            )
+        UAVService().destroy_object(self.uavs[0])
+        self.assertEqual(
+            UtilizationRollup.objects.get(scope="fleet", key="", day=self.today).booked, 1
+        )
+        self.assertEqual(UtilizationRollup.objects.filter(booked__lt=0).count(), 0)
+        self.assertRollupsMatchRebuild()
+
+    def test_rent_uav_updates_rollups(self):
+        UAVService.rent_uav(self.uavs[2], self.user, self.today, self.today)
+        UAVService.rent_uavs(
+            self.user,
+            [{"uav_id": self.uavs[0].pk, "start_date": self.today, "end_date": self.today}],
+        )
+        rollups = UtilizationRollup.objects.filter(scope="category", day=self.today)
+        self.assertEqual(dict(rollups.values_list("key", "booked")), {str(self.categories[0].pk): 2})
+        self.assertRollupsMatchRebuild()
+
+    def test_apply_bookings_query_count_is_constant(self):
+        instances = [
+            RentedUAV(
+                uav=uav,
+                user=self.user,
+                start_date=self.today,
+                end_date=self.today + timedelta(days=30),
+            )
+            for uav in self.uavs
+        ]
+        # The savepoint, the insert, the UAV brands and categories and the
+        # upsert of the rollups.
+        with self.assertNumQueries(6):
+            self.service.create_objects(instances)
+        self.assertRollupsMatchRebuild()
+
+    def test_bookings_ending_on_the_last_day(self):
+        self.service.create_object(
+            uav=self.uavs[0],
+            user=self.user,
+            start_date=date.max - timedelta(days=1),
+            end_date=date.max,
+        )
+        self.assertEqual(
+            UtilizationRollup.objects.get(scope="fleet", key="", day=date.max).booked, 1
+        )
+        self.assertRollupsMatchRebuild()
+
+    def test_get_utilization(self):
+        for uav in self.uavs[:2]:
+            self.service.create_object(
+                uav=uav,
+                user=self.user,
+                start_date=self.today,
+                end_date=self.today + timedelta(days=1),
+            )
+        self.uavs[2].is_active = False
+        self.uavs[2].save()
+
+        fleet = get_utilization("fleet", self.today, self.today + timedelta(days=3))
+        self.assertEqual(len(fleet), 1)
+        self.assertEqual(fleet[0]["uavs"], 2)
+        self.assertEqual(fleet[0]["booked_days"], 4)
+        self.assertEqual(fleet[0]["utilization"], 0.5)
+        self.assertEqual(
+            fleet[0]["daily"],
+            [
+                {"day": self.today, "booked": 2},
+                {"day": self.today + timedelta(days=1), "booked": 2},
+            ],
+        )
+
+        brands = get_utilization("brand", self.today, self.today)
+        self.assertEqual(
+            [(row["key"], row["uavs"], row["booked_days"]) for row in brands],
+            [("Brand 0", 1, 1), ("Brand 1", 1, 1)],
+        )
+        uavs = get_utilization("uav", self.today, self.today, keys=[str(self.uavs[2].pk)])
+        self.assertEqual(uavs[0]["booked_days"], 0)
+        self.assertEqual(uavs[0]["daily"], [])
+
+
+class AvailabilityTestCase(TestCase):
+    def test_sweep_periods(self):
+        windows = sweep_periods(
+            [
+                (date(2023, 12, 20), date(2024, 1, 2)),
+                (date(2024, 1, 3), date(2024, 1, 4)),
+                (date(2024, 1, 8), date(2024, 1, 8)),
+                (date(2024, 1, 30), date(2024, 2, 10)),
+            ],
+            date(2024, 1, 1),
+            date(2024, 1, 31),
+        )
+        self.assertEqual(
+            [(window["status"], window["start_date"], window["end_date"]) for window in windows],
+            [
+                ("busy", date(2024, 1, 1), date(2024, 1, 4)),
+                ("free", date(2024, 1, 5), date(2024, 1, 7)),
+                ("busy", date(2024, 1, 8), date(2024, 1, 8)),
+                ("free", date(2024, 1, 9), date(2024, 1, 29)),
+                ("busy", date(2024, 1, 30), date(2024, 1, 31)),
+            ],
+        )
+
+    def test_sweep_periods_without_bookings(self):
+        self.assertEqual(
+            sweep_periods([], date(2024, 1, 1), date(2024, 1, 1)),
+            [{"status": "free", "start_date": date(2024, 1, 1), "end_date": date(2024, 1, 1)}],
+        )
+
+    def test_sweep_periods_up_to_the_last_day(self):
+        windows = sweep_periods(
+            [(date.max - timedelta(days=5), date.max - timedelta(days=4)), (date.max, date.max)],
+            date.max - timedelta(days=5),
+            date.max,
+        )
+        self.assertEqual(
+            [(window["status"], window["start_date"], window["end_date"]) for window in windows],
+            [
+                ("busy", date.max - timedelta(days=5), date.max - timedelta(days=4)),
+                ("free", date.max - timedelta(days=3), date.max - timedelta(days=1)),
+                ("busy", date.max, date.max),
+            ],
+        )
+
+    def test_get_availability_runs_one_query(self):
+        user = User.objects.create_user(email="testuser@gmail.com", password="testpass")
+        uavs = [UAV.objects.create(brand="Brand", model="Model", weight=1) for _ in range(3)]
+        for uav in uavs[:2]:
+            RentedUAV.objects.create(
+                uav=uav, user=user, start_date=date(2024, 1, 2), end_date=date(2024, 1, 3)
+            )
+        RentedUAV.objects.create(
+            uav=uavs[0],
+            user=user,
+            start_date=date(2024, 1, 5),
+            end_date=date(2024, 1, 5),
+            is_active=False,
+        )
+        with self.assertNumQueries(1):
+            calendars = RentedUAVService().get_availability(
+                [uav.pk for uav in uavs], date(2024, 1, 1), date(2024, 1, 10)
+            )
+        self.assertEqual(list(calendars), [uav.pk for uav in uavs])
+        self.assertEqual(
+            [window["status"] for window in calendars[uavs[0].pk]], ["free", "busy", "free"]
+        )
+        self.assertEqual(calendars[uavs[0].pk], calendars[uavs[1].pk])
+        self.assertEqual([window["status"] for window in calendars[uavs[2].pk]], ["free"])
@@ -1,7 +1,22 @@
-from rest_framework import status
+import base64
+import codecs
+import json
+import uuid
+from contextlib import ExitStack
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 from users.models import User
-from ..models import UAV, UAVCategory, RentedUAV
+from utils.cache import response_cache
+from utils.projections import get_field_plan
+from ..models import UAV, UAVCategory, RentedUAV, UtilizationRollup
+from ..serializers import RentedUAVSerializer, RentUAVSerializer, UAVSerializer
+from ..views import RentedUAVViewSet, UAVCategoryViewSet, UAVViewSet
 from model_mommy import mommy
 from datetime import datetime, timedelta
 
@@ -11,6 +26,7 @@ class UAVCategoryViewSetTestCase(APITestCase):
     BASE_URL_DETAILED = "/api/v1/uav-categories/{}/"
 
     def setUp(self):
+        response_cache.cache.clear()
         user = User.objects.create_superuser(
             email='testuser@gmail.com',
             password='testpass'
@@ -59,8 +75,11 @@ class UAVViewSetTestCase(APITestCase):
     BASE_URL = "/api/v1/uavs/"
     BASE_URL_DETAILED = "/api/v1/uavs/{}/"
     UAV_RENT_URL = "/api/v1/uavs/rent/"
+    UAV_BULK_URL = "/api/v1/uavs/bulk/"
+    UAV_EXPORT_URL = "/api/v1/uavs/export/"
 
     def setUp(self):
+        response_cache.cache.clear()
         self.user = User.objects.create_superuser(
             email='testuser@gmail.com',
             password='testpass'
@@ -82,6 +101,84 @@ class UAVViewSetTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json().get('count'), 1)
 
+    def test_list_hides_soft_deleted_uavs(self):
+        deleted = mommy.make(UAV, category=[self.uav_category], is_active=False)
+        for url in (self.BASE_URL, self.BASE_URL + "rental/"):
+            response = self.client.get(url)
+            self.assertEqual(
+                [row['id'] for row in response.json()['results']], [str(self.uav.id)]
+            )
+        response = self.client.get(self.BASE_URL_DETAILED.format(deleted.id))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_uav_with_soft_deleted_category(self):
+        category = mommy.make(UAVCategory, is_active=False)
+        payload = dict(self.valid_payload, category=category.id)
+        response = self.client.post(self.BASE_URL, data=payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', response.json())
+
+    def test_list_query_count_is_constant(self):
+        for url in (self.BASE_URL, self.BASE_URL + "rental/"):
+            with CaptureQueriesContext(connection) as one_uav:
+                self.client.get(url)
+            mommy.make(UAV, category=[self.uav_category, mommy.make(UAVCategory)], _quantity=9)
+            # Written around the services, which invalidate the cached lists.
+            response_cache.cache.clear()
+            with CaptureQueriesContext(connection) as ten_uavs:
+                response = self.client.get(url)
+            self.assertEqual(len(response.json()["results"]), 10)
+            # The ETag aggregate, COUNT, the page and the category prefetch.
+            self.assertEqual(len(one_uav), 4)
+            self.assertEqual(len(ten_uavs), 4)
+            UAV.objects.exclude(pk=self.uav.pk).delete()
+
+    def test_search(self):
+        category = mommy.make(UAVCategory, name='Agriculture')
+        sprayer = mommy.make(UAV, category=[category], brand='DJI', model='Agras T40')
+        mommy.make(UAV, category=[self.uav_category], brand='Parrot', model='Anafi')
+        for search, expected in [
+            ('dji', [sprayer]),
+            ('agri', [sprayer]),
+            ('DJI t40', [sprayer]),
+            ('anafi dji', []),
+        ]:
+            response = self.client.get(self.BASE_URL, {'search': search})
+            self.assertEqual(
+                [row['id'] for row in response.json()['results']],
+                [str(uav.id) for uav in expected],
+            )
+
+    def test_search_ranks_word_prefix_first(self):
+        prefix = mommy.make(UAV, category=[self.uav_category], brand='Mavic', model='3')
+        infix = mommy.make(UAV, category=[self.uav_category], brand='Ultramavic', model='3')
+        response = self.client.get(self.BASE_URL, {'search': 'mavic'})
+        self.assertEqual(
+            [row['id'] for row in response.json()['results']],
+            [str(prefix.id), str(infix.id)],
+        )
+
+    def test_search_document_follows_categories(self):
+        category = mommy.make(UAVCategory, name='Mapping')
+        self.uav.category.add(category)
+        self.assertIn('mapping', UAV.objects.get(pk=self.uav.pk).search_document)
+        category.name = 'Survey'
+        category.save()
+        self.assertIn('survey', UAV.objects.get(pk=self.uav.pk).search_document)
+        category.uavs.clear()
+        self.assertNotIn('survey', UAV.objects.get(pk=self.uav.pk).search_document)
+
+    def test_search_document_is_rebuilt_only_when_needed(self):
+        uav = UAV.objects.create(brand='Mavic', model='3', weight=1.0)
+        self.assertEqual(uav.search_document, 'mavic 3')
+        uav.brand = 'Matrice'
+        uav.save(update_fields=['brand'])
+        self.assertEqual(UAV.objects.get(pk=uav.pk).search_document, 'matrice 3')
+        with CaptureQueriesContext(connection) as queries:
+            uav.is_rental = False
+            uav.save(update_fields=['is_rental', 'updated_at'])
+        self.assertEqual(len(queries), 1)
+
     def test_create_valid_uav(self):
         response = self.client.post(self.BASE_URL, data=self.valid_payload)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -109,6 +206,98 @@ class UAVViewSetTestCase(APITestCase):
 
     # action endpoints tests
 
+    def test_bulk_import(self):
+        data = [
+            {"brand": "UAV 2", "model": "Model 2", "weight": 1.0, "category": self.uav_category.name},
+            {"brand": "UAV 3", "model": "Model 3", "weight": 2.0, "category": [self.uav_category.name]},
+        ]
+        response = self.client.post(self.UAV_BULK_URL, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(self.uav_category.uavs.count(), 3)
+
+    def test_bulk_import_csv_file(self):
+        file = SimpleUploadedFile(
+            "uavs.csv",
+            "brand,model,weight,category\nUAV 2,Model 2,1.0,{}\n".format(
+                self.uav_category.name
+            ).encode(),
+        )
+        response = self.client.post(self.UAV_BULK_URL, data={"file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(UAV.objects.count(), 2)
+
+    def test_bulk_import_excel_csv_file(self):
+        # Excel starts its UTF-8 exports with a byte order mark.
+        file = SimpleUploadedFile(
+            "uavs.csv",
+            codecs.BOM_UTF8
+            + "brand,model,weight,category\r\nUAV 2,Model 2,1.0,{}\r\n".format(
+                self.uav_category.name
+            ).encode(),
+        )
+        response = self.client.post(self.UAV_BULK_URL, data={"file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data["created"], 1)
+        self.assertTrue(UAV.objects.filter(brand="UAV 2").exists())
+
+    def test_bulk_import_reports_file_lines(self):
+        file = SimpleUploadedFile(
+            "uavs.csv",
+            "brand,model,weight,category\nUAV 2,Model 2,1.0,{}\nUAV 3,Model 3,x,{}\n".format(
+                self.uav_category.name, self.uav_category.name
+            ).encode(),
+        )
+        response = self.client.post(self.UAV_BULK_URL, data={"file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["errors"], [{"line": 3, "error": "weight must be a number"}])
+
+    def test_bulk_import_unreadable_file(self):
+        row = '{"brand": "UAV", "model": "Model", "weight": 1, "category": "%s"}\n' % (
+            self.uav_category.name
+        )
+        for content, line in (
+            (row * 2 + "{not json\n" + row, 3),
+            (row.encode() + b"\xff\xfe\n", 2),
+        ):
+            if isinstance(content, str):
+                content = content.encode()
+            file = SimpleUploadedFile("uavs.ndjson", content)
+            response = self.client.post(
+                self.UAV_BULK_URL, data={"file": file}, format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+            self.assertEqual(response.data["read_error"]["line"], line)
+        self.assertEqual(UAV.objects.count(), 4)
+
+    def test_bulk_import_unsupported_file(self):
+        file = SimpleUploadedFile("uavs.xml", b"<uavs />")
+        response = self.client.post(self.UAV_BULK_URL, data={"file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_csv(self):
+        response = self.client.get(self.UAV_EXPORT_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,brand,model,category,is_rental,weight")
+        self.assertEqual(len(lines), 2)
+        self.assertIn(str(self.uav_category.id), lines[1])
+
+    def test_export_ndjson_applies_search(self):
+        mommy.make(UAV, category=[self.uav_category], brand='Other')
+        response = self.client.get(self.UAV_EXPORT_URL, {"export_format": "ndjson", "search": "UAV 1"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(self.uav.id))
+        self.assertEqual(rows[0]["category"], [str(self.uav_category.id)])
+
+    def test_export_invalid_format(self):
+        response = self.client.get(self.UAV_EXPORT_URL, {"export_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_rent_invalid_date(self):
         data = {
             "uav_id": self.uav.id,
@@ -122,6 +311,19 @@ class UAVViewSetTestCase(APITestCase):
             ['The end date cannot be before the current date'],
         )
 
+    def test_rent_too_long(self):
+        data = {
+            "uav_id": self.uav.id,
+            "start_date": datetime.now().strftime("%Y-%m-%d"),
+            "end_date": "9999-12-31",
+        }
+        response = self.client.post(self.UAV_RENT_URL, data=data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["non_field_errors"],
+            ["The period cannot be longer than 366 days"],
+        )
+
     def test_rent_invalid_uav(self):
         data = {
             "uav_id": "invalid_id",
@@ -137,8 +339,8 @@ class UAVViewSetTestCase(APITestCase):
     def test_rent(self):
         data = {
             "uav_id": self.uav.id,
-            "start_date": datetime.now().strftime("%Y-%m-%d"),
-            "end_date": (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
+            "start_date": (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d"),
+            "end_date": (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d"),
         }
         response = self.client.post(self.UAV_RENT_URL, data=data)
 
@@ -151,7 +353,682 @@ class UAVViewSetTestCase(APITestCase):
             response.data["end_date"], data["end_date"]
         )
 
-        
+    def test_rent_overlapping_dates(self):
+        data = {
+            "uav_id": self.uav.id,
+            "start_date": (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
+            "end_date": (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d"),
+        }
+        response = self.client.post(self.UAV_RENT_URL, data=data)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(RentedUAV.objects.filter(uav=self.uav).count(), 1)
+
+
+
+class UAVFilterTestCase(APITestCase):
+    BASE_URL = "/api/v1/uavs/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        self.user = User.objects.create_superuser(email="testuser@gmail.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.categories = mommy.make(UAVCategory, _quantity=3)
+        self.uavs = [
+            mommy.make(
+                UAV,
+                brand=brand,
+                model=model,
+                weight=weight,
+                category=[self.categories[i % 3], self.categories[(i + 1) % 3]],
+            )
+            for i, (brand, model, weight) in enumerate(
+                [
+                    ("DJI", "Mavic 3", 0.9),
+                    ("DJI", "Agras T40", 50.0),
+                    ("Autel", "Evo II", 1.2),
+                    ("Parrot", "Anafi", 0.3),
+                ]
+            )
+        ]
+
+    def get_brands_and_models(self, **params):
+        response = self.client.get(self.BASE_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return sorted((row["brand"], row["model"]) for row in response.json()["results"])
+
+    def test_detail_routes_ignore_the_filters(self):
+        response = self.client.get(
+            "%s%s/" % (self.BASE_URL, self.uavs[0].pk), {"weight_min": "invalid", "brand": "Parrot"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_prefix_filters(self):
+        self.assertEqual(
+            self.get_brands_and_models(brand="DJ"), [("DJI", "Agras T40"), ("DJI", "Mavic 3")]
+        )
+        self.assertEqual(self.get_brands_and_models(model="Ev"), [("Autel", "Evo II")])
+
+    def test_range_filters(self):
+        self.assertEqual(
+            self.get_brands_and_models(weight_min=0.9, weight_max=1.2),
+            [("Autel", "Evo II"), ("DJI", "Mavic 3")],
+        )
+        UAV.objects.filter(pk=self.uavs[3].pk).update(
+            created_at=timezone.now() - timedelta(days=10)
+        )
+        after = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual(len(self.get_brands_and_models(created_at_after=after)), 3)
+        self.assertEqual(
+            self.get_brands_and_models(created_at_before=after), [("Parrot", "Anafi")]
+        )
+        self.assertEqual(len(self.get_brands_and_models(updated_at_after=after)), 4)
+
+    def test_category_filter(self):
+        # Every UAV is in two categories, none is listed twice.
+        response = self.client.get(
+            self.BASE_URL,
+            {"category": "%s,%s" % (self.categories[0].id, self.categories[1].id)},
+        )
+        self.assertEqual(response.json()["count"], 4)
+        self.assertEqual(
+            self.get_brands_and_models(category=self.categories[2].id),
+            [("Autel", "Evo II"), ("DJI", "Agras T40")],
+        )
+
+    def test_category_filter_rejects_unknown_categories(self):
+        deleted = mommy.make(UAVCategory, is_active=False)
+        for category in (uuid.uuid4(), deleted.id, "invalid"):
+            response = self.client.get(self.BASE_URL, {"category": category})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, category)
+
+    def test_combined_filters_query_count(self):
+        params = {
+            "brand": "DJ",
+            "weight_max": 10,
+            "created_at_after": (timezone.now() - timedelta(days=1)).isoformat(),
+            "category": ",".join(str(category.id) for category in self.categories),
+        }
+        # The category validation and the ETag aggregate, the category
+        # validation again, COUNT, the page and its categories.
+        with self.assertNumQueries(6):
+            response = self.client.get(self.BASE_URL, params)
+        self.assertEqual(
+            [row["id"] for row in response.json()["results"]], [str(self.uavs[0].id)]
+        )
+
+
+class AvailableUAVTestCase(APITestCase):
+    BASE_URL = "/api/v1/uavs/available/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@gmail.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.category = mommy.make(UAVCategory)
+        self.light_uav = mommy.make(UAV, weight=1.0, category=[self.category])
+        self.heavy_uav = mommy.make(UAV, weight=10.0, category=[self.category])
+        self.booked_uav = mommy.make(UAV, weight=1.0, category=[self.category])
+        self.other_uav = mommy.make(UAV, weight=1.0, is_rental=False)
+        mommy.make(UAV, is_active=False)
+        RentedUAV.objects.create(
+            uav=self.booked_uav, user=self.user, start_date="2024-01-03", end_date="2024-01-05"
+        )
+        RentedUAV.objects.create(
+            uav=self.other_uav,
+            user=self.user,
+            start_date="2024-01-01",
+            end_date="2024-01-10",
+            is_active=False,
+        )
+
+    def get_ids(self, **params):
+        response = self.client.get(self.BASE_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return {row["id"] for row in response.json()["results"]}
+
+    def test_available_uavs(self):
+        self.assertEqual(
+            self.get_ids(start="2024-01-01", end="2024-01-03"),
+            {str(self.light_uav.id), str(self.heavy_uav.id), str(self.other_uav.id)},
+        )
+        self.assertEqual(len(self.get_ids(start="2024-01-06", end="2024-01-10")), 4)
+
+    def test_available_uavs_filters(self):
+        self.assertEqual(
+            self.get_ids(start="2024-01-01", end="2024-01-03", category=self.category.id),
+            {str(self.light_uav.id), str(self.heavy_uav.id)},
+        )
+        self.assertEqual(
+            self.get_ids(
+                start="2024-01-01", end="2024-01-03", category=self.category.id, weight_max=5
+            ),
+            {str(self.light_uav.id)},
+        )
+
+    def test_available_uavs_keyset_pagination(self):
+        mommy.make(UAV, _quantity=12)
+        response = self.client.get(self.BASE_URL, {"start": "2024-01-01", "end": "2024-01-03"})
+        self.assertNotIn("count", response.data)
+        ids = [row["id"] for row in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            ids.extend(row["id"] for row in response.data["results"])
+        self.assertEqual(len(ids), 15)
+        self.assertEqual(len(set(ids)), 15)
+
+    def test_available_uavs_query_count(self):
+        # The page, with the anti-join, and the categories of the page.
+        with self.assertNumQueries(2):
+            self.client.get(self.BASE_URL, {"start": "2024-01-01", "end": "2024-01-03"})
+
+    def test_available_uavs_invalid_queries(self):
+        for params in (
+            {"start": "2024-01-01"},
+            {"start": "2024-01-03", "end": "2024-01-01"},
+            {"start": "2024-01-01", "end": "2024-01-03", "weight_max": -1},
+            {"start": "2024-01-01", "end": "2024-01-03", "category": "invalid"},
+        ):
+            response = self.client.get(self.BASE_URL, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class UAVAvailabilityTestCase(APITestCase):
+    BASE_URL = "/api/v1/uavs/availability/"
+    BASE_URL_DETAILED = "/api/v1/uavs/{}/availability/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="testuser@gmail.com", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.uav = mommy.make(UAV, is_rental=False)
+        self.other_uav = mommy.make(UAV)
+        for start_date, end_date in (("2024-01-02", "2024-01-03"), ("2024-01-04", "2024-01-05")):
+            RentedUAV.objects.create(
+                uav=self.uav, user=self.user, start_date=start_date, end_date=end_date
+            )
+
+    def test_availability(self):
+        url = self.BASE_URL_DETAILED.format(self.uav.id)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"from": "2024-01-01", "to": "2024-01-10"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "uav_id": str(self.uav.id),
+                "from": "2024-01-01",
+                "to": "2024-01-10",
+                "windows": [
+                    {"status": "free", "start_date": "2024-01-01", "end_date": "2024-01-01"},
+                    {"status": "busy", "start_date": "2024-01-02", "end_date": "2024-01-05"},
+                    {"status": "free", "start_date": "2024-01-06", "end_date": "2024-01-10"},
+                ],
+            },
+        )
+
+    def test_availability_defaults_to_the_next_90_days(self):
+        response = self.client.get(self.BASE_URL_DETAILED.format(self.other_uav.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today = timezone.localdate()
+        self.assertEqual(response.data["from"], today)
+        self.assertEqual(response.data["to"], today + timedelta(days=89))
+        self.assertEqual(len(response.data["windows"]), 1)
+
+    def test_availability_at_the_last_day(self):
+        RentedUAV.objects.create(
+            uav=self.other_uav, user=self.user, start_date="9999-12-30", end_date="9999-12-31"
+        )
+        url = self.BASE_URL_DETAILED.format(self.other_uav.id)
+        response = self.client.get(url, {"from": "9999-12-31"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["to"], "9999-12-31")
+        self.assertEqual(
+            response.json()["windows"],
+            [{"status": "busy", "start_date": "9999-12-31", "end_date": "9999-12-31"}],
+        )
+
+    def test_availability_of_unknown_uav(self):
+        self.other_uav.is_active = False
+        self.other_uav.save()
+        for uav_id in (uuid.uuid4(), "invalid", self.other_uav.id):
+            response = self.client.get(self.BASE_URL_DETAILED.format(uav_id))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, uav_id)
+
+    def test_availability_rejects_invalid_periods(self):
+        url = self.BASE_URL_DETAILED.format(self.uav.id)
+        for params in (
+            {"from": "2024-01-10", "to": "2024-01-01"},
+            {"from": "2024-01-01", "to": "2025-06-01"},
+            {"from": "invalid"},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_availability_batch(self):
+        unknown_id = str(uuid.uuid4())
+        params = {
+            "from": "2024-01-01",
+            "to": "2024-01-03",
+            "uav_id": [str(self.other_uav.id), unknown_id, str(self.uav.id)],
+        }
+        # The UAVs and their bookings.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.BASE_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [row["uav_id"] for row in results], [str(self.other_uav.id), str(self.uav.id)]
+        )
+        self.assertEqual([window["status"] for window in results[0]["windows"]], ["free"])
+        self.assertEqual(
+            [window["status"] for window in results[1]["windows"]], ["free", "busy"]
+        )
+        self.assertEqual(response.json()["not_found"], [unknown_id])
+
+        response = self.client.get(self.BASE_URL)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.BASE_URL, {"uav_id": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class UAVRentBatchTestCase(APITestCase):
+    UAV_RENT_BATCH_URL = "/api/v1/uavs/rent/batch/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='testuser@gmail.com',
+            password='testpass'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.uavs = mommy.make(UAV, _quantity=3)
+        self.start_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        self.end_date = (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d")
+
+    def item(self, uav_id):
+        return {"uav_id": str(uav_id), "start_date": self.start_date, "end_date": self.end_date}
+
+    def test_rent_batch(self):
+        data = {"items": [self.item(uav.id) for uav in self.uavs]}
+        response = self.client.post(self.UAV_RENT_BATCH_URL, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], ["rented"] * 3
+        )
+        self.assertEqual(RentedUAV.objects.count(), 3)
+
+    def test_rent_batch_reports_conflicts(self):
+        RentedUAV.objects.create(
+            uav=self.uavs[0], user=self.user, start_date=self.start_date, end_date=self.end_date
+        )
+        data = {
+            "items": [
+                self.item(self.uavs[0].id),
+                self.item(self.uavs[1].id),
+                self.item(self.uavs[1].id),
+                self.item(uuid.uuid4()),
+                self.item("invalid_id"),
+            ]
+        }
+        response = self.client.post(self.UAV_RENT_BATCH_URL, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["conflict", "rented", "conflict", "not_found", "invalid"],
+        )
+        self.assertEqual(RentedUAV.objects.count(), 2)
+
+    def test_rent_batch_reports_conflicts_raised_by_the_database(self):
+        # A booking the batch did not see, as when racing a single rent.
+        RentedUAV.objects.create(
+            uav=self.uavs[1], user=self.user, start_date=self.start_date, end_date=self.end_date
+        )
+        data = {"items": [self.item(uav.id) for uav in self.uavs]}
+        with mock.patch(
+            "uavs.managers.RentedUAVQuerySet.overlapping",
+            lambda queryset, start_date, end_date: queryset.none(),
+        ):
+            response = self.client.post(self.UAV_RENT_BATCH_URL, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["rented", "conflict", "rented"])
+        self.assertIsNone(results[1]["id"])
+        self.assertEqual(RentedUAV.objects.count(), 3)
+        self.assertTrue(RentedUAV.objects.filter(pk=results[2]["id"]).exists())
+
+    def test_rent_batch_query_count_is_constant(self):
+        uavs = mommy.make(UAV, _quantity=20)
+        with CaptureQueriesContext(connection) as small_batch:
+            self.client.post(
+                self.UAV_RENT_BATCH_URL,
+                data={"items": [self.item(uav.id) for uav in self.uavs]},
+                format="json",
+            )
+        with CaptureQueriesContext(connection) as large_batch:
+            self.client.post(
+                self.UAV_RENT_BATCH_URL,
+                data={"items": [self.item(uav.id) for uav in uavs]},
+                format="json",
+            )
+        self.assertEqual(RentedUAV.objects.count(), 23)
+        self.assertEqual(len(small_batch), len(large_batch))
+
+
+class UAVResponseCacheTestCase(APITestCase):
+    BASE_URL = "/api/v1/uavs/"
+    CATEGORY_URL = "/api/v1/uav-categories/"
+    CACHE_STATS_URL = "/api/v1/uavs/cache-stats/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        self.user = User.objects.create_superuser(email='testuser@gmail.com', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.uav_category = mommy.make(UAVCategory, name='Mapping')
+        self.uav = mommy.make(UAV, category=[self.uav_category], is_rental=True)
+
+    def test_second_get_is_served_from_cache(self):
+        for url in (self.BASE_URL, self.BASE_URL + "rental/", self.CATEGORY_URL):
+            first = self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.get(url)
+            self.assertEqual(first["X-Cache"], "MISS")
+            self.assertEqual(second["X-Cache"], "HIT")
+            self.assertEqual(second.json(), first.json())
+            self.assertEqual(len(queries), 0)
+
+    def test_query_params_are_cached_separately(self):
+        self.client.get(self.BASE_URL)
+        response = self.client.get(self.BASE_URL + "?search=nothing")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 0)
+
+    def test_writes_invalidate_the_cache(self):
+        self.client.get(self.BASE_URL)
+        payload = {'brand': 'New', 'model': 'M1', 'weight': 1.0, 'category': [self.uav_category.id], 'is_rental': True}
+        response = self.client.post(self.BASE_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(self.BASE_URL)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 2)
+
+        self.client.post(self.BASE_URL + "bulk/", [dict(payload, brand='Bulk', category='Mapping')], format="json")
+        response = self.client.get(self.BASE_URL)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_category_change_invalidates_uav_lists(self):
+        self.client.get(self.BASE_URL)
+        self.client.patch("%s%s/" % (self.CATEGORY_URL, self.uav_category.id), {'name': 'Survey'}, format="json")
+        response = self.client.get(self.BASE_URL)
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_batch_rent_invalidates_the_cache(self):
+        self.client.get(self.BASE_URL + "rental/")
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.client.post(
+            self.BASE_URL + "rent/batch/",
+            {"items": [{"uav_id": self.uav.id, "start_date": today, "end_date": today}]},
+            format="json",
+        )
+        response = self.client.get(self.BASE_URL + "rental/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 0)
+
+    def test_rent_invalidates_the_cache(self):
+        self.client.get(self.BASE_URL + "rental/")
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.client.post(
+            self.BASE_URL + "rent/",
+            {"uav_id": self.uav.id, "start_date": today, "end_date": today},
+            format="json",
+        )
+        response = self.client.get(self.BASE_URL + "rental/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["count"], 0)
+
+    def test_cache_stats(self):
+        self.client.get(self.BASE_URL)
+        self.client.get(self.BASE_URL)
+        response = self.client.get(self.CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(response.data["uavs"]["hits"], 1)
+        self.assertGreaterEqual(response.data["uavs"]["misses"], 1)
+
+
+class ConditionalGetTestCase(APITestCase):
+    BASE_URL = "/api/v1/uavs/"
+    BASE_URL_DETAILED = "/api/v1/uavs/{}/"
+    RENTED_UAV_URL = "/api/v1/rented-uavs/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        self.user = User.objects.create_superuser(email='testuser@gmail.com', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.uav = mommy.make(UAV, category=[mommy.make(UAVCategory)], is_rental=True)
+        self.rented_uav = mommy.make(
+            RentedUAV, uav=self.uav, user=self.user, start_date="2021-01-01", end_date="2021-01-02"
+        )
+
+    def assertNotModified(self, url, max_queries, **headers):
+        with mock.patch.object(UAVSerializer, "to_representation") as uav_to_representation, \
+                mock.patch.object(RentedUAVSerializer, "to_representation") as rented_to_representation:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(uav_to_representation.called)
+        self.assertFalse(rented_to_representation.called)
+        self.assertLessEqual(len(queries), max_queries)
+        return response
+
+    def test_list_if_none_match(self):
+        for url in (self.BASE_URL, self.BASE_URL + "rental/", self.RENTED_UAV_URL):
+            etag = self.client.get(url)["ETag"]
+            # Served from the response cache, or from a single aggregate.
+            self.assertNotModified(url, 0 if url != self.RENTED_UAV_URL else 1, HTTP_IF_NONE_MATCH=etag)
+            response_cache.cache.clear()
+            response = self.assertNotModified(url, 1, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response["ETag"], etag)
+
+    def test_list_etag_changes_with_the_rows(self):
+        etag = self.client.get(self.RENTED_UAV_URL)["ETag"]
+        self.assertNotEqual(self.client.get(self.RENTED_UAV_URL + "?cursor=")["ETag"], etag)
+        self.rented_uav.delete()
+        response = self.client.get(self.RENTED_UAV_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_is_not_validated_by_date(self):
+        response = self.client.get(self.RENTED_UAV_URL)
+        self.assertNotIn("Last-Modified", response)
+        self.rented_uav.delete()
+        response = self.client.get(
+            self.RENTED_UAV_URL, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [])
+
+    def test_detail_if_none_match(self):
+        url = self.BASE_URL_DETAILED.format(self.uav.id)
+        etag = self.client.get(url)["ETag"]
+        self.assertNotModified(url, 1, HTTP_IF_NONE_MATCH=etag)
+
+        self.client.patch(url, {'brand': 'Changed'}, format="json")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["brand"], 'Changed')
+
+    def test_detail_if_modified_since(self):
+        url = "%s%s/" % (self.RENTED_UAV_URL, self.rented_uav.id)
+        last_modified = self.client.get(url)["Last-Modified"]
+        self.assertNotModified(url, 1, HTTP_IF_MODIFIED_SINCE=last_modified)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE="Thu, 01 Jan 2015 00:00:00 GMT")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_malformed_key_is_not_found(self):
+        response = self.client.get(self.BASE_URL_DETAILED.format("not-a-uuid"), HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missing_object_is_not_found(self):
+        response = self.client.get(self.BASE_URL_DETAILED.format(uuid.uuid4()), HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AsyncUAVViewTestCase(APITestCase):
+    BASE_URL = "/api/v1/uavs/"
+    ASYNC_URL = "/api/v1/async/uavs/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        self.user = User.objects.create_superuser(email='testuser@gmail.com', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        category = mommy.make(UAVCategory, name='Mapping')
+        self.uavs = mommy.make(UAV, category=[category], brand='DJI', is_rental=True, _quantity=12)
+        mommy.make(UAV, brand='Parrot', is_rental=True)
+
+    def assertSameResponse(self, sync_url, async_url):
+        sync_response = self.client.get(sync_url)
+        async_response = self.client.get(async_url)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(
+            async_response.content.decode().replace("/async/", "/"),
+            sync_response.content.decode(),
+        )
+        return async_response
+
+    def test_matches_the_sync_endpoints(self):
+        for query in ("", "?page=2", "?search=dji", "?cursor="):
+            self.assertSameResponse(self.BASE_URL + query, self.ASYNC_URL + query)
+            self.assertSameResponse(
+                self.BASE_URL + "rental/" + query, self.ASYNC_URL + "rental/" + query
+            )
+        cursor = self.client.get(self.ASYNC_URL + "?cursor=").json()["next"].split("cursor=")[1]
+        self.assertSameResponse(
+            self.BASE_URL + "?cursor=" + cursor, self.ASYNC_URL + "?cursor=" + cursor
+        )
+        self.assertSameResponse(
+            "%s%s/" % (self.BASE_URL, self.uavs[0].id), "%s%s/" % (self.ASYNC_URL, self.uavs[0].id)
+        )
+
+    def test_filters_match_the_sync_endpoints(self):
+        category = UAVCategory.objects.get(name='Mapping')
+        for query in (
+            "?brand=DJ&weight_min=0",
+            "?brand=Parrot",
+            "?category=%s&search=dji" % category.pk,
+            "?category=%s" % uuid.uuid4(),
+            "?weight_min=invalid",
+        ):
+            for path in ("", "rental/"):
+                response = self.assertSameResponse(
+                    self.BASE_URL + path + query, self.ASYNC_URL + path + query
+                )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.ASYNC_URL + "?brand=Parrot")
+        self.assertEqual([uav["brand"] for uav in response.json()["results"]], ["Parrot"])
+
+    def test_not_found(self):
+        for pk in (uuid.uuid4(), "not-a-uuid"):
+            self.assertSameResponse("%s%s/" % (self.BASE_URL, pk), "%s%s/" % (self.ASYNC_URL, pk))
+        self.assertSameResponse(self.BASE_URL + "?page=9", self.ASYNC_URL + "?page=9")
+
+    def test_permissions(self):
+        self.client.force_authenticate(user=mommy.make(User))
+        response = self.assertSameResponse(self.BASE_URL, self.ASYNC_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.assertSameResponse(self.BASE_URL + "rental/", self.ASYNC_URL + "rental/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.ASYNC_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+    async def test_asgi_request(self):
+        token = await Token.objects.acreate(user=self.user)
+        response = await self.async_client.get(
+            self.ASYNC_URL + "rental/", headers={"Authorization": "Token %s" % token.key}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 13)
+        # The token with its user, COUNT, the page and the category prefetch.
+        self.assertRegex(response["Server-Timing"], r'desc="4 queries"$')
+
+
+class ProjectedListTestCase(APITestCase):
+    BASE_URL = "/api/v1/uavs/"
+
+    def setUp(self):
+        response_cache.cache.clear()
+        user = User.objects.create_superuser(email='testuser@gmail.com', password='testpass')
+        self.client.force_authenticate(user=user)
+        categories = mommy.make(UAVCategory, _quantity=3)
+        mommy.make(UAVCategory, is_active=False)
+        deleted_category = mommy.make(UAVCategory, is_active=False)
+        for index in range(12):
+            mommy.make(
+                UAV,
+                brand='DJI' if index % 2 else 'Parrot',
+                category=categories[: index % 4] + ([deleted_category] if index == 5 else []),
+                is_rental=index != 3,
+            )
+        rented = mommy.make(UAV, category=categories[:1], is_rental=True)
+        today = timezone.localdate()
+        mommy.make(RentedUAV, uav=rented, start_date=today, end_date=today + timedelta(days=2))
+
+    def get(self, url):
+        response_cache.cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, len(queries)
+
+    def projection_disabled(self):
+        stack = ExitStack()
+        for viewset in (UAVCategoryViewSet, UAVViewSet, RentedUAVViewSet):
+            stack.enter_context(mock.patch.object(viewset, "projected_list", False))
+        # The lists must not even plan their serializer.
+        stack.enter_context(
+            mock.patch("utils.mixins.get_field_plan", side_effect=AssertionError("projected"))
+        )
+        return stack
+
+    def test_matches_the_serializer_output(self):
+        today = timezone.localdate()
+        urls = [
+            self.BASE_URL,
+            self.BASE_URL + "?page=2",
+            self.BASE_URL + "?search=dji",
+            self.BASE_URL + "?brand=DJI&weight_min=0",
+            self.BASE_URL + "?cursor=",
+            self.BASE_URL + "rental/",
+            self.BASE_URL + "rental/?cursor=",
+            self.BASE_URL + "available/?start=%s&end=%s" % (today, today + timedelta(days=1)),
+            "/api/v1/uav-categories/",
+            "/api/v1/rented-uavs/",
+        ]
+        cursor = self.client.get(self.BASE_URL + "?cursor=").json()["next"]
+        urls.append(cursor.split("testserver")[1])
+        for url in urls:
+            with self.subTest(url=url):
+                response, queries = self.get(url)
+                with self.projection_disabled():
+                    expected, expected_queries = self.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(queries, expected_queries)
+
+    def test_unplannable_serializers(self):
+        class NestedSerializer(UAVSerializer):
+            category = serializers.StringRelatedField(many=True)
+
+        class MethodSerializer(UAVSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta(UAVSerializer.Meta):
+                fields = UAVSerializer.Meta.fields + ["label"]
+
+        self.assertIsNotNone(get_field_plan(UAVSerializer))
+        self.assertIsNone(get_field_plan(NestedSerializer))
+        self.assertIsNone(get_field_plan(MethodSerializer))
+        self.assertIsNone(get_field_plan(RentUAVSerializer))
+
+
 class RentedUAVViewSetTestCase(APITestCase):
     BASE_URL = "/api/v1/rented-uavs/"
     BASE_URL_DETAILED = "/api/v1/rented-uavs/{}/"
@@ -189,6 +1066,76 @@ class RentedUAVViewSetTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["id"], str(self.rented_uav.id))
 
+    def test_rented_uav_list_hides_soft_deleted_records(self):
+        RentedUAV.objects.create(
+            uav=self.uav,
+            user=self.user,
+            start_date="2021-01-01",
+            end_date="2021-01-02",
+            is_active=False,
+        )
+        response = self.client.get(self.BASE_URL)
+        self.assertEqual(
+            [row["id"] for row in response.json()["results"]], [str(self.rented_uav.id)]
+        )
+
+    def test_rented_uav_list_query_count_is_constant(self):
+        for uav in mommy.make(UAV, _quantity=9):
+            RentedUAV.objects.create(
+                uav=uav, user=self.user, start_date="2021-01-01", end_date="2021-01-02"
+            )
+        # The ETag aggregate, COUNT and the page, the uav and user ids are
+        # read from the rows.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.BASE_URL)
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_rented_uav_export(self):
+        response = self.client.get(self.BASE_URL + "export/", {"export_format": "ndjson"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(self.rented_uav.id))
+        self.assertEqual(rows[0]["uav"], str(self.uav.id))
+
+    def test_rented_uav_keyset_pagination(self):
+        uavs = mommy.make(UAV, _quantity=24)
+        for uav in uavs:
+            RentedUAV.objects.create(
+                uav=uav, user=self.user, start_date="2021-01-01", end_date="2021-01-02"
+            )
+        expected_ids = [
+            str(pk) for pk in RentedUAV.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        ]
+
+        response = self.client.get(self.BASE_URL, {"cursor": ""})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+        ids = [row["id"] for row in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            ids.extend(row["id"] for row in response.data["results"])
+        self.assertEqual(ids, expected_ids)
+
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]], expected_ids[10:20]
+        )
+
+    def test_rented_uav_invalid_cursor(self):
+        for payload in (
+            None,
+            ["2021-01-01T00:00:00+00:00", "garbage", False],
+            ["2021-01-01T00:00:00+00:00", 1, False],
+            ["garbage", str(uuid.uuid4()), False],
+        ):
+            cursor = "invalid" if payload is None else base64.urlsafe_b64encode(
+                json.dumps(payload).encode()
+            ).decode()
+            response = self.client.get(self.BASE_URL, {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_rented_uav_create(self):
         uav_id = mommy.make(UAV, category=[self.uav_category]).id
         data = {
@@ -232,3 +1179,29 @@ class RentedUAVViewSetTestCase(APITestCase):
         url = self.BASE_URL_DETAILED.format(self.rented_uav.id)
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(RentedUAV.objects.get(pk=self.rented_uav.pk).is_active)
+
+    def test_rented_uav_writes_maintain_rollups(self):
+        uav = mommy.make(UAV, category=[self.uav_category])
+        response = self.client.post(
+            self.BASE_URL,
+            data={
+                "uav": str(uav.id),
+                "user": str(self.user.id),
+                "start_date": "2024-01-01",
+                "end_date": "2024-01-02",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        rollups = UtilizationRollup.objects.filter(scope="uav", key=str(uav.id), booked__gt=0)
+        self.assertEqual(rollups.count(), 2)
+
+        url = self.BASE_URL_DETAILED.format(response.data["id"])
+        response = self.client.patch(url, data={"end_date": "2024-01-04"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(rollups.count(), 4)
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(rollups.count(), 0)
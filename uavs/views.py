@@ -1,60 +1,140 @@
-from rest_framework import viewsets, filters, status
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from uavs.exceptions import UAVNotAvailableError
+from uavs.exporters import (
+    RENTED_UAV_EXPORT_FIELDS,
+    UAV_EXPORT_FIELDS,
+    iter_rented_uav_rows,
+    iter_uav_rows,
+)
+from uavs.importers import decode_lines, get_reader
 from uavs.models import UAVCategory, UAV, RentedUAV
 from uavs.serializers import (
+    AvailabilityQuerySerializer,
+    AvailableUAVQuerySerializer,
     UAVCategorySerializer,
     UAVSerializer,
     RentedUAVSerializer,
     RentUAVSerializer,
+    RentUAVBatchSerializer,
+)
+from uavs.services import RentedUAVService, UAVCategoryService, UAVService
+from uavs.signals import UAV_CACHE_RESOURCE, UAV_CATEGORY_CACHE_RESOURCE
+from utils.async_views import AsyncAPIView
+from utils.cache import CachedListMixin, response_cache
+from utils.mixins import (
+    ConditionalGetMixin,
+    ProjectedListMixin,
+    ReplicaReadMixin,
+    SerializerPrefetchMixin,
 )
-from uavs.services import UAVService
+from utils.pagination import KeysetOnlyPagination, KeysetPagination
 from utils.permissions import IsSuperUser
 from uavs.filters import UAVFilter
+from uavs.search import UAVSearchFilter
+from utils.streaming import export_response
 
 
-class UAVCategoryViewSet(viewsets.ModelViewSet):
+class UAVCategoryViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
+    ConditionalGetMixin,
+    SerializerPrefetchMixin,
+    ProjectedListMixin,
+    viewsets.ModelViewSet,
+):
     """
     A viewset for viewing and editing UAV categories.
 
     Allows authenticated superusers to view and edit UAV categories.
+    The list is served from the response cache until a category changes,
+    writes go through UAVCategoryService, which invalidates it.
     """
-    queryset = UAVCategory.objects.all()
+    queryset = UAVCategory.active_objects.all()
     serializer_class = UAVCategorySerializer
     permission_classes = [IsAuthenticated, IsSuperUser]
+    pagination_class = KeysetPagination
+    projected_list = True
+    cache_resource = UAV_CATEGORY_CACHE_RESOURCE
+    service = UAVCategoryService()
+
+    def perform_create(self, serializer):
+        serializer.instance = self.service.create_object(**serializer.validated_data)
+
+    def perform_update(self, serializer):
+        self.service.update_object(serializer.instance, **serializer.validated_data)
+
+    def perform_destroy(self, instance):
+        self.service.destroy_object(instance)
 
 
-class UAVViewSet(viewsets.ModelViewSet):
+class UAVViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
+    ConditionalGetMixin,
+    SerializerPrefetchMixin,
+    ProjectedListMixin,
+    viewsets.ModelViewSet,
+):
     """
     A viewset for handling CRUD operations on UAV objects.
 
     Attributes:
-        queryset: A queryset of all UAV objects.
+        queryset: A queryset of the active UAV objects.
         serializer_class: The serializer class used for serializing and deserializing UAV objects.
         permission_classes: A list of permission classes that the viewset requires.
         filter_backends: A list of filter backend classes that the viewset uses for filtering.
-        search_fields: A list of fields that the viewset uses for searching.
+        pagination_class: Page number pagination, or keyset pagination when a cursor is passed.
+        projected_list: Renders the lists from ``values()`` rows, see ProjectedListMixin.
+        cache_resource: The response cache version key of the list endpoints.
+        replica_actions: The actions reading from the read replicas.
         uav_service: An instance of the UAVService class.
     """
 
-    queryset = UAV.objects.all()
+    queryset = UAV.active_objects.all()
     serializer_class = UAVSerializer
     permission_classes = [IsAuthenticated, IsSuperUser]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["brand", "category__name"]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, UAVSearchFilter]
     filterset_class = UAVFilter
+    projected_list = True
+    cache_resource = UAV_CACHE_RESOURCE
+    replica_actions = (
+        "list",
+        "retrieve",
+        "rental_uavs",
+        "available_uavs",
+        "availability",
+        "availability_batch",
+    )
 
     uav_service = UAVService()
+    rented_uav_service = RentedUAVService()
 
     def get_queryset(self):
-        queryset = self.queryset.exclude(is_rental=False)
-        search = self.request.query_params.get("search", None)
-        if search is not None:
-            queryset = queryset.prefetch_related("category")
+        return super().get_queryset().filter(is_rental=True)
+
+    def filter_queryset(self, queryset):
+        for backend in self.filter_backends:
+            # The filterset only narrows lists, the detail routes would build
+            # and validate a UAVFilter for nothing.
+            if self.detail and issubclass(backend, DjangoFilterBackend):
+                continue
+            queryset = backend().filter_queryset(self.request, queryset, self)
         return queryset
 
-        
+    def perform_create(self, serializer):
+        serializer.instance = self.uav_service.create_object(**serializer.validated_data)
+
+    def perform_update(self, serializer):
+        self.uav_service.update_object(serializer.instance, **serializer.validated_data)
+
+    def perform_destroy(self, instance):
+        self.uav_service.destroy_object(instance)
 
     @action(
         detail=False,
@@ -66,18 +146,144 @@ class UAVViewSet(viewsets.ModelViewSet):
     def rental_uavs(self, request):
         """
         Returns a paginated list of rental UAVs filtered by is_rental=True.
-        If a search query parameter is provided, the queryset is filtered by the search term and prefetches the category.
-        """
-        queryset = self.queryset.filter(is_rental=True)
-        search = self.request.query_params.get("search", None)
-        if search is not None:
-            queryset = queryset.prefetch_related("category")
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        If a search query parameter is provided, the queryset is filtered and ranked by the search term.
+        The categories are prefetched for the whole page at once.
+        The list is served from the response cache until a UAV changes, and
+        conditional requests are answered with a 304 when it did not.
+        """
+        return self.cached_response(
+            request,
+            lambda: self.conditional_list_response(
+                request,
+                self.filter_queryset(self.queryset.filter(is_rental=True)),
+                self.build_rental_uavs_response,
+            ),
+        )
+
+    def build_rental_uavs_response(self):
+        queryset = self.filter_queryset(
+            self.optimize_queryset(self.queryset.filter(is_rental=True))
+        )
+        return self.list_response(queryset)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="available",
+        serializer_class=UAVSerializer,
+        permission_classes=[IsAuthenticated],
+        pagination_class=KeysetOnlyPagination,
+    )
+    def available_uavs(self, request):
+        """
+        Returns the UAVs free for the whole period from ``start`` to ``end``,
+        optionally of a ``category`` and weighing at most ``weight_max``.
+
+        Runs as one query: the UAVs are walked in keyset order through the
+        ``uavs_active_keyset_idx`` index, and the booked ones are dropped by
+        a ``NOT EXISTS`` anti-join on the overlapping bookings (see
+        ``UAVQuerySet.available``). The list is always keyset paginated,
+        counting every free UAV would cost as much as listing them.
+
+        Parameters:
+        request (Request): The request object containing the period and filters.
+
+        Returns:
+        Response: The response object containing a page of available UAVs.
+        """
+        query = AvailableUAVQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        queryset = UAV.objects.available(query.validated_data["start"], query.validated_data["end"])
+        if "category" in query.validated_data:
+            queryset = queryset.in_categories([query.validated_data["category"]])
+        if "weight_max" in query.validated_data:
+            queryset = queryset.filter(weight__lte=query.validated_data["weight_max"])
+        return self.list_response(self.optimize_queryset(queryset))
+
+    def get_availability_query(self, request):
+        serializer = AvailabilityQuerySerializer(
+            data={
+                key: request.query_params.getlist(key) if key == "uav_id" else value
+                for key, value in request.query_params.items()
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="availability",
+        permission_classes=[IsAuthenticated],
+    )
+    def availability(self, request, pk=None):
+        """
+        Returns the free and busy windows of an active UAV between the
+        ``from`` and ``to`` dates, the next 90 days by default.
+
+        Rented UAVs are included, unlike the other detail routes, since the
+        point is to find when they are free again.
+
+        Parameters:
+        request (Request): The request object with the optional period.
+
+        Returns:
+        Response: The response object containing the windows of the UAV.
+        """
+        query = self.get_availability_query(request)
+        uav = get_object_or_404(UAV.active_objects.only("pk"), pk=pk)
+        windows = self.rented_uav_service.get_availability([uav.pk], query["from"], query["to"])
+        return Response(
+            {
+                "uav_id": uav.pk,
+                "from": query["from"],
+                "to": query["to"],
+                "windows": windows[uav.pk],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="availability",
+        permission_classes=[IsAuthenticated],
+    )
+    def availability_batch(self, request):
+        """
+        Returns the availability calendars of up to 100 UAVs passed as
+        repeated ``uav_id`` parameters, with one query for all of their
+        bookings. Unknown and deleted UAVs are listed under ``not_found``.
+
+        Parameters:
+        request (Request): The request object with the UAV ids and period.
+
+        Returns:
+        Response: The response object containing the windows per UAV.
+        """
+        query = self.get_availability_query(request)
+        if not query.get("uav_id"):
+            return Response(
+                {"uav_id": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        requested_ids = list(dict.fromkeys(query["uav_id"]))
+        uav_ids = set(
+            UAV.active_objects.filter(pk__in=requested_ids).values_list("pk", flat=True)
+        )
+        calendars = self.rented_uav_service.get_availability(
+            [uav_id for uav_id in requested_ids if uav_id in uav_ids], query["from"], query["to"]
+        )
+        return Response(
+            {
+                "from": query["from"],
+                "to": query["to"],
+                "results": [
+                    {"uav_id": uav_id, "windows": windows} for uav_id, windows in calendars.items()
+                ],
+                "not_found": [uav_id for uav_id in requested_ids if uav_id not in uav_ids],
+            },
+            status=status.HTTP_200_OK,
+        )
 
     @action(
         detail=False,
@@ -90,6 +296,10 @@ class UAVViewSet(viewsets.ModelViewSet):
         """
         Rent a UAV for a specified time period.
 
+        The UAV is locked for the duration of the rental transaction. A
+        request racing another one for the same UAV, or asking for dates that
+        are already booked, gets a 409 instead of waiting for the lock.
+
         Parameters:
         request (Request): The request object containing the data to rent a UAV.
 
@@ -99,9 +309,8 @@ class UAVViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         try:
-            uav = UAV.objects.get(id=serializer.validated_data.get("uav_id"))
             rented_uav = self.uav_service.rent_uav(
-                uav=uav,
+                uav=serializer.validated_data.get("uav_id"),
                 user=request.user,
                 start_date=serializer.validated_data.get("start_date"),
                 end_date=serializer.validated_data.get("end_date"),
@@ -109,16 +318,211 @@ class UAVViewSet(viewsets.ModelViewSet):
             return Response(
                 self.get_serializer(rented_uav).data, status=status.HTTP_201_CREATED
             )
+        except UAVNotAvailableError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class RentedUAVViewSet(viewsets.ModelViewSet):
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="rent/batch",
+        serializer_class=RentUAVBatchSerializer,
+        permission_classes=[IsAuthenticated],
+    )
+    def rent_batch(self, request):
+        """
+        Rent many UAVs in a single transaction.
+
+        Each item is booked or rejected on its own, the response lists the
+        outcome of every item in request order. Responds with 201 when every
+        item was booked and 207 otherwise.
+
+        Parameters:
+        request (Request): The request object containing the items to rent.
+
+        Returns:
+        Response: The response object containing the per-item results.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            results = self.uav_service.rent_uavs(
+                user=request.user, items=serializer.validated_data.get("items")
+            )
+        except UAVNotAvailableError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
+        rented_all = all(result["status"] == "rented" for result in results)
+        return Response(
+            {"results": results},
+            status=status.HTTP_201_CREATED if rented_all else status.HTTP_207_MULTI_STATUS,
+        )
+
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_import(self, request):
+        """
+        Import many UAVs at once.
+
+        Accepts either a JSON list of UAV objects, or a CSV / NDJSON ``file``
+        upload that is read as a stream. Categories are referenced by name,
+        see ``uavs.importers`` for the row format.
+
+        A file that cannot be read to its end is answered with a 207: the
+        rows before the failing line are imported, the result carries the
+        ``read_error`` line and message.
+
+        Parameters:
+        request (Request): The request object containing the UAVs to import.
+
+        Returns:
+        Response: The response object containing the import statistics.
+        """
+        upload = request.FILES.get("file")
+        try:
+            if upload is not None:
+                reader = get_reader(upload.name)
+                result = self.uav_service.import_objects(
+                    reader(decode_lines(upload.file)), numbered=True
+                )
+            elif isinstance(request.data, list):
+                result = self.uav_service.import_objects(request.data)
+            else:
+                return Response(
+                    {"error": "Expected a list of UAVs or a file upload"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            result,
+            status=status.HTTP_207_MULTI_STATUS
+            if result["read_error"]
+            else status.HTTP_201_CREATED,
+        )
+
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Streams every UAV matching the list filters as CSV or NDJSON.
+
+        The format is picked with the ``export_format`` query parameter
+        (``csv`` by default, or ``ndjson``). The rows are not paginated.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            return export_response(
+                iter_uav_rows(queryset),
+                UAV_EXPORT_FIELDS,
+                request.query_params.get("export_format", "csv"),
+                "uavs",
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=["get"], url_path="cache-stats")
+    def cache_stats(self, request):
+        """
+        Returns the response cache hits and misses of this process per
+        resource.
+        """
+        return Response(response_cache.stats(), status=status.HTTP_200_OK)
+
+
+class RentedUAVViewSet(
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    SerializerPrefetchMixin,
+    ProjectedListMixin,
+    viewsets.ModelViewSet,
+):
     """
     A viewset for viewing and editing rented UAVs.
 
-    Allows superusers to view, create, edit and delete rented UAVs.
+    Allows superusers to view, create, edit and delete rented UAVs. Writes
+    go through RentedUAVService, which keeps the utilization rollups up to
+    date, and deleting a rented UAV soft deletes it.
     """
-    queryset = RentedUAV.objects.all()
+    queryset = RentedUAV.active_objects.all()
     serializer_class = RentedUAVSerializer
     permission_classes = [IsAuthenticated, IsSuperUser]
+    pagination_class = KeysetPagination
+    projected_list = True
+    service = RentedUAVService()
+
+    def perform_create(self, serializer):
+        serializer.instance = self.service.create_object(**serializer.validated_data)
+
+    def perform_update(self, serializer):
+        self.service.update_object(serializer.instance, **serializer.validated_data)
+
+    def perform_destroy(self, instance):
+        self.service.delete_object(instance)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Streams every rented UAV matching the list filters as CSV or NDJSON.
+
+        The format is picked with the ``export_format`` query parameter
+        (``csv`` by default, or ``ndjson``). The rows are not paginated.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            return export_response(
+                iter_rented_uav_rows(queryset),
+                RENTED_UAV_EXPORT_FIELDS,
+                request.query_params.get("export_format", "csv"),
+                "rented-uavs",
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncUAVListView(SerializerPrefetchMixin, AsyncAPIView):
+    """
+    Async counterpart of the UAV list, for the ASGI deployment.
+
+    Takes the same filter, search and pagination parameters, without the
+    response cache and conditional requests of the sync endpoint.
+    """
+    queryset = UAV.active_objects.filter(is_rental=True)
+    serializer_class = UAVSerializer
+    filter_backends = [DjangoFilterBackend, UAVSearchFilter]
+    filterset_class = UAVFilter
+    permission_classes = [IsAuthenticated, IsSuperUser]
+
+    async def get(self, request):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        return await self.paginated_response(queryset)
+
+
+class AsyncUAVDetailView(SerializerPrefetchMixin, AsyncAPIView):
+    """
+    Async counterpart of the UAV detail, for the ASGI deployment.
+    """
+    queryset = UAV.active_objects.filter(is_rental=True)
+    serializer_class = UAVSerializer
+    permission_classes = [IsAuthenticated, IsSuperUser]
+
+    async def get(self, request, pk):
+        uav = await self.aget_object(self.get_queryset(), pk=pk)
+        return self.render(self.get_serializer(uav).data)
+
+
+class AsyncRentalUAVListView(SerializerPrefetchMixin, AsyncAPIView):
+    """
+    Async counterpart of ``UAVViewSet.rental_uavs``, for the ASGI deployment.
+    """
+    queryset = UAV.active_objects.filter(is_rental=True)
+    serializer_class = UAVSerializer
+    filter_backends = [DjangoFilterBackend, UAVSearchFilter]
+    filterset_class = UAVFilter
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        return await self.paginated_response(queryset)
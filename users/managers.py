@@ -51,3 +51,12 @@ class UserManager(BaseUserManager):
         user.save()
 
         return user
+
+
+class ActiveUserManager(UserManager):
+    """
+    A user manager hiding deactivated (soft deleted) users.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['date_joined'], name='users_date_joined_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.4 on 2026-10-17 19:14
+
+from django.db import migrations, models
+import utils.uuids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_date_joined_index'),
+    ]
+
+    # The ids are generated in Python, so only the state changes: the tables
+    # are not rebuilt and the existing rows keep their uuid4 ids.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='user',
+                    name='id',
+                    field=models.UUIDField(default=utils.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
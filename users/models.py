@@ -1,7 +1,7 @@
-import uuid
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.db import models
-from users.managers import UserManager
+from users.managers import ActiveUserManager, UserManager
+from utils.uuids import uuid7
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -9,7 +9,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     Custom user model that extends Django's AbstractBaseUser and PermissionsMixin.
     Uses email as the unique identifier for authentication instead of username.
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField(unique=True)
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
@@ -19,7 +19,16 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+    active_objects = ActiveUserManager()
 
 
     class Meta:
         db_table = "users"
+        indexes = [
+            # Serves the user list, newest first.
+            models.Index(
+                fields=["date_joined"],
+                name="users_date_joined_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
@@ -1,4 +1,5 @@
 from users.models import User
+from utils.authentication import invalidate_user_tokens
 from utils.interfaces import Service
 
 
@@ -26,6 +27,9 @@ class UserService(Service):
         """
         Updates the given User object with the given fields.
 
+        The cached token authentications of the user are dropped, so the
+        changes apply to the user's next request.
+
         Args:
             instance (User): The User object to be updated.
             **fields: The fields to be updated.
@@ -37,12 +41,16 @@ class UserService(Service):
         for key, value in fields.items():
             setattr(instance, key, value)
             instance.save()
+        invalidate_user_tokens(instance)
         return instance
 
     def delete_object(self, instance: User) -> None:
         """
         Sof Deletes the given User object.
 
+        The cached token authentications of the user are dropped, so the
+        user cannot authenticate anymore.
+
         Args:
             instance (User): The User object to be deleted.
 
@@ -51,3 +59,4 @@ class UserService(Service):
         """
         instance.is_active = False
         instance.save()
+        invalidate_user_tokens(instance)
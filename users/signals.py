@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from utils.authentication import invalidate_token
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance: Token, **kwargs):
+    """
+    Drops a rotated or deleted token from the token authentication cache.
+    """
+    invalidate_token(instance.key)
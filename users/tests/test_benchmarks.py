@@ -0,0 +1,41 @@
+from unittest import mock
+from django.test import TestCase
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+from users.views import UserViewSet
+from utils.authentication import CachedTokenAuthentication, token_cache
+from utils.benchmarks import benchmark, measure, report
+
+
+@benchmark
+class TokenAuthenticationBenchmark(TestCase):
+    """
+    Compares the latency of an authenticated GET with the plain and the
+    cached token authentication.
+    """
+
+    URL = "/api/v1/users/me/"
+
+    def setUp(self):
+        token_cache.clear()
+        user = User.objects.create_user(email="bench@example.com", password="bench")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token %s" % Token.objects.create(user=user).key
+        )
+
+    def measure_with(self, authentication_class):
+        with mock.patch.object(
+            UserViewSet, "authentication_classes", [authentication_class]
+        ):
+            self.assertEqual(self.client.get(self.URL).status_code, 200)
+            return measure(lambda: self.client.get(self.URL), iterations=500)
+
+    def test_authenticated_get(self):
+        uncached = self.measure_with(TokenAuthentication)
+        report("GET /users/me/ (TokenAuthentication)", uncached)
+        cached = self.measure_with(CachedTokenAuthentication)
+        report("GET /users/me/ (CachedTokenAuthentication)", cached)
+        self.assertLess(cached["p50"], uncached["p50"])
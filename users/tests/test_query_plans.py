@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from uavs.models import UAV, RentedUAV
+from users.models import User
+from utils.benchmarks import bench_scale
+from utils.query_plans import QueryPlanAssertionsMixin, analyze
+
+
+class UserEndpointQueryPlanTestCase(QueryPlanAssertionsMixin, APITestCase):
+    """
+    Fails when the page query of a user endpoint stops being served by its
+    index, i.e. regresses to a full table scan or an explicit sort.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rows = bench_scale("plan_rows", 2000)
+        cls.superuser = User.objects.create_superuser(
+            email="superuser@example.com", password="testpass"
+        )
+        users = User.objects.bulk_create(
+            [
+                User(email="user%d@example.com" % i, is_active=i % 10 != 0)
+                for i in range(rows // 10)
+            ]
+        )
+        uavs = UAV.objects.bulk_create(
+            [UAV(brand="Brand %d" % i, model="Model %d" % i, weight=1.0) for i in range(rows // 10)]
+        )
+        today = timezone.localdate()
+        RentedUAV.objects.bulk_create(
+            [
+                RentedUAV(
+                    uav=uavs[i % len(uavs)],
+                    user=cls.superuser if i % 2 else users[i % len(users)],
+                    start_date=today - timedelta(days=2 * (i + 1)),
+                    end_date=today - timedelta(days=2 * i + 1),
+                )
+                for i in range(rows)
+            ],
+            batch_size=1000,
+        )
+        analyze("users", "rented_uavs")
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.superuser)
+
+    def test_user_list(self):
+        sql = self.capture_page_query("/api/v1/users/", "users")
+        self.assertUsesIndex(sql, "users", "users_date_joined_idx")
+
+    def test_rental_records(self):
+        url = "/api/v1/users/me/rental-records/"
+        for params in ({}, {"cursor": ""}):
+            sql = self.capture_page_query(url, "rented_uavs", params)
+            self.assertUsesIndex(sql, "rented_uavs", "rented_uavs_user_keyset_idx")
+        next_page = self.client.get(url, {"cursor": ""}).json()["next"]
+        sql = self.capture_page_query(next_page, "rented_uavs")
+        self.assertUsesIndex(sql, "rented_uavs", "rented_uavs_user_keyset_idx")
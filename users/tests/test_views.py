@@ -1,8 +1,11 @@
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 from users.models import User
 from uavs.models import UAV, RentedUAV
 from model_mommy import mommy
+from users.services import UserService
+from utils.authentication import token_cache
 
 class UserViewSetTestCase(APITestCase):
     def setUp(self):
@@ -18,6 +21,17 @@ class UserViewSetTestCase(APITestCase):
         self.assertEqual(response.json().get('count'), 2)
         self.assertEqual(User.objects.count(), 2)
 
+    def test_deactivated_users_stay_reachable(self):
+        UserService().delete_object(self.user)
+        self.client.force_authenticate(user=self.superuser)
+        response = self.client.get('/api/v1/users/')
+        self.assertEqual([user['id'] for user in response.json()['results']], [str(self.superuser.id)])
+        response = self.client.get('/api/v1/users/?deactivated=true')
+        self.assertEqual([user['id'] for user in response.json()['results']], [str(self.user.id)])
+        response = self.client.get(f'/api/v1/users/{self.user.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.json()['is_active'])
+
     def test_create_valid_user(self):
         self.client.force_authenticate(user=self.superuser)
         response = self.client.post('/api/v1/users/', data=self.valid_payload)
@@ -70,4 +84,87 @@ class UserViewSetTestCase(APITestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/v1/users/me/rental-records/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.json().get('count'), 0)
\ No newline at end of file
+        self.assertEqual(response.json().get('count'), 0)
+
+    def test_rental_records_keyset_pagination(self):
+        self.client.force_authenticate(user=self.user)
+        for uav in mommy.make(UAV, _quantity=12):
+            RentedUAV.objects.create(user=self.user, uav=uav, start_date='2021-01-01', end_date='2021-01-02')
+        RentedUAV.objects.create(user=self.superuser, uav=mommy.make(UAV), start_date='2021-01-01', end_date='2021-01-02')
+        response = self.client.get('/api/v1/users/me/rental-records/', {'cursor': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json().get('results')), 10)
+        response = self.client.get(response.json().get('next'))
+        self.assertEqual(len(response.json().get('results')), 2)
+        self.assertIsNone(response.json().get('next'))
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(password='testpass', email='user1@example.com')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_token_skips_auth_query(self):
+        self.assertEqual(self.client.get('/api/v1/users/me/').status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'user1@example.com')
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/v1/users/me/').status_code, status.HTTP_200_OK)
+        UserService().delete_object(self.user)
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_is_reloaded(self):
+        self.assertEqual(self.client.get('/api/v1/users/me/').status_code, status.HTTP_200_OK)
+        UserService().update_object(self.user, email='user1_updated@example.com')
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.data['email'], 'user1_updated@example.com')
+
+    def test_rotated_token_is_rejected(self):
+        self.assertEqual(self.client.get('/api/v1/users/me/').status_code, status.HTTP_200_OK)
+        self.token.delete()
+        Token.objects.create(user=self.user)
+        response = self.client.get('/api/v1/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncUserViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(password='testpass', email='user1@example.com')
+        self.client.force_authenticate(user=self.user)
+        for uav in mommy.make(UAV, _quantity=12):
+            RentedUAV.objects.create(user=self.user, uav=uav, start_date='2021-01-01', end_date='2021-01-02')
+        RentedUAV.objects.create(user=mommy.make(User), uav=mommy.make(UAV), start_date='2021-01-01', end_date='2021-01-02')
+
+    def assertSameResponse(self, path):
+        sync_response = self.client.get('/api/v1/users/' + path)
+        async_response = self.client.get('/api/v1/async/users/' + path)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(
+            async_response.content.decode().replace('/async/', '/'),
+            sync_response.content.decode(),
+        )
+        return async_response
+
+    def test_me(self):
+        response = self.assertSameResponse('me/')
+        self.assertEqual(response.json().get('email'), 'user1@example.com')
+
+    def test_rental_records(self):
+        self.assertEqual(self.assertSameResponse('me/rental-records/').json().get('count'), 12)
+        self.assertSameResponse('me/rental-records/?page=2')
+        response = self.assertSameResponse('me/rental-records/?cursor=')
+        cursor = response.json().get('next').split('cursor=')[1]
+        response = self.assertSameResponse('me/rental-records/?cursor=' + cursor)
+        self.assertEqual(len(response.json().get('results')), 2)
+
+    def test_unauthenticated(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.assertSameResponse('me/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        self.assertEqual(self.assertSameResponse('me/').status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,6 +1,5 @@
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from uavs.models import RentedUAV
@@ -8,10 +7,13 @@ from uavs.serializers import RentedUAVSerializer
 from users.models import User
 from users.serializers import UserSerializer, UserMeSerializer
 from users.services import UserService
+from utils.async_views import AsyncAPIView
+from utils.mixins import ReplicaReadMixin, SerializerPrefetchMixin
+from utils.pagination import KeysetPagination
 from utils.permissions import IsSuperUser
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
     """
     A viewset that provides CRUD operations for User objects.
 
@@ -20,9 +22,11 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer_class (Serializer): The serializer class to be used by the viewset.
         service (UserService): An instance of the UserService class to handle business logic.
         permission_classes (list): The permission classes to be used by the viewset.
+        replica_actions (tuple): The actions reading from the read replicas.
 
     Methods:
         perform_create(serializer): Overrides the default create behavior to use the UserService.
+        get_queryset(): Lists the active users, or the deactivated ones with ``?deactivated=true``.
         perform_update(serializer): Overrides the default update behavior to use the UserService.
         me(request): A custom action that returns the authenticated user's data.
         rental_records(request): A custom action that returns the authenticated user's rental records.
@@ -32,6 +36,16 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     service = UserService()
     permission_classes = [IsAuthenticated, IsSuperUser]
+    replica_actions = ("list", "retrieve", "rental_records")
+
+    def get_queryset(self):
+        # The detail routes still reach deactivated users, so superusers can
+        # look them up.
+        queryset = super().get_queryset()
+        if self.action == "list":
+            deactivated = self.request.query_params.get("deactivated") == "true"
+            queryset = queryset.filter(is_active=not deactivated)
+        return queryset
 
     def perform_create(self, serializer):
         serializer.instance = self.service.create_object(**serializer.validated_data)
@@ -63,7 +77,7 @@ class UserViewSet(viewsets.ModelViewSet):
         methods=["get"],
         serializer_class=RentedUAVSerializer,
         permission_classes=[IsAuthenticated],
-        pagination_class=PageNumberPagination,
+        pagination_class=KeysetPagination,
         url_path="me/rental-records",
     )
     def rental_records(self, request):
@@ -76,7 +90,9 @@ class UserViewSet(viewsets.ModelViewSet):
         Returns:
             A Response object containing a serialized list of rented UAVs.
         """
-        rented_uav_list = RentedUAV.objects.filter(user=request.user)
+        rented_uav_list = self.optimize_queryset(
+            RentedUAV.active_objects.filter(user=request.user)
+        )
 
         page = self.paginate_queryset(rented_uav_list)
         if page is not None:
@@ -85,3 +101,27 @@ class UserViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(rented_uav_list, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AsyncUserMeView(AsyncAPIView):
+    """
+    Async counterpart of ``UserViewSet.me``, for the ASGI deployment.
+    """
+    serializer_class = UserMeSerializer
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        return self.render(self.get_serializer(request.user).data)
+
+
+class AsyncUserRentalRecordsView(SerializerPrefetchMixin, AsyncAPIView):
+    """
+    Async counterpart of ``UserViewSet.rental_records``, for the ASGI
+    deployment.
+    """
+    queryset = RentedUAV.active_objects.all()
+    serializer_class = RentedUAVSerializer
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        return await self.paginated_response(self.get_queryset().filter(user=request.user))
@@ -0,0 +1,124 @@
+from typing import Optional
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.renderers import JSONRenderer
+from utils.db import alist
+from utils.pagination import KeysetPagination
+
+
+class AsyncAPIView(View):
+    """
+    A natively async, read-only counterpart of DRF's ``APIView``.
+
+    DRF views are sync, so under ASGI each of their requests holds a thread
+    for its whole duration. Subclasses implement ``async def get`` with the
+    async ORM and only hop to a sync thread where Django 4.2 requires it.
+
+    Authentication and permissions use the same classes as the DRF views and
+    fail with the same 401/403 responses. The request is authenticated in a
+    single hop to the sync thread, which ``CachedTokenAuthentication`` serves
+    from memory for repeated tokens. Permissions are checked in the event
+    loop, so they must not query the database, like ``IsAuthenticated`` and
+    ``IsSuperUser``. Lists are paginated with ``KeysetPagination``, the only
+    paginator with an async ``apaginate_queryset``, and filtered by the
+    ``filter_backends`` in ``afilter_queryset``. Responses are always JSON.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    pagination_class = KeysetPagination
+    filter_backends = ()
+    queryset = None
+    serializer_class = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(
+            request, authenticators=[auth() for auth in self.authentication_classes]
+        )
+        self.request = request
+        try:
+            await sync_to_async(getattr)(request, "user")
+            self.check_permissions(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+
+    def check_permissions(self, request) -> None:
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    def handle_exception(self, request, exc: exceptions.APIException) -> HttpResponse:
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+        response = self.render(data, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = self.get_authenticate_header(request)
+            if header:
+                response["WWW-Authenticate"] = header
+            else:
+                response.status_code = exceptions.PermissionDenied.status_code
+        return response
+
+    def get_authenticate_header(self, request) -> Optional[str]:
+        if request.authenticators:
+            return request.authenticators[0].authenticate_header(request)
+        return None
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    async def afilter_queryset(self, queryset):
+        """
+        Applies the ``filter_backends`` like ``GenericAPIView``, on the sync
+        thread since a filterset may validate its values with a query.
+        """
+
+        def filter_queryset():
+            filtered = queryset
+            for backend in self.filter_backends:
+                filtered = backend().filter_queryset(self.request, filtered, self)
+            return filtered
+
+        return await sync_to_async(filter_queryset)()
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("context", {"request": self.request, "view": self})
+        return self.get_serializer_class()(*args, **kwargs)
+
+    async def aget_object(self, queryset, **lookups):
+        """
+        Returns the object matching the lookups, raising ``NotFound`` like
+        DRF's ``get_object_or_404`` for missing objects and malformed keys.
+        """
+        try:
+            return await queryset.aget(**lookups)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise exceptions.NotFound()
+
+    async def paginated_response(self, queryset) -> HttpResponse:
+        """
+        Renders a page of the queryset with the envelope of the sync views.
+        """
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, self.request, view=self)
+        if page is None:
+            return self.render(self.get_serializer(await alist(queryset), many=True).data)
+        data = self.get_serializer(page, many=True).data
+        return self.render(paginator.get_paginated_response(data).data)
+
+    def render(self, data, status: int = 200) -> HttpResponse:
+        renderer = JSONRenderer()
+        return HttpResponse(
+            renderer.render(data), content_type=renderer.media_type, status=status
+        )
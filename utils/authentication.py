@@ -0,0 +1,129 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """
+    A thread safe, in-process LRU cache of token key to ``(user, token)``
+    with a time to live, optionally backed by a Django cache.
+
+    The in-process layer serves hits without any I/O. When a Django cache
+    alias is configured, misses are looked up there before falling back to
+    the database, and invalidations are applied to it too, so the workers
+    sharing it only keep stale entries in their own process for at most
+    ``ttl`` seconds.
+
+    Settings:
+        AUTH_TOKEN_CACHE_TTL: Seconds an entry is served, 30 by default.
+        AUTH_TOKEN_CACHE_MAX_SIZE: Entries kept in process, 10000 by default.
+        AUTH_TOKEN_CACHE_ALIAS: The Django cache alias to back the in-process
+            cache with, None (disabled) by default.
+    """
+
+    key_prefix = "auth-token:"
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, "AUTH_TOKEN_CACHE_TTL", 30)
+
+    @property
+    def max_size(self) -> int:
+        return getattr(settings, "AUTH_TOKEN_CACHE_MAX_SIZE", 10000)
+
+    @property
+    def backend(self):
+        alias = getattr(settings, "AUTH_TOKEN_CACHE_ALIAS", None)
+        return caches[alias] if alias else None
+
+    def get(self, key: str) -> Optional[Tuple]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    return value
+                del self.entries[key]
+
+        backend = self.backend
+        if backend is not None:
+            value = backend.get(self.key_prefix + key)
+            if value is not None:
+                self.set_local(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: Tuple) -> None:
+        self.set_local(key, value)
+        backend = self.backend
+        if backend is not None:
+            backend.set(self.key_prefix + key, value, timeout=self.ttl)
+
+    def set_local(self, key: str, value: Tuple) -> None:
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+        backend = self.backend
+        if backend is not None and keys:
+            backend.delete_many([self.key_prefix + key for key in keys])
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def invalidate_token(key: str) -> None:
+    """
+    Drops the given token from the token cache, e.g. after rotating it.
+    """
+    token_cache.delete(key)
+
+
+def invalidate_user_tokens(user) -> None:
+    """
+    Drops every token of the given user from the token cache, so changes to
+    the user (like deactivation) apply to the next request.
+    """
+    token_cache.delete(
+        *Token.objects.filter(user_id=user.pk).values_list("key", flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for ``TokenAuthentication`` that serves repeated
+    tokens from ``token_cache`` instead of querying the token and its user on
+    every request.
+
+    Every request gets its own copy of the cached user, so per-request
+    changes to ``request.user`` do not leak into other requests.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        return copy.copy(user), token
@@ -0,0 +1,120 @@
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from unittest import skipUnless
+
+
+def benchmark(test_item):
+    """
+    Marks a test case or method as a benchmark.
+
+    Benchmarks seed large volumes of data and are skipped unless the
+    ``RUN_BENCHMARKS`` environment variable is set, e.g.
+
+        RUN_BENCHMARKS=1 python manage.py test uavs.tests.test_benchmarks
+    """
+    return skipUnless(os.environ.get("RUN_BENCHMARKS"), "RUN_BENCHMARKS is not set")(
+        test_item
+    )
+
+
+def bench_scale(name: str, default: int) -> int:
+    """
+    Returns the size of a benchmark dataset, overridable through the
+    ``BENCH_<NAME>`` environment variable.
+    """
+    return int(os.environ.get("BENCH_%s" % name.upper(), default))
+
+
+def measure(func: Callable, iterations: int = 100) -> Dict[str, float]:
+    """
+    Calls ``func`` the given number of times and returns latency statistics
+    in milliseconds.
+    """
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "mean": statistics.mean(timings),
+        "p50": timings[int(len(timings) * 0.50)],
+        "p95": timings[min(int(len(timings) * 0.95), len(timings) - 1)],
+        "p99": timings[min(int(len(timings) * 0.99), len(timings) - 1)],
+    }
+
+
+def report(name: str, stats: Dict[str, float]) -> None:
+    """
+    Prints the statistics returned by ``measure`` on a single line.
+    """
+    print(
+        "\n[bench] %s: %s"
+        % (name, ", ".join("%s=%.3fms" % (key, value) for key, value in stats.items()))
+    )
+
+
+def measure_allocations(func: Callable, iterations: int = 5) -> float:
+    """
+    Calls ``func`` the given number of times under ``tracemalloc`` and
+    returns the mean peak of memory allocated per call in KiB.
+    """
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            func()
+            peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks)
+
+
+# Absolute growths below these are noise, whatever their relative size.
+NOISE_FLOOR = {"p50": 1.0, "alloc_kib": 8.0}
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = 0.25,
+) -> List[str]:
+    """
+    Compares benchmark results to a baseline of the same shape, keyed by
+    case name.
+
+    A case regresses when it runs more queries than its baseline, or when
+    its median latency or allocations grow by more than ``tolerance`` (a
+    fraction) and more than their ``NOISE_FLOOR``. Latencies vary between machines, so a baseline is only
+    meaningful on the machine and database it was recorded on; query counts
+    are exact everywhere.
+
+    Returns:
+        List[str]: A line per regression, empty when there is none.
+    """
+    regressions = []
+    for name, stats in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if stats["queries"] > expected["queries"]:
+            regressions.append(
+                "%s: %g queries per request, was %g" % (name, stats["queries"], expected["queries"])
+            )
+        for key in ("p50", "alloc_kib"):
+            growth = stats[key] - expected.get(key, 0)
+            if (
+                expected.get(key)
+                and stats[key] > expected[key] * (1 + tolerance)
+                and growth > NOISE_FLOOR[key]
+            ):
+                regressions.append(
+                    "%s: %s %.2f, was %.2f (%+.0f%%)"
+                    % (name, key, stats[key], expected[key], (stats[key] / expected[key] - 1) * 100)
+                )
+    return regressions
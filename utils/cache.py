@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, Optional
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+from utils.routers import replica_reads_enabled
+
+
+class ResponseCache:
+    """
+    Caches response data per resource under a version key.
+
+    Every cached entry key embeds the current version of its resource, so
+    bumping the version invalidates every cached page and filter
+    combination of the resource at once, without scanning or deleting keys.
+    The stale entries simply expire.
+
+    Versions are the time of the last bump in milliseconds plus a random
+    suffix, so a version key evicted from the cache never comes back with a
+    version that was already used. Responses built from a read replica are
+    not cached for ``REPLICA_STICKY_SECONDS`` after a bump, as the replica
+    may not have replicated the write yet and the stale response would be
+    cached under the new version.
+
+    Settings:
+        RESPONSE_CACHE_ALIAS: The Django cache alias to use, "default" by default.
+        RESPONSE_CACHE_TIMEOUT: Seconds a response is cached, 300 by default.
+    """
+
+    version_prefix = "response-cache-version:"
+    key_prefix = "response-cache:"
+    cached_headers = ("ETag", "Last-Modified")
+
+    def __init__(self):
+        self.hits = Counter()
+        self.misses = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+    @property
+    def timeout(self) -> int:
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def new_version(self) -> str:
+        return "%d-%s" % (time.time() * 1000, uuid.uuid4().hex[:8])
+
+    def get_version(self, resource: str) -> str:
+        key = self.version_prefix + resource
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, self.new_version(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def bump(self, resource: str) -> None:
+        self.cache.set(self.version_prefix + resource, self.new_version(), timeout=None)
+
+    def is_cacheable(self, version: str) -> bool:
+        if not replica_reads_enabled():
+            return True
+        bumped_at = int(version.split("-")[0])
+        return time.time() * 1000 - bumped_at >= getattr(settings, "REPLICA_STICKY_SECONDS", 5) * 1000
+
+    def make_key(self, resource: str, version: str, request) -> str:
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return "%s%s:%s:%s" % (self.key_prefix, resource, version, path)
+
+    def get_or_build(self, resource: str, request, build: Callable[[], Response]) -> Response:
+        """
+        Returns the cached response data of the request for the resource, or
+        builds the response and caches its data when it is a 200.
+
+        The response carries an ``X-Cache`` header telling a ``HIT`` from a
+        ``MISS``. The ``ETag`` and ``Last-Modified`` headers of the built
+        response are cached with its data, so conditional requests hitting
+        the cache are answered with a 304 without any query.
+        """
+        version = self.get_version(resource)
+        key = self.make_key(resource, version, request)
+        entry = self.cache.get(key)
+        if entry is not None:
+            with self.lock:
+                self.hits[resource] += 1
+            data, headers = entry
+            response = get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+            ) or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            response["X-Cache"] = "HIT"
+            return response
+
+        with self.lock:
+            self.misses[resource] += 1
+        response = build()
+        if response.status_code == 200 and self.is_cacheable(version):
+            headers = {
+                header: response[header]
+                for header in self.cached_headers
+                if header in response
+            }
+            self.cache.set(key, (response.data, headers), timeout=self.timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the hit and miss counters of this process per resource.
+        """
+        with self.lock:
+            return {
+                resource: {"hits": self.hits[resource], "misses": self.misses[resource]}
+                for resource in sorted(set(self.hits) | set(self.misses))
+            }
+
+
+response_cache = ResponseCache()
+
+
+def bump_versions(*resources: str) -> None:
+    """
+    Invalidates every cached response of the given resources.
+
+    Inside a transaction the versions are bumped again on commit, so that a
+    response cached from the pre-commit data by a concurrent request does not
+    outlive the commit.
+    """
+    for resource in resources:
+        response_cache.bump(resource)
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        transaction.on_commit(
+            lambda: [response_cache.bump(resource) for resource in resources]
+        )
+
+
+class CachedListMixin:
+    """
+    A viewset mixin that serves ``list`` from ``response_cache`` under the
+    ``cache_resource`` version key. Custom list actions can wrap their
+    response building with ``cached_response``.
+
+    The cache is shared by every user allowed to call the endpoint, the
+    permissions are checked before it is consulted.
+    """
+
+    cache_resource: Optional[str] = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(CachedListMixin, self).list(request, *args, **kwargs)
+        )
+
+    def cached_response(self, request, build: Callable[[], Response]) -> Response:
+        return response_cache.get_or_build(self.cache_resource, request, build)
@@ -0,0 +1,125 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Tuple
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalizes a SQL statement so that executions differing only in their
+    parameters share the same fingerprint: literals become ``?`` and
+    ``IN`` lists of any length become ``(...)``.
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+# The recorders of the current request, or other recording block. A context
+# variable follows the request through sync_to_async and async_to_sync, so
+# concurrent requests sharing a thread and its connections are told apart.
+_recorders: ContextVar[Tuple["QueryRecorder", ...]] = ContextVar("query_recorders", default=())
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    The ``execute_wrapper`` installed once on every connection, adding the
+    statement to the recorders of the current context, if any.
+    """
+    recorders = _recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        statement = fingerprint(sql)
+        for recorder in recorders:
+            recorder.add(statement, duration)
+
+
+def install_query_recording(connection) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_all_query_recording() -> None:
+    """
+    Installs ``record_query`` on the connections of the current thread.
+    """
+    for connection in connections.all():
+        install_query_recording(connection)
+
+
+@receiver(connection_created)
+def install_new_query_recording(sender, connection, **kwargs):
+    install_query_recording(connection)
+
+
+class QueryRecorder:
+    """
+    Counts the executed statements, their total duration and how often every
+    statement fingerprint repeats, within a ``record`` block.
+
+    Only the statements of the current context are recorded: a block opened
+    for a request does not see the queries of other requests, even when
+    they run on the same thread and connections. Blocks can be nested, the
+    statements are added to all of them.
+
+    Usage:
+        recorder = QueryRecorder()
+        with recorder.record():
+            ...
+        recorder.count, recorder.duration, recorder.repeated(10)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def add(self, statement: str, duration: float) -> None:
+        self.duration += duration
+        self.count += 1
+        self.fingerprints[statement] += 1
+
+    @contextmanager
+    def record(self, install: bool = True):
+        """
+        Records the statements of the current context until the block exits.
+
+        Args:
+            install (bool): Whether to make sure the connections of the
+                current thread run ``record_query``. Async callers, whose
+                queries run on another thread, install it there first.
+        """
+        if install:
+            install_all_query_recording()
+        token = _recorders.set(_recorders.get() + (self,))
+        try:
+            yield self
+        finally:
+            _recorders.reset(token)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Returns the fingerprints executed more than ``threshold`` times, most
+        repeated first. Such repetitions are usually an N+1 query.
+        """
+        return [
+            (statement, count)
+            for statement, count in self.fingerprints.most_common()
+            if count > threshold
+        ]
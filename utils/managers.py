@@ -0,0 +1,43 @@
+import datetime
+from django.db import models, transaction
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet of models soft deleted through ``is_active``, see
+    ``utils.models.BaseModel``.
+    """
+
+    def active(self):
+        return self.filter(is_active=True)
+
+    def deleted(self):
+        return self.filter(is_active=False)
+
+    def purge_deleted(self, before: datetime.datetime, chunk_size: int = 1000) -> int:
+        """
+        Hard deletes the rows soft deleted (last updated) before the given
+        time, ``chunk_size`` rows per transaction so that locks stay short
+        and no single statement grows with the table.
+
+        Returns:
+            int: The number of purged rows, not counting cascaded ones.
+        """
+        queryset = self.deleted().filter(updated_at__lt=before).order_by()
+        purged = 0
+        while True:
+            pks = list(queryset.values_list("pk", flat=True)[:chunk_size])
+            if not pks:
+                return purged
+            with transaction.atomic():
+                self.model._base_manager.filter(pk__in=pks).delete()
+            purged += len(pks)
+
+
+class ActiveManager(models.Manager):
+    """
+    A manager hiding soft deleted rows.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
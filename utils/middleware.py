@@ -0,0 +1,65 @@
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from utils.instrumentation import QueryRecorder, install_all_query_recording
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the queries issued while handling each request.
+
+    Adds a ``Server-Timing`` header with the total SQL time and query count,
+    e.g. ``db;dur=12.31;desc="7 queries"``, and logs a warning for every
+    statement that repeats more than ``QUERY_N_PLUS_ONE_THRESHOLD`` times
+    (10 by default) with different parameters, the usual sign of an N+1.
+
+    Queries run while a streaming response is being consumed happen after
+    the middleware returns and are not recorded. Works under WSGI and ASGI,
+    so it does not force async views back onto a thread. Every request only
+    counts its own queries, see ``utils.instrumentation.QueryRecorder``.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.process_recording(request, response, recorder)
+
+    async def __acall__(self, request):
+        # Under ASGI the queries of a request run on its sync thread, whose
+        # connections are not the ones of the event loop. The recording
+        # itself is tied to the request context, not to the connections.
+        await sync_to_async(install_all_query_recording)()
+        recorder = QueryRecorder()
+        with recorder.record(install=False):
+            response = await self.get_response(request)
+        return self.process_recording(request, response, recorder)
+
+    def process_recording(self, request, response, recorder: QueryRecorder):
+        timing = 'db;dur=%.2f;desc="%d queries"' % (recorder.duration * 1000, recorder.count)
+        if response.has_header("Server-Timing"):
+            timing = "%s, %s" % (response["Server-Timing"], timing)
+        response["Server-Timing"] = timing
+
+        threshold = getattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", 10)
+        for statement, count in recorder.repeated(threshold):
+            logger.warning(
+                "Possible N+1 query on %s %s, executed %d times: %s",
+                request.method,
+                request.path,
+                count,
+                statement,
+            )
+        return response
@@ -0,0 +1,242 @@
+import hashlib
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import relations, serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from utils.projections import get_field_plan
+from utils.routers import enable_replica_reads, is_stuck_to_primary, replica_reads, stick_to_primary
+
+_related_lookups_cache: Dict[Type, Tuple[List[str], List[str]]] = {}
+
+
+def get_related_lookups(
+    serializer: serializers.BaseSerializer, prefix: str = ""
+) -> Tuple[List[str], List[str]]:
+    """
+    Derives the ``select_related`` and ``prefetch_related`` lookups needed
+    to serialize instances with the given serializer without extra queries.
+
+    - many related fields and nested ``many=True`` serializers are prefetched
+    - nested serializers, related fields that render more than the primary
+      key and dotted sources (``source="uav.brand"``) are joined
+    - primary key related fields are skipped, DRF reads them from the
+      ``<name>_id`` attribute without a query
+
+    Returns:
+        Tuple[List[str], List[str]]: The select and the prefetch lookups.
+    """
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        source = prefix + field.source.replace(".", "__")
+        if isinstance(field, relations.ManyRelatedField):
+            prefetch.append(source)
+        elif isinstance(field, serializers.ListSerializer):
+            prefetch.append(source)
+            nested_select, nested_prefetch = get_related_lookups(field.child, source + "__")
+            prefetch.extend(nested_select + nested_prefetch)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(source)
+            nested_select, nested_prefetch = get_related_lookups(field, source + "__")
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+        elif isinstance(field, relations.RelatedField):
+            if not field.use_pk_only_optimization():
+                select.append(source)
+        elif "." in field.source:
+            select.append(prefix + "__".join(field.source.split(".")[:-1]))
+    return select, prefetch
+
+
+class SerializerPrefetchMixin:
+    """
+    A viewset mixin that applies the ``select_related`` and
+    ``prefetch_related`` lookups required by the serializer class to the
+    queryset, so list and detail responses run a constant number of queries
+    whatever the page size.
+
+    Custom actions that build their own queryset can pass it through
+    ``optimize_queryset``.
+    """
+
+    def get_queryset(self):
+        return self.optimize_queryset(super().get_queryset())
+
+    def optimize_queryset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if serializer_class not in _related_lookups_cache:
+            _related_lookups_cache[serializer_class] = get_related_lookups(
+                serializer_class()
+            )
+        select, prefetch = _related_lookups_cache[serializer_class]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class ProjectedListMixin:
+    """
+    A viewset mixin rendering its lists from ``values()`` rows through the
+    compiled field plan of the serializer class (see
+    ``utils.projections.FieldPlan``) rather than from model instances, with
+    the very same response body and number of queries.
+
+    Opt-in: the lists are only projected when the viewset sets
+    ``projected_list = True``, otherwise they render through the serializer
+    as usual. Falls back to the serializer as well when the serializer class
+    cannot be planned. Custom list actions can render their queryset with
+    ``list_response``.
+    """
+
+    projected_list = False
+
+    def list(self, request, *args, **kwargs):
+        if not self.projected_list:
+            return super().list(request, *args, **kwargs)
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        plan = get_field_plan(self.get_serializer_class()) if self.projected_list else None
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        # The keyset paginators encode their cursors from the rows.
+        queryset = plan.project(queryset, getattr(self.paginator, "keyset_fields", ()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(queryset))
+
+
+class ConditionalGetMixin:
+    """
+    A viewset mixin answering conditional ``list`` and ``retrieve`` requests
+    (``If-None-Match`` / ``If-Modified-Since``) with a 304 before the
+    serializer runs.
+
+    The validators are derived from ``BaseModel.updated_at`` with a single
+    query and without rendering the body:
+
+    - a list from ``max(updated_at)`` and the row count of the filtered
+      queryset, so deletions change the ``ETag`` too. Lists only validate
+      by ``ETag``, they send no ``Last-Modified``
+    - a detail from the ``updated_at`` of the object
+
+    The ``ETag`` also covers the full path, as pages and filters of the same
+    rows render differently. Relation changes are only seen when they save
+    the object itself, as the API writes do.
+
+    Custom list actions can wrap their response building with
+    ``conditional_list_response``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_list_response(
+            request,
+            self.filter_queryset(self.get_queryset()),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            last_modified = (
+                self.filter_queryset(self.get_queryset())
+                .prefetch_related(None)
+                .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            # A malformed key, answered with a 404 by DRF.
+            last_modified = None
+        if last_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            request,
+            last_modified,
+            last_modified,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def conditional_list_response(self, request, queryset, build: Callable[[], Response]):
+        values = queryset.order_by().aggregate(
+            last_modified=Max("updated_at"), count=Count("pk")
+        )
+        # No Last-Modified: the latest updated_at does not go down when a row
+        # is hard deleted, a client validating by date only would keep the
+        # stale list.
+        return self.conditional_response(
+            request, "%s:%s" % (values["last_modified"], values["count"]), None, build
+        )
+
+    def conditional_response(
+        self, request, version, last_modified: Optional[datetime], build: Callable[[], Response]
+    ):
+        """
+        Returns a 304 when the request validators match the given version and
+        last modification time, otherwise the response built by ``build``.
+        Both carry the ``ETag`` header, and ``Last-Modified`` when a time is
+        given.
+        """
+        etag = '"%s"' % hashlib.md5(
+            ("%s|%s" % (request.get_full_path(), version)).encode()
+        ).hexdigest()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build()
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    A viewset mixin sending the queries of its read actions to the read
+    replicas, see ``utils.routers.PrimaryReplicaRouter``.
+
+    The actions listed in ``replica_actions`` read from a replica, every
+    other action and the authentication read from the primary. A successful
+    write sticks the reads of its user to the primary for
+    ``REPLICA_STICKY_SECONDS``, so users always read their own writes.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(False):
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not (request.user.is_authenticated and is_stuck_to_primary(request.user))
+        ):
+            enable_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            stick_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
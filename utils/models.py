@@ -1,12 +1,17 @@
-import uuid
 from django.db import models
+from utils.managers import ActiveManager, SoftDeleteQuerySet
+from utils.uuids import uuid7
 
 
 class BaseModel(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Every row, soft deleted ones included, and only the active rows.
+    objects = SoftDeleteQuerySet.as_manager()
+    active_objects = ActiveManager.from_queryset(SoftDeleteQuerySet)()
+
     class Meta:
         abstract = True
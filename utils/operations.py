@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+class RunSQLForVendor(migrations.RunSQL):
+    """
+    A RunSQL operation that only runs on the given database vendor.
+
+    Used for backend specific objects (exclusion constraints, triggers,
+    extensions) that have no portable Django equivalent. The operation does
+    not touch the migration state, so the models stay backend agnostic.
+    """
+
+    def __init__(self, vendor: str, sql, reverse_sql=None, **kwargs):
+        self.vendor = vendor
+        super().__init__(sql, reverse_sql=reverse_sql, **kwargs)
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        kwargs["vendor"] = self.vendor
+        return name, args, kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return "Raw SQL operation (%s only)" % self.vendor
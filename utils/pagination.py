@@ -0,0 +1,186 @@
+import base64
+import json
+import uuid
+from collections import OrderedDict
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from utils.db import alist
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    Without a ``cursor`` query parameter it behaves exactly like
+    ``PageNumberPagination``. Passing ``cursor`` (empty for the first page)
+    switches to keyset pagination on ``(created_at, id)``, newest first:
+    each page is a single index range scan that starts right after the
+    previous page, without the ``COUNT(*)`` and ``OFFSET`` of page numbers,
+    so page 10,000 costs the same as page 1. Keyset responses carry
+    ``next``, ``previous`` and ``results`` but no ``count``.
+
+    The tie breaker is a UUID primary key, cursors carrying anything else
+    are answered with a 404 like any other invalid cursor.
+
+    The paginated tables need a ``(created_at, id)`` index, or one prefixed
+    with the equality filters of the endpoint, e.g. ``(user, created_at,
+    id)`` for the rental records of a user.
+    """
+
+    cursor_query_param = "cursor"
+    keyset_fields = ("created_at", "id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def use_keyset(self, request) -> bool:
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view=view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        position, reverse = self.decode_cursor(request)
+        queryset = self.get_keyset_queryset(queryset, position, reverse)
+        return self.set_keyset_page(list(queryset[: page_size + 1]), page_size, position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async counterpart of ``paginate_queryset``, for async views.
+        """
+        self.keyset = self.use_keyset(request)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        if not self.keyset:
+            paginator = self.django_paginator_class(queryset, page_size)
+            # Counted here, so that picking the page runs no sync query.
+            paginator.count = await queryset.acount()
+            page_number = self.get_page_number(request, paginator)
+            try:
+                self.page = paginator.page(page_number)
+            except InvalidPage as exc:
+                raise NotFound(
+                    self.invalid_page_message.format(page_number=page_number, message=str(exc))
+                )
+            self.page.object_list = await alist(self.page.object_list)
+            return self.page.object_list
+
+        position, reverse = self.decode_cursor(request)
+        queryset = self.get_keyset_queryset(queryset, position, reverse)
+        return self.set_keyset_page(
+            await alist(queryset[: page_size + 1]), page_size, position, reverse
+        )
+
+    def get_keyset_queryset(self, queryset, position, reverse: bool):
+        """
+        Orders the queryset on the keyset and starts it after the position.
+        """
+        field, tie_breaker = self.keyset_fields
+        if reverse:
+            queryset = queryset.order_by(field, tie_breaker)
+        else:
+            queryset = queryset.order_by("-" + field, "-" + tie_breaker)
+        if position is not None:
+            # The redundant inclusive bound on the leading field is what lets
+            # the planner turn the OR into a range scan of the index.
+            lookup, inclusive_lookup = ("gt", "gte") if reverse else ("lt", "lte")
+            queryset = queryset.filter(
+                Q(**{"%s__%s" % (field, inclusive_lookup): position[0]}),
+                Q(**{"%s__%s" % (field, lookup): position[0]})
+                | Q(**{"%s__%s" % (tie_breaker, lookup): position[1]}),
+            )
+        return queryset
+
+    def set_keyset_page(self, results, page_size: int, position, reverse: bool):
+        """
+        Keeps a page of the ``page_size + 1`` fetched rows, the extra row
+        telling whether there is more in the fetched direction.
+        """
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse: bool) -> str:
+        field, tie_breaker = self.keyset_fields
+        # The page holds model instances, or ``values()`` rows when projected.
+        if isinstance(instance, dict):
+            value, tie_breaker_value = instance[field], instance[tie_breaker]
+        else:
+            value, tie_breaker_value = getattr(instance, field), getattr(instance, tie_breaker)
+        payload = json.dumps([value.isoformat(), str(tie_breaker_value), reverse])
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Returns the ``(created_at, id)`` position and direction of the cursor
+        in the request, the position is None for the first page.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            value, tie_breaker, reverse = json.loads(base64.urlsafe_b64decode(cursor))
+            value = parse_datetime(value)
+            tie_breaker = str(uuid.UUID(tie_breaker))
+        except (AttributeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (value, tie_breaker), bool(reverse)
+
+
+class KeysetOnlyPagination(KeysetPagination):
+    """
+    Keyset pagination whether or not a ``cursor`` is passed, for endpoints
+    whose ``COUNT(*)`` would cost as much as walking the whole result.
+    """
+
+    def use_keyset(self, request) -> bool:
+        return True
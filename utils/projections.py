@@ -0,0 +1,157 @@
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Q
+from rest_framework import relations, serializers
+
+_field_plans: Dict[Type, Optional["FieldPlan"]] = {}
+
+
+def identity(value):
+    return value
+
+
+class FieldPlan:
+    """
+    Renders model rows with the output of a ``ModelSerializer`` but without
+    instantiating models nor serializers per row.
+
+    The plan is compiled once per serializer class from its readable fields:
+    every output key maps to a column of a ``values()`` projection and to the
+    ``to_representation`` of its serializer field, so the rendered dicts are
+    the ones the serializer returns, key order included. Many related
+    primary key fields are fetched with one query per page, aggregated per
+    row with ``ArrayAgg`` on Postgres.
+
+    Only serializers made of model fields, primary key related fields and
+    many related primary key fields can be planned, see ``get_field_plan``.
+    """
+
+    def __init__(self, model, fields: List[Tuple[str, str, Callable]], many: List[str]):
+        self.model = model
+        # (output name, row key, representation) of the fields, in output
+        # order. The row key of a many related field is its model field name.
+        self.fields = fields
+        # The model field names of the many related fields.
+        self.many = many
+
+    def project(self, queryset, extra_columns: Sequence[str] = ()):
+        """
+        Returns the queryset as ``values()`` dicts of the planned columns, and
+        of the ``extra_columns`` needed e.g. by keyset pagination.
+        """
+        columns = [column for _, column, _ in self.fields if column not in self.many]
+        if self.many:
+            columns.append("pk")
+        return queryset.prefetch_related(None).values(*dict.fromkeys(columns + list(extra_columns)))
+
+    def fetch_many(self, rows: List[Dict]) -> None:
+        """
+        Adds the related primary keys of the many related fields to the
+        rows, ordered like the prefetched related managers, i.e. by the
+        default ordering of the related model.
+        """
+        pks = [row["pk"] for row in rows]
+        for name in self.many:
+            field = self.model._meta.get_field(name)
+            related_ordering = field.related_model._meta.ordering
+            related_ids = defaultdict(list)
+            if connection.vendor == "postgresql":
+                from django.contrib.postgres.aggregates import ArrayAgg
+
+                ordering = [
+                    "%s%s__%s" % ("-" if order.startswith("-") else "", name, order.lstrip("-"))
+                    for order in related_ordering
+                ]
+                aggregated = (
+                    self.model._base_manager.filter(pk__in=pks)
+                    .order_by()
+                    .values_list("pk")
+                    .annotate(
+                        ids=ArrayAgg(
+                            name, ordering=ordering, filter=Q(**{"%s__isnull" % name: False})
+                        )
+                    )
+                )
+                related_ids.update((pk, ids or []) for pk, ids in aggregated)
+            else:
+                query_name = field.related_query_name()
+                for pk, related_pk in (
+                    field.related_model._default_manager.filter(**{query_name + "__in": pks})
+                    .order_by(*related_ordering)
+                    .values_list(query_name, "pk")
+                ):
+                    related_ids[pk].append(related_pk)
+            for row in rows:
+                row[name] = related_ids[row["pk"]]
+
+    def render(self, rows: List[Dict]) -> List[OrderedDict]:
+        """
+        Renders ``values()`` rows of ``project`` like the serializer would
+        render their model instances.
+        """
+        rows = list(rows)
+        if self.many and rows:
+            self.fetch_many(rows)
+        results = []
+        for row in rows:
+            result = OrderedDict()
+            for name, column, represent in self.fields:
+                value = row[column]
+                result[name] = None if value is None else represent(value)
+            results.append(result)
+        return results
+
+
+def get_field_plan(serializer_class: Type[serializers.ModelSerializer]) -> Optional[FieldPlan]:
+    """
+    Returns the compiled field plan of the serializer class, or None when
+    one of its readable fields cannot be read from a ``values()`` row, e.g.
+    a nested serializer or a method field.
+    """
+    if serializer_class not in _field_plans:
+        _field_plans[serializer_class] = compile_field_plan(serializer_class)
+    return _field_plans[serializer_class]
+
+
+def compile_field_plan(serializer_class: Type[serializers.ModelSerializer]) -> Optional[FieldPlan]:
+    if not issubclass(serializer_class, serializers.ModelSerializer):
+        return None
+    model = serializer_class.Meta.model
+    fields, many = [], []
+    for field in serializer_class()._readable_fields:
+        if "." in field.source or field.source == "*":
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, relations.ManyRelatedField):
+            child = field.child_relation
+            if type(child) is not relations.PrimaryKeyRelatedField or not model_field.many_to_many:
+                return None
+            fields.append((field.field_name, field.source, primary_key_representation(child)))
+            many.append(field.source)
+        elif isinstance(field, relations.RelatedField):
+            if type(field) is not relations.PrimaryKeyRelatedField or model_field.many_to_many:
+                return None
+            fields.append((field.field_name, field.source, primary_key_representation(field)))
+        elif isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField)):
+            return None
+        elif model_field.is_relation:
+            return None
+        else:
+            column = "pk" if model_field.primary_key else field.source
+            fields.append((field.field_name, column, field.to_representation))
+    return FieldPlan(model, fields, many)
+
+
+def primary_key_representation(field: relations.PrimaryKeyRelatedField) -> Callable:
+    """
+    Returns the representation of a primary key value of the related field,
+    ``PrimaryKeyRelatedField.to_representation`` taking the related object.
+    """
+    if field.pk_field is not None:
+        return field.pk_field.to_representation
+    return identity
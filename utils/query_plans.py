@@ -0,0 +1,97 @@
+import re
+from typing import List, Optional
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SORT_PATTERNS = {
+    "postgresql": re.compile(r"^\s*(->\s*)?(Incremental )?Sort\b", re.MULTILINE),
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR (ORDER|GROUP) BY"),
+}
+
+
+def disable_seqscan() -> None:
+    """
+    Disables sequential scans on Postgres for the current transaction, so
+    that small test tables still show whether an index is usable at all.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+
+def explain(queryset) -> str:
+    """
+    Returns the query plan of the given queryset.
+    """
+    disable_seqscan()
+    return queryset.explain()
+
+
+def explain_sql(sql: str) -> str:
+    """
+    Returns the query plan of a captured SQL statement, its parameters
+    already inlined as in ``connection.queries``.
+    """
+    disable_seqscan()
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+def analyze(*tables: str) -> None:
+    """
+    Refreshes the planner statistics of the given tables after seeding.
+    """
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute("ANALYZE %s" % connection.ops.quote_name(table))
+
+
+def plan_regressions(plan: str, table: str) -> List[str]:
+    """
+    Returns the full scans of the table and the explicit sorts of the plan.
+    """
+    if connection.vendor == "postgresql":
+        full_scan = re.compile(r"Seq Scan on %s\b" % re.escape(table))
+    else:
+        full_scan = re.compile(r"\bSCAN %s$" % re.escape(table), re.MULTILINE)
+    regressions = ["full scan of %s" % table] if full_scan.search(plan) else []
+    sort = SORT_PATTERNS.get(connection.vendor)
+    if sort is not None and sort.search(plan):
+        regressions.append("explicit sort")
+    return regressions
+
+
+class QueryPlanAssertionsMixin:
+    """
+    A test case mixin asserting the query plans of API endpoints.
+
+    The page query of an endpoint is captured from a real request and
+    explained as is, so the assertions follow the filters and ordering the
+    views actually apply.
+    """
+
+    def capture_page_query(self, url: str, table: str, params: Optional[dict] = None) -> str:
+        """
+        Requests the endpoint and returns the SQL of its ordered, limited
+        query on the table.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        quoted_table = connection.ops.quote_name(table)
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if "FROM %s" % quoted_table in sql and "ORDER BY" in sql and "LIMIT" in sql:
+                return sql
+        self.fail("%s ran no ordered, limited query on %s" % (url, table))
+
+    def assertUsesIndex(self, sql: str, table: str, index: str) -> None:
+        """
+        Asserts the query reads the table through the index, without a full
+        scan of the table or an explicit sort.
+        """
+        plan = explain_sql(sql)
+        self.assertIn(index, plan, "Index %s is not used:\n%s" % (index, plan))
+        self.assertEqual(plan_regressions(plan, table), [], plan)
@@ -0,0 +1,88 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+STICKY_KEY_PREFIX = "primary-sticky:"
+
+
+@contextmanager
+def replica_reads(enabled: bool = True):
+    """
+    Allows (or forbids) the reads run in the block to go to a replica.
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def enable_replica_reads() -> None:
+    """
+    Sends the following reads of the enclosing ``replica_reads(False)``
+    block to a replica.
+    """
+    _replica_reads.set(True)
+
+
+def replica_reads_enabled() -> bool:
+    return _replica_reads.get() and bool(getattr(settings, "REPLICA_DATABASES", []))
+
+
+def _sticky_cache():
+    return caches[getattr(settings, "REPLICA_STICKY_CACHE_ALIAS", "default")]
+
+
+def stick_to_primary(user) -> None:
+    """
+    Sends the reads of the given user to the primary for the next
+    ``REPLICA_STICKY_SECONDS``, so that they read their own writes whatever
+    the replication lag.
+    """
+    _sticky_cache().set(
+        STICKY_KEY_PREFIX + str(user.pk), True, timeout=getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+    )
+
+
+def is_stuck_to_primary(user) -> bool:
+    return bool(_sticky_cache().get(STICKY_KEY_PREFIX + str(user.pk)))
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to the primary (``default``) database and, inside
+    ``replica_reads`` blocks, reads to a random alias of
+    ``REPLICA_DATABASES``.
+
+    Reads are only sent to replicas when explicitly allowed, e.g. by the
+    read actions of ``ReplicaReadMixin`` viewsets, so services, commands and
+    the rent path keep reading what they write. Migrations only run on the
+    primary, replicas get the schema through replication.
+
+    Settings:
+        REPLICA_DATABASES: The replica database aliases, none by default.
+        REPLICA_STICKY_SECONDS: Seconds the reads of a user stick to the
+            primary after their writes, 5 by default. Keep it above the
+            replication lag.
+        REPLICA_STICKY_CACHE_ALIAS: The Django cache alias remembering the
+            users who wrote recently, "default" by default. Must be shared by
+            every worker.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_reads_enabled():
+            return random.choice(settings.REPLICA_DATABASES)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, "REPLICA_DATABASES", [])
@@ -0,0 +1,75 @@
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Separator of list values (e.g. category ids) in a CSV cell.
+CSV_LIST_SEPARATOR = "|"
+
+
+class Echo:
+    """
+    A file-like object whose ``write`` returns the value instead of
+    buffering it, so ``csv.writer`` can be used to produce single lines.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows: Iterable[Dict], fields: List[str]) -> Iterator[str]:
+    """
+    Yields a CSV header line followed by one line per row.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            [
+                CSV_LIST_SEPARATOR.join(str(item) for item in row[field])
+                if isinstance(row[field], (list, tuple))
+                else row[field]
+                for field in fields
+            ]
+        )
+
+
+def iter_ndjson(rows: Iterable[Dict], fields: List[str]) -> Iterator[str]:
+    """
+    Yields one JSON object per line and row.
+    """
+    for row in rows:
+        yield json.dumps({field: row[field] for field in fields}, cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
+
+
+def export_response(
+    rows: Iterable[Dict], fields: List[str], export_format: str, file_name: str
+) -> StreamingHttpResponse:
+    """
+    Returns a response streaming the given rows as CSV or NDJSON.
+
+    The rows are consumed lazily while the response is sent, so memory use
+    does not depend on the number of rows as long as ``rows`` is lazy too.
+
+    Raises:
+        ValueError: If the export format is not supported.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            "Unsupported export format '%s', expected one of: %s"
+            % (export_format, ", ".join(EXPORT_FORMATS))
+        )
+    iter_lines, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(iter_lines(rows, fields), content_type=content_type)
+    response["Content-Disposition"] = 'attachment; filename="%s.%s"' % (
+        file_name,
+        export_format,
+    )
+    return response
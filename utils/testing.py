@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from utils.instrumentation import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """
+    A TestCase mixin to fail a test when a block of code, typically a
+    request to an endpoint, issues more queries than its budget.
+
+    Usage:
+        with self.assertQueryBudget(3):
+            self.client.get("/api/v1/uavs/")
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int):
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+        if recorder.count > budget:
+            self.fail(
+                "%d queries executed, the budget is %d:\n%s"
+                % (
+                    recorder.count,
+                    budget,
+                    "\n".join(
+                        "%d x %s" % (count, statement)
+                        for statement, count in recorder.fingerprints.most_common()
+                    ),
+                )
+            )